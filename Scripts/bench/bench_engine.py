@@ -0,0 +1,63 @@
+"""
+Herd Engine Benchmark
+Fixed-timestep herd engine throughput (wander, lying/standing, paddock
+bounds, optional separation) in steps per second versus herd size
+
+Usage: python Scripts/bench/bench_engine.py [--sizes 150 1000 10000 50000] [--steps 200] [--json out.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ue'))
+import herd_engine
+
+def bench_engine(cow_count, steps, separation, seed=42):
+    """Steps per second, cow updates per second and real-time factor for one herd size"""
+    engine = herd_engine.synthetic(cow_count, seed=seed, separation=separation)
+
+    # Warm up allocations before timing
+    engine.step()
+
+    start = time.perf_counter()
+    engine.run(steps)
+    elapsed = time.perf_counter() - start
+
+    steps_per_s = steps / elapsed
+    return {
+        'cows': len(engine), 'separation': separation, 'steps': steps,
+        'ms_per_step': elapsed / steps * 1000,
+        'steps_per_s': steps_per_s,
+        'cow_steps_per_s': steps_per_s * len(engine),
+        'realtime_factor': steps_per_s * engine.dt
+    }
+
+def main(argv=None):
+    """Run the engine benchmark across herd sizes, with and without separation"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[150, 1000, 10000, 50000])
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"Fixed step {herd_engine.DT:g}s")
+    print(f"{'cows':>8}  {'separation':>10}  {'ms/step':>10}  {'steps/s':>10}  {'cow-steps/s':>12}  {'x realtime':>10}")
+    for separation in (False, True):
+        for size in args.sizes:
+            result = bench_engine(size, args.steps, separation)
+            results.append(result)
+            print(f"{result['cows']:>8}  {'on' if separation else 'off':>10}  {result['ms_per_step']:>10.3f}  "
+                  f"{result['steps_per_s']:>10.0f}  {result['cow_steps_per_s']:>12.3g}  "
+                  f"{result['realtime_factor']:>10.0f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'dt': herd_engine.DT, 'engine': results}, f, indent=2)
+
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Farm Generator Benchmark
+Runs the editor generators against the recording fake `unreal` module across
+paddock counts, fence spacings and stocking densities, and reports actors
+spawned, API calls made and wall time per run
+
+Usage: python Scripts/bench/bench_generate.py [--scenarios l1 l2 animals time_lapse]
+       [--paddocks 4 16 64] [--fence-spacing 2 4] [--density 2 8] [--json out.json]
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ue'))
+import fake_unreal
+import farm_config
+
+SCENARIOS = ('l1', 'l2', 'animals', 'time_lapse')
+
+# Generator modules, imported once the fake is installed
+GENERATORS = ('actor_registry', 'animals_regen', 'asset_cache', 'farm_config', 'farm_generate',
+              'farm_generate_l2', 'grazing_store', 'solar', 'tod_utils')
+
+# Number of API calls listed per run in the console summary
+TOP_CALLS = 5
+
+def load_json(name):
+    """Read one of the project's config files"""
+    with open(os.path.join(farm_config.DATA_DIR, name), 'r') as f:
+        return json.load(f)
+
+def write_configs(content_dir, paddocks, fence_spacing, density):
+    """Write L1 and L2 configs and a fresh grazing state for one matrix case"""
+    data_dir = os.path.join(content_dir, 'Farm', 'Data')
+    os.makedirs(data_dir, exist_ok=True)
+
+    config = load_json('farm_config.json')
+    config.update({'paddocks': paddocks, 'fence_post_spacing_m': fence_spacing})
+    width, height = config.get('paddock_size_m', [120, 80])
+    config['cow_count'] = int(width * height * paddocks / 10000 * density)
+
+    config_v2 = load_json('farm_config_v2.json')
+    config_v2.update({'paddocks': paddocks, 'fence_post_spacing_m': fence_spacing,
+                      'stocking_density_cows_per_ha': density})
+    # Lift the herd cap so density actually scales the herd
+    config_v2['max_cows'] = max(config_v2.get('max_cows', 150), config['cow_count'])
+
+    for name, data in (('farm_config.json', config), ('farm_config_v2.json', config_v2),
+                       ('GrazingState.json', load_json('GrazingState.json'))):
+        with open(os.path.join(data_dir, name), 'w') as f:
+            json.dump(data, f, indent=2)
+
+    # A stale regen manifest would let the L2 generator skip sections, and a
+    # rotation log or pasture from the previous case would carry over
+    for name in ('RegenManifest.json', 'GrazingLog.jsonl', 'Pasture.npz'):
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+def import_generators():
+    """Import the generator modules against the fake"""
+    return {name: importlib.import_module(name) for name in GENERATORS}
+
+def new_session(modules):
+    """Fresh fake editor session and empty per-session caches in every module"""
+    fake_unreal.reset()
+    modules['actor_registry'].invalidate()
+    modules['asset_cache'].invalidate()
+    modules['asset_cache'].reset_stats()
+    modules['farm_config'].invalidate()
+    modules['grazing_store'].invalidate()
+    modules['solar']._tables.clear()
+    modules['tod_utils']._controller = None
+
+def scenario_steps(scenario, modules):
+    """(untimed setup, timed run) callables for a scenario"""
+    build_l2 = lambda: modules['farm_generate_l2'].main(force_rebuild=True)
+    return {
+        'l1': (None, modules['farm_generate'].main),
+        'l2': (None, build_l2),
+        'animals': (build_l2, modules['animals_regen'].regenerate_animals),
+        'time_lapse': (build_l2, modules['tod_utils'].create_time_lapse)
+    }[scenario]
+
+def run_case(scenario, modules, case, verbose=False):
+    """Run one scenario for one matrix case and collect its counters"""
+    setup, run = scenario_steps(scenario, modules)
+    new_session(modules)
+
+    # Generators print per step, keep the console to the summary table
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        if setup:
+            setup()
+        fake_unreal.reset_calls()
+
+        start = time.perf_counter()
+        run()
+        wall = time.perf_counter() - start
+
+    result = dict(scenario=scenario, **case, wall_s=wall)
+    result.update(fake_unreal.get_stats())
+    result['calls'] = fake_unreal.get_calls()
+    return result
+
+def top_calls(result, count=TOP_CALLS):
+    """Most frequent API calls of a run as 'name xN' strings"""
+    calls = sorted(result['calls'].items(), key=lambda item: -item[1]['count'])[:count]
+    return ', '.join(f"{name} x{entry['count']}" for name, entry in calls)
+
+def main(argv=None):
+    """Run the generator benchmark matrix"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--paddocks', type=int, nargs='+', default=[4, 16, 64])
+    parser.add_argument('--fence-spacing', type=float, nargs='+', default=[2.0, 4.0])
+    parser.add_argument('--density', type=float, nargs='+', default=[2.0, 8.0],
+                        help='Stocking density in cows per hectare')
+    parser.add_argument('--latency-us', type=float, default=0.0,
+                        help='Simulated cost of every editor API call, microseconds')
+    parser.add_argument('--verbose', action='store_true', help='Show generator output')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    fake_unreal.CALL_LATENCY = args.latency_us / 1e6
+
+    project_dir = tempfile.mkdtemp(prefix='farm_bench_')
+    content_dir = os.path.join(project_dir, 'Content')
+    try:
+        fake_unreal.install(content_dir)
+        modules = import_generators()
+
+        print(f"{'scenario':<11}  {'paddocks':>8}  {'spacing':>7}  {'density':>7}  {'spawned':>8}  "
+              f"{'instances':>9}  {'api calls':>10}  {'wall ms':>9}  {'bridge ms':>9}")
+
+        results = []
+        for paddocks, spacing, density in itertools.product(args.paddocks, args.fence_spacing, args.density):
+            write_configs(content_dir, paddocks, spacing, density)
+            case = {'paddocks': paddocks, 'fence_spacing_m': spacing, 'density_cows_per_ha': density}
+            for scenario in args.scenarios:
+                result = run_case(scenario, modules, case, args.verbose)
+                results.append(result)
+                print(f"{scenario:<11}  {paddocks:>8}  {spacing:>7g}  {density:>7g}  "
+                      f"{result['actors_spawned']:>8}  {result['instances']:>9}  {result['api_calls']:>10}  "
+                      f"{result['wall_s'] * 1000:>9.1f}  {result['bridge_s'] * 1000:>9.1f}")
+                if args.verbose:
+                    print(f"  top calls: {top_calls(result)}")
+    finally:
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'latency_us': args.latency_us, 'generate': results}, f, indent=2)
+
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Herd Simulation Benchmark
+Times the vectorized wander step and spatial-hash separation outside the editor
+
+Usage: python Scripts/bench/bench_herd.py [--sizes 150 1000 10000] [--steps 200] [--json out.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ue'))
+import herd_sim
+import spatial_hash
+
+# Herd density of the default 150 cows over one 120m x 80m area,
+# kept constant so larger herds spread over proportionally more ground
+BASE_COWS = 150
+BASE_EXTENT = (12000.0, 8000.0)
+
+# Brute force pair search is O(N^2) in memory, skip it for larger herds
+BRUTE_FORCE_LIMIT = 5000
+
+def bench_wander(cow_count, steps, seed=42):
+    """Average milliseconds per wander step for a herd of cow_count"""
+    rng = np.random.default_rng(seed)
+    state = herd_sim.random_herd(cow_count, rng)
+
+    # Warm up allocations before timing
+    herd_sim.step_wander(state, rng)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        herd_sim.step_wander(state, rng)
+    elapsed = time.perf_counter() - start
+
+    return {'cows': cow_count, 'steps': steps, 'ms_per_step': elapsed / steps * 1000}
+
+def scaled_extent(cow_count):
+    """Area holding cow_count cows at the base herd density"""
+    factor = (cow_count / BASE_COWS) ** 0.5
+    return (BASE_EXTENT[0] * factor, BASE_EXTENT[1] * factor)
+
+def bench_separation(cow_count, steps, seed=42):
+    """Milliseconds per wander step with separation, plus grid vs brute force pair search"""
+    rng = np.random.default_rng(seed)
+    state = herd_sim.random_herd(cow_count, rng, extent=scaled_extent(cow_count))
+    grid = herd_sim.make_grid()
+
+    herd_sim.step_wander(state, rng, grid=grid)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        herd_sim.step_wander(state, rng, grid=grid)
+    step_ms = (time.perf_counter() - start) / steps * 1000
+
+    radius = herd_sim.SEPARATION_RADIUS
+    start = time.perf_counter()
+    grid.build(state.position)
+    pairs = len(grid.neighbor_pairs(radius)[0])
+    grid_ms = (time.perf_counter() - start) * 1000
+
+    brute_ms = None
+    if cow_count <= BRUTE_FORCE_LIMIT:
+        start = time.perf_counter()
+        brute_pairs = len(spatial_hash.brute_force_pairs(state.position, radius)[0])
+        brute_ms = (time.perf_counter() - start) * 1000
+        if brute_pairs != pairs:
+            raise RuntimeError(f"grid found {pairs} pairs, brute force {brute_pairs}")
+
+    return {
+        'cows': cow_count, 'steps': steps, 'ms_per_step': step_ms,
+        'pairs': pairs, 'grid_pairs_ms': grid_ms, 'brute_pairs_ms': brute_ms
+    }
+
+def main(argv=None):
+    """Run the wander and separation benchmarks across herd sizes"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[150, 1000, 10000, 50000])
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    results = {'wander': [], 'separation': []}
+    print("Wander step")
+    print(f"{'cows':>8}  {'ms/step':>10}")
+    for size in args.sizes:
+        result = bench_wander(size, args.steps)
+        results['wander'].append(result)
+        print(f"{result['cows']:>8}  {result['ms_per_step']:>10.3f}")
+
+    print("\nWander step with separation (constant density)")
+    print(f"{'cows':>8}  {'ms/step':>10}  {'pairs':>8}  {'grid ms':>10}  {'brute ms':>10}")
+    for size in args.sizes:
+        result = bench_separation(size, args.steps)
+        results['separation'].append(result)
+        brute = '-' if result['brute_pairs_ms'] is None else f"{result['brute_pairs_ms']:.3f}"
+        print(f"{result['cows']:>8}  {result['ms_per_step']:>10.3f}  {result['pairs']:>8}  "
+              f"{result['grid_pairs_ms']:>10.3f}  {brute:>10}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Farm Planner Benchmark
+Times serial versus process-pool L2 planning and checks both give the same plan
+
+Usage: python Scripts/bench/bench_planner.py [--paddocks 500 5000] [--workers 2 4] [--json out.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ue'))
+import farm_config
+import farm_plan
+
+def time_plan(config, workers, repeats):
+    """Best wall-clock seconds over repeats, plus the last plan"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        plan = farm_plan.plan_farm_l2(config, {}, workers=workers)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, plan
+
+def same_plan(a, b):
+    """True when two plans hold identical rows and attributes in every category"""
+    for category in farm_plan.CATEGORIES:
+        if len(a.batches[category]) != len(b.batches[category]):
+            return False
+        for batch_a, batch_b in zip(a.batches[category], b.batches[category]):
+            if not np.array_equal(batch_a.transforms, batch_b.transforms):
+                return False
+            for name, values in batch_a.attributes.items():
+                if not np.array_equal(values, batch_b.attributes[name]):
+                    return False
+    return True
+
+def bench_planner(paddocks, worker_counts, repeats=3):
+    """Serial and parallel timings for one farm size"""
+    config = farm_config.as_config({'paddocks': paddocks, 'seed': 42})
+    serial_seconds, serial_plan = time_plan(config, 0, repeats)
+
+    result = {'paddocks': paddocks, 'instances': serial_plan.count(), 'serial_s': serial_seconds, 'parallel': []}
+    for workers in worker_counts:
+        seconds, plan = time_plan(config, workers, repeats)
+        result['parallel'].append({
+            'workers': workers,
+            'seconds': seconds,
+            'speedup': serial_seconds / seconds,
+            'identical': same_plan(serial_plan, plan)
+        })
+    return result
+
+def main(argv=None):
+    """Run the planner benchmark across farm sizes and worker counts"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--paddocks', type=int, nargs='+', default=[500, 5000, 20000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    print(f"CPU count: {os.cpu_count()}")
+    print(f"{'paddocks':>9}  {'instances':>10}  {'workers':>7}  {'seconds':>9}  {'speedup':>8}  identical")
+
+    results = []
+    for paddocks in args.paddocks:
+        result = bench_planner(paddocks, args.workers, args.repeats)
+        results.append(result)
+        print(f"{paddocks:>9}  {result['instances']:>10}  {'serial':>7}  {result['serial_s']:>9.3f}  {1.0:>8.2f}")
+        for run in result['parallel']:
+            print(f"{'':>9}  {'':>10}  {run['workers']:>7}  {run['seconds']:>9.3f}  "
+                  f"{run['speedup']:>8.2f}  {run['identical']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'cpu_count': os.cpu_count(), 'planner': results}, f, indent=2)
+
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,692 @@
+"""
+Recording Fake Unreal Module
+Minimal stand-in for the editor's `unreal` module covering the calls the farm
+generators make. Every bridge crossing (function, method, struct constructor
+or property write) is counted and timed, so generation cost can be measured
+on a machine without the editor.
+
+Usage: import fake_unreal; fake_unreal.install(content_dir) before importing
+any Scripts/ue module, then fake_unreal.reset() between runs.
+"""
+import functools
+import os
+import sys
+import time
+
+# Simulated cost added to every bridge crossing, seconds
+CALL_LATENCY = 0.0
+
+# Assets that exist in every project
+ENGINE_MESHES = {
+    '/Engine/BasicShapes/Cube': 12,
+    '/Engine/BasicShapes/Cylinder': 128,
+    '/Engine/BasicShapes/Sphere': 960,
+    '/Engine/BasicShapes/Cone': 64,
+    '/Engine/BasicShapes/Plane': 2
+}
+MATERIAL_DIR = '/Game/Farm/Materials/'
+
+# Module level state, reset between benchmark runs
+_calls = {}
+_state = {'spawned': 0, 'destroyed': 0}
+_session = {}
+_paths = {'content': '', 'saved': '', 'project': ''}
+
+# --- Recording ---------------------------------------------------------------
+
+def _record(name, seconds):
+    entry = _calls.get(name)
+    if entry is None:
+        _calls[name] = [1, seconds]
+    else:
+        entry[0] += 1
+        entry[1] += seconds
+
+def bridge(name):
+    """Decorator counting and timing calls to a fake API under name"""
+    def wrap(func):
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            if CALL_LATENCY:
+                _spin(CALL_LATENCY)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, time.perf_counter() - start)
+        return call
+    return wrap
+
+def _spin(seconds):
+    """Busy wait, sleep() is far too coarse for microsecond latencies"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def recorded(cls):
+    """Class decorator recording every public method, and struct constructors
+
+    UObjects are created by the engine, so only constructors of plain structs
+    such as Vector count as crossings.
+    """
+    for attr, value in list(vars(cls).items()):
+        if attr == '__init__' and any(base.__name__ == 'Object' for base in cls.__mro__):
+            continue
+        if attr == '__init__' or (callable(value) and not attr.startswith('_')):
+            suffix = '' if attr == '__init__' else '.' + attr
+            setattr(cls, attr, bridge(cls.__name__ + suffix)(value))
+        elif isinstance(value, staticmethod):
+            setattr(cls, attr, staticmethod(bridge(f'{cls.__name__}.{attr}')(value.__func__)))
+    return cls
+
+def get_calls():
+    """{api name: {'count', 'seconds'}} for every crossing since the last reset"""
+    return {name: {'count': count, 'seconds': seconds} for name, (count, seconds) in sorted(_calls.items())}
+
+def get_stats():
+    """Totals of the current session: calls, bridge time, actors and instances"""
+    world = _session['world']
+    return {
+        'api_calls': sum(count for count, _ in _calls.values()),
+        'bridge_s': sum(seconds for _, seconds in _calls.values()),
+        'actors_spawned': _state['spawned'],
+        'actors_destroyed': _state['destroyed'],
+        'actors_alive': len(world.actors),
+        'instances': sum(component._instance_count() for actor in world.actors
+                         for component in actor._components if isinstance(component, InstancedStaticMeshComponent))
+    }
+
+def reset_calls():
+    """Zero the call counters but keep the level and assets"""
+    _calls.clear()
+    _state['spawned'] = 0
+    _state['destroyed'] = 0
+
+def reset():
+    """Start a fresh editor session: empty worlds, no saved assets, no counters"""
+    reset_calls()
+    _session['worlds'] = {}
+    _session['assets'] = {}
+    _session['directories'] = set()
+    _session['current_level'] = None
+    _session['world'] = _world('/Temp/Untitled_0')
+
+def install(content_dir, saved_dir=None):
+    """Register this module as `unreal` with the given project content directory"""
+    project_dir = os.path.dirname(os.path.normpath(content_dir))
+    _paths['content'] = os.path.join(content_dir, '')
+    _paths['saved'] = os.path.join(saved_dir or os.path.join(project_dir, 'Saved'), '')
+    _paths['project'] = os.path.join(project_dir, '')
+    reset()
+    sys.modules['unreal'] = sys.modules[__name__]
+    return sys.modules[__name__]
+
+# --- Math structs ------------------------------------------------------------
+
+@recorded
+class Vector:
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+@recorded
+class Rotator:
+    def __init__(self, roll=0.0, pitch=0.0, yaw=0.0):
+        self.roll = roll
+        self.pitch = pitch
+        self.yaw = yaw
+
+class Quat:
+    def __init__(self, rotator=None):
+        self._rotator = rotator or Rotator()
+
+    def rotator(self):
+        return self._rotator
+
+@recorded
+class Transform:
+    def __init__(self, location=None, rotation=None, scale=None):
+        self.translation = location or Vector()
+        # Like the real Transform, rotation reads back as a Quat
+        self.rotation = Quat(rotation)
+        self.scale3d = scale or Vector(1, 1, 1)
+
+@recorded
+class LinearColor:
+    def __init__(self, r=0.0, g=0.0, b=0.0, a=1.0):
+        self.r = r
+        self.g = g
+        self.b = b
+        self.a = a
+
+class Text(str):
+    def is_empty(self):
+        return not self
+
+class StreamingVolumeUsage:
+    SVB_LOADING = 0
+    SVB_LOADING_AND_VISIBILITY = 1
+
+class ComponentMobility:
+    STATIC = 0
+    STATIONARY = 1
+    MOVABLE = 2
+
+# --- Objects -----------------------------------------------------------------
+
+class Object:
+    """Base of every fake UObject; unknown setters and actions are no-ops"""
+
+    def __init__(self, name=''):
+        self._name = name
+        self._valid = True
+        self._properties = {}
+
+    def get_path_name(self):
+        return self._name
+
+    def get_name(self):
+        return self._name.rsplit('/', 1)[-1]
+
+    def set_editor_property(self, name, value):
+        self._properties[name] = value
+
+    def get_editor_property(self, name):
+        return self._properties.get(name)
+
+    def __getattr__(self, attr):
+        # set_intensity(), recapture_sky() and friends only change render state
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return bridge(f'{type(self).__name__}.{attr}')(lambda *args, **kwargs: None)
+
+recorded(Object)
+
+@recorded
+class StaticMesh(Object):
+    def __init__(self, name='', triangles=12):
+        super().__init__(name)
+        self._triangles = triangles
+
+    def get_num_triangles(self, lod_index):
+        return self._triangles
+
+class Material(Object):
+    pass
+
+class World(Object):
+    def __init__(self, name):
+        super().__init__(name)
+        self.actors = {}
+        self.streaming_levels = {}
+
+class Level(Object):
+    pass
+
+@recorded
+class LevelStreaming(Object):
+    def __init__(self, name=''):
+        super().__init__(name)
+        self.should_be_loaded = False
+        self.should_be_visible = False
+        self._level = Level(name)
+
+    def set_should_be_loaded(self, loaded):
+        self.should_be_loaded = loaded
+
+    def set_should_be_visible(self, visible):
+        self.should_be_visible = visible
+
+    def get_loaded_level(self):
+        return self._level if self.should_be_loaded else None
+
+class LevelStreamingDynamic(LevelStreaming):
+    pass
+
+# --- Components --------------------------------------------------------------
+
+class ActorComponent(Object):
+    pass
+
+class SceneComponent(ActorComponent):
+    pass
+
+@recorded
+class StaticMeshComponent(SceneComponent):
+    def __init__(self, name=''):
+        super().__init__(name)
+        self.static_mesh = None
+        self._materials = {}
+
+    def set_static_mesh(self, mesh):
+        self.static_mesh = mesh
+        return True
+
+    def set_material(self, element_index, material):
+        self._materials[element_index] = material
+
+    def set_relative_scale3d(self, scale):
+        self._properties['relative_scale3d'] = scale
+
+@recorded
+class InstancedStaticMeshComponent(StaticMeshComponent):
+    def __init__(self, name=''):
+        super().__init__(name)
+        self._transforms = []
+        self._custom_data = {}
+        self._num_custom_data = 0
+
+    def _instance_count(self):
+        return len(self._transforms)
+
+    def get_instance_count(self):
+        return len(self._transforms)
+
+    def add_instances(self, transforms, should_return_indices, world_space=False):
+        first = len(self._transforms)
+        self._transforms.extend(transforms)
+        return list(range(first, len(self._transforms))) if should_return_indices else []
+
+    def clear_instances(self):
+        self._transforms = []
+        self._custom_data = {}
+
+    def get_instance_transform(self, instance_index, world_space=False):
+        # Instances are always added in world space by the generators
+        if 0 <= instance_index < len(self._transforms):
+            return self._transforms[instance_index]
+        return None
+
+    def batch_update_instances_transforms(self, start_index, transforms, world_space=False,
+                                          mark_render_state_dirty=False, teleport=False):
+        self._transforms[start_index:start_index + len(transforms)] = transforms
+        return True
+
+    def set_num_custom_data_floats(self, count):
+        self._num_custom_data = count
+
+    def set_custom_data(self, instance_index, values, mark_render_state_dirty=False):
+        self._custom_data[instance_index] = values
+        return True
+
+    def get_editor_property(self, name):
+        # Custom data reads back flattened, num_custom_data floats per instance
+        if name == 'per_instance_sm_custom_data':
+            return [value for index in range(len(self._transforms))
+                    for value in (list(self._custom_data.get(index, [])) + [0.0] * self._num_custom_data)
+                    [:self._num_custom_data]]
+        return super().get_editor_property(name)
+
+class HierarchicalInstancedStaticMeshComponent(InstancedStaticMeshComponent):
+    pass
+
+class LightComponent(SceneComponent):
+    pass
+
+class DirectionalLightComponent(LightComponent):
+    pass
+
+class SkyLightComponent(SceneComponent):
+    pass
+
+class ExponentialHeightFogComponent(SceneComponent):
+    pass
+
+# --- Actors ------------------------------------------------------------------
+
+@recorded
+class Actor(Object):
+    # Components every spawned actor of the class starts with
+    DEFAULT_COMPONENTS = ()
+
+    def __init__(self, name=''):
+        super().__init__(name)
+        self._tags = []
+        self._label = name.rsplit('.', 1)[-1]
+        self._components = [component_class(f'{name}.{component_class.__name__}')
+                            for component_class in self.DEFAULT_COMPONENTS]
+        self.location = Vector()
+        self.rotation = Rotator()
+        self.scale = Vector(1, 1, 1)
+
+    @property
+    def tags(self):
+        start = time.perf_counter()
+        tags = self._tags
+        _record('Actor.tags', time.perf_counter() - start)
+        return tags
+
+    @tags.setter
+    def tags(self, tags):
+        start = time.perf_counter()
+        self._tags = list(tags)
+        _record('Actor.tags', time.perf_counter() - start)
+
+    def get_actor_label(self):
+        return self._label
+
+    def set_actor_label(self, label):
+        self._label = label
+
+    def set_actor_location(self, location, sweep=False, teleport=False):
+        self.location = location
+
+    def set_actor_rotation(self, rotation, teleport_physics=False):
+        self.rotation = rotation
+        return True
+
+    def set_actor_location_and_rotation(self, location, rotation, sweep=False, teleport=False):
+        self.location = location
+        self.rotation = rotation
+        return True
+
+    def get_actor_location(self):
+        return self.location
+
+    def get_actor_rotation(self):
+        return self.rotation
+
+    def set_actor_scale3d(self, scale):
+        self.scale = scale
+
+    def set_actor_hidden_in_game(self, hidden):
+        self._properties['hidden'] = hidden
+
+    def get_component_by_class(self, component_class):
+        for component in self._components:
+            if isinstance(component, component_class):
+                return component
+        return None
+
+    def get_components_by_class(self, component_class):
+        return [component for component in self._components if isinstance(component, component_class)]
+
+class StaticMeshActor(Actor):
+    DEFAULT_COMPONENTS = (StaticMeshComponent,)
+
+class DirectionalLight(Actor):
+    DEFAULT_COMPONENTS = (DirectionalLightComponent,)
+
+class SkyLight(Actor):
+    DEFAULT_COMPONENTS = (SkyLightComponent,)
+
+class SkyAtmosphere(Actor):
+    pass
+
+class ExponentialHeightFog(Actor):
+    DEFAULT_COMPONENTS = (ExponentialHeightFogComponent,)
+
+class PostProcessVolume(Actor):
+    pass
+
+class Landscape(Actor):
+    pass
+
+class NavMeshBoundsVolume(Actor):
+    pass
+
+class LevelStreamingVolume(Actor):
+    pass
+
+class PlayerStart(Actor):
+    pass
+
+class CameraActor(Actor):
+    pass
+
+# --- Subsystems --------------------------------------------------------------
+
+class Subsystem(Object):
+    pass
+
+@recorded
+class LevelEditorSubsystem(Subsystem):
+    def set_current_level_by_name(self, level_name):
+        _session['current_level'] = level_name
+        return True
+
+@recorded
+class SubobjectDataSubsystem(Subsystem):
+    def k2_gather_subobject_data_for_instance(self, actor):
+        return [SubobjectDataHandle(actor, None)]
+
+    def add_new_subobject(self, params):
+        actor = params.parent_handle.actor
+        component = params.new_class(f'{actor.get_path_name()}.{params.new_class.__name__}_{len(actor._components)}')
+        actor._components.append(component)
+        return SubobjectDataHandle(actor, component), Text('')
+
+class SubobjectDataHandle:
+    def __init__(self, actor, component):
+        self.actor = actor
+        self.component = component
+
+@recorded
+class AddNewSubobjectParams:
+    def __init__(self, parent_handle=None, new_class=None, blueprint_context=None):
+        self.parent_handle = parent_handle
+        self.new_class = new_class
+
+class SubobjectDataBlueprintFunctionLibrary:
+    @staticmethod
+    def get_data(handle):
+        return handle
+
+    @staticmethod
+    def get_object(data):
+        return data.component
+
+recorded(SubobjectDataBlueprintFunctionLibrary)
+
+_subsystems = {}
+
+@bridge('get_editor_subsystem')
+def get_editor_subsystem(subsystem_class):
+    return _subsystems.setdefault(subsystem_class, subsystem_class('/Script/' + subsystem_class.__name__))
+
+@bridge('get_engine_subsystem')
+def get_engine_subsystem(subsystem_class):
+    return _subsystems.setdefault(subsystem_class, subsystem_class('/Script/' + subsystem_class.__name__))
+
+@bridge('get_interpreter_executable_path')
+def get_interpreter_executable_path():
+    return sys.executable
+
+# Commandlets never tick, so callbacks are accepted and never run
+@bridge('register_slate_post_tick_callback')
+def register_slate_post_tick_callback(callback):
+    return object()
+
+@bridge('unregister_slate_post_tick_callback')
+def unregister_slate_post_tick_callback(handle):
+    pass
+
+# --- Libraries ---------------------------------------------------------------
+
+def _world(path):
+    """World of a map path, created empty the first time it is opened"""
+    worlds = _session['worlds']
+    if path not in worlds:
+        worlds[path] = World(path)
+    return worlds[path]
+
+class Paths:
+    @staticmethod
+    def project_content_dir():
+        return _paths['content']
+
+    @staticmethod
+    def project_saved_dir():
+        return _paths['saved']
+
+    @staticmethod
+    def project_dir():
+        return _paths['project']
+
+recorded(Paths)
+
+class EditorAssetLibrary:
+    @staticmethod
+    def does_asset_exist(asset_path):
+        return (asset_path in _session['assets'] or asset_path in ENGINE_MESHES
+                or asset_path.startswith(MATERIAL_DIR))
+
+    @staticmethod
+    def does_directory_exist(directory_path):
+        return directory_path.rstrip('/') in _session['directories']
+
+    @staticmethod
+    def make_directory(directory_path):
+        _session['directories'].add(directory_path.rstrip('/'))
+        return True
+
+    @staticmethod
+    def delete_directory(directory_path):
+        prefix = directory_path.rstrip('/')
+        _session['directories'].discard(prefix)
+        for asset_path in [path for path in _session['assets'] if path.startswith(prefix + '/')]:
+            del _session['assets'][asset_path]
+        return True
+
+    @staticmethod
+    def load_asset(asset_path):
+        asset = _session['assets'].get(asset_path)
+        if asset is None and asset_path in ENGINE_MESHES:
+            asset = StaticMesh(asset_path, ENGINE_MESHES[asset_path])
+        elif asset is None and asset_path.startswith(MATERIAL_DIR):
+            # Materials are built by materials_build.py, assume it already ran
+            asset = Material(asset_path)
+        return asset
+
+    @staticmethod
+    def save_asset(asset_path, only_if_is_dirty=True):
+        return True
+
+    @staticmethod
+    def save_directory(directory_path, only_if_is_dirty=True, recursive=True):
+        return True
+
+recorded(EditorAssetLibrary)
+
+class EditorLevelLibrary:
+    @staticmethod
+    def new_level(asset_path):
+        _session['assets'][asset_path] = World(asset_path)
+        _session['worlds'][asset_path] = World(asset_path)
+        _session['world'] = _session['worlds'][asset_path]
+        return True
+
+    @staticmethod
+    def load_level(asset_path):
+        _session['world'] = _world(asset_path)
+        return True
+
+    @staticmethod
+    def save_current_level():
+        return True
+
+    @staticmethod
+    def get_editor_world():
+        return _session['world']
+
+    @staticmethod
+    def get_all_level_actors():
+        return list(_session['world'].actors)
+
+    @staticmethod
+    def spawn_actor_from_class(actor_class, location, rotation=None):
+        world = _session['world']
+        _state['spawned'] += 1
+        actor = actor_class(f"{world.get_path_name()}:PersistentLevel.{actor_class.__name__}_{_state['spawned']}")
+        actor.location = location
+        actor.rotation = rotation or Rotator()
+        world.actors[actor] = None
+        return actor
+
+    @staticmethod
+    def destroy_actor(actor):
+        world = _session['world']
+        if actor not in world.actors:
+            return False
+        del world.actors[actor]
+        actor._valid = False
+        _state['destroyed'] += 1
+        return True
+
+    @staticmethod
+    def clear_actor_selection():
+        pass
+
+    @staticmethod
+    def merge_static_mesh_actors(actors, options):
+        """One actor holding a mesh with every source triangle, like the real merge"""
+        # The real call takes Array[StaticMeshActor] and rejects anything else
+        for actor in actors:
+            if not isinstance(actor, StaticMeshActor):
+                raise TypeError(f"merge_static_mesh_actors: {type(actor).__name__} is not a StaticMeshActor")
+        triangles = 0
+        for actor in actors:
+            for component in actor.get_components_by_class(StaticMeshComponent):
+                if component.static_mesh:
+                    copies = (component._instance_count() if isinstance(component, InstancedStaticMeshComponent)
+                              else 1)
+                    triangles += component.static_mesh._triangles * copies
+
+        mesh = StaticMesh(options.base_package_name, triangles)
+        _session['assets'][options.base_package_name] = mesh
+        if not options.spawn_merged_actor:
+            return None
+
+        proxy = EditorLevelLibrary.spawn_actor_from_class(StaticMeshActor, Vector(), Rotator())
+        proxy.set_actor_label(options.new_actor_label)
+        proxy.get_component_by_class(StaticMeshComponent).set_static_mesh(mesh)
+        return proxy
+
+recorded(EditorLevelLibrary)
+
+class EditorLevelUtils:
+    @staticmethod
+    def add_level_to_world(world, level_path, level_streaming_class):
+        # Like the editor, adding a level twice returns None
+        if level_path in world.streaming_levels:
+            return None
+        streaming_level = level_streaming_class(level_path)
+        world.streaming_levels[level_path] = streaming_level
+        return streaming_level
+
+    @staticmethod
+    def set_level_visibility(level, should_be_visible, force_layers_visible):
+        level.set_editor_property('visible', should_be_visible)
+
+recorded(EditorLevelUtils)
+
+class GameplayStatics:
+    @staticmethod
+    def get_streaming_level(world_context, package_name):
+        return world_context.streaming_levels.get(package_name)
+
+recorded(GameplayStatics)
+
+class SystemLibrary:
+    @staticmethod
+    def is_valid(obj):
+        return obj is not None and obj._valid
+
+recorded(SystemLibrary)
+
+class MeshMergingSettings:
+    def __init__(self):
+        self.merge_materials = False
+        self.generate_light_map_uv = True
+
+@recorded
+class MergeStaticMeshActorsOptions:
+    def __init__(self):
+        self.base_package_name = ''
+        self.new_actor_label = ''
+        self.destroy_source_actors = False
+        self.spawn_merged_actor = True
+        self.mesh_merging_settings = MeshMergingSettings()
+
+reset()
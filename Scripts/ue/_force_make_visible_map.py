@@ -1,4 +1,10 @@
 import unreal
+import os
+import sys
+
+# Make sibling helper modules importable when run via -ExecutePythonScript
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import asset_cache
 
 MAP_PATH = '/Game/Farm/Maps/DairyFarm_L1'
 
@@ -41,7 +47,7 @@ if fog:
 
 print("Adding floor...")
 # Floor using Engine basic cube
-cube = unreal.EditorAssetLibrary.load_asset('/Engine/BasicShapes/Cube')
+cube = asset_cache.load_asset('/Engine/BasicShapes/Cube')
 if cube:
     sma = unreal.EditorLevelLibrary.spawn_actor_from_class(
         unreal.StaticMeshActor,
@@ -0,0 +1,153 @@
+"""
+Actor Registry
+Process-wide index of level actors by tag and by class.
+The level is scanned once per editor world; actors spawned, retagged or
+destroyed through this module keep the index current without rescanning.
+"""
+import unreal
+import profiling
+
+# Module level state lives for the whole editor session
+_by_tag = {}
+_by_class = {}
+_tags_of = {}
+_state = {'world': None, 'scans': 0}
+
+def _world_name():
+    """Path of the current editor world, used to detect level switches"""
+    world = unreal.EditorLevelLibrary.get_editor_world()
+    return world.get_path_name() if world else None
+
+def _index(actor):
+    """Add one actor to the tag and class indexes"""
+    tags = [str(tag) for tag in actor.tags]
+    _by_class.setdefault(type(actor), {})[actor] = None
+    _tags_of[actor] = tags
+    for tag in tags:
+        _by_tag.setdefault(tag, {})[actor] = None
+
+def _unindex(actor):
+    """Remove one actor from the tag and class indexes"""
+    _by_class.get(type(actor), {}).pop(actor, None)
+    # Use the tags seen at index time, the actor may have been retagged since
+    for tag in _tags_of.pop(actor, ()):
+        _by_tag.get(tag, {}).pop(actor, None)
+
+def _alive(actors):
+    """Drop actors that were destroyed outside our scripts"""
+    return [actor for actor in actors if unreal.SystemLibrary.is_valid(actor)]
+
+def rebuild():
+    """Index every actor in the current level with one full scan"""
+    _by_tag.clear()
+    _by_class.clear()
+    _tags_of.clear()
+    for actor in unreal.EditorLevelLibrary.get_all_level_actors():
+        _index(actor)
+    _state['world'] = _world_name()
+    _state['scans'] += 1
+
+def ensure_built():
+    """Build the index on first use and after the editor world changed"""
+    if _state['world'] is None or _state['world'] != _world_name():
+        rebuild()
+
+def invalidate():
+    """Forget the index so the next query rescans the level"""
+    _by_tag.clear()
+    _by_class.clear()
+    _tags_of.clear()
+    _state['world'] = None
+
+def load_level(asset_path):
+    """Load a level and forget the index
+
+    Reloading the same level keeps its path but replaces every actor, so
+    the path check in ensure_built() cannot notice it.
+    """
+    result = unreal.EditorLevelLibrary.load_level(asset_path)
+    invalidate()
+    return result
+
+def new_level(asset_path):
+    """Create and open a new level and forget the index"""
+    result = unreal.EditorLevelLibrary.new_level(asset_path)
+    invalidate()
+    return result
+
+def register(actor):
+    """Add an actor spawned outside spawn_actor to the index"""
+    if actor and _state['world'] is not None:
+        _unindex(actor)
+        _index(actor)
+    return actor
+
+def spawn_actor(actor_class, location, rotation, tags=None):
+    """Spawn an actor, optionally tag it, and add it to the index"""
+    actor = unreal.EditorLevelLibrary.spawn_actor_from_class(actor_class, location, rotation)
+    if actor:
+        profiling.count_actors()
+        if tags is not None:
+            actor.tags = list(tags)
+    return register(actor)
+
+def set_tags(actor, tags):
+    """Replace an actor's tags and keep the tag index in step"""
+    actor.tags = list(tags)
+    return register(actor)
+
+def destroy_actor(actor):
+    """Destroy an actor and drop it from the index"""
+    _unindex(actor)
+    return unreal.EditorLevelLibrary.destroy_actor(actor)
+
+def destroy_actors(actors):
+    """Destroy several actors, returns how many were destroyed"""
+    actors = list(actors)
+    for actor in actors:
+        destroy_actor(actor)
+    return len(actors)
+
+def find_by_tag(tag):
+    """All live actors carrying a tag"""
+    ensure_built()
+    actors = _by_tag.get(tag, {})
+    alive = _alive(actors)
+    if len(alive) != len(actors):
+        _by_tag[tag] = dict.fromkeys(alive)
+    return alive
+
+def find_by_class(actor_class, tag=None):
+    """All live actors of a class (or subclass), optionally filtered by tag"""
+    ensure_built()
+    actors = []
+    for indexed_class, members in _by_class.items():
+        if issubclass(indexed_class, actor_class):
+            actors.extend(members)
+
+    if tag is not None:
+        tagged = _by_tag.get(tag, {})
+        actors = [actor for actor in actors if actor in tagged]
+
+    return _alive(actors)
+
+def find_first(actor_class=None, tag=None):
+    """First live actor matching a class and/or tag, or None"""
+    if actor_class is not None:
+        actors = find_by_class(actor_class, tag)
+    else:
+        actors = find_by_tag(tag)
+    return actors[0] if actors else None
+
+def get_stats():
+    """Return index sizes and how many full scans were made"""
+    return {
+        'actors': sum(len(members) for members in _by_class.values()),
+        'tags': len(_by_tag),
+        'scans': _state['scans']
+    }
+
+def print_stats():
+    """Print registry counters"""
+    stats = get_stats()
+    print(f"Actor registry: {stats['actors']} actors, {stats['tags']} tags, {stats['scans']} full scans")
@@ -3,108 +3,101 @@ Animals Regeneration Script
 Destroy and respawn cows based on new density or rotation
 """
 import unreal
-import json
-import random
 import math
-from datetime import datetime, timedelta
+import os
+import sys
+from datetime import datetime
+
+# Make sibling helper modules importable when run via -ExecutePythonScript
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import actor_registry
+import asset_cache
+import budget
+import farm_config
+import cow_herd
+import farm_plan
+import grazing_store
+import grazing_sim
+import pasture
+import profiling
 
 def load_config_v2():
-    """Load v2 farm configuration"""
-    config_path = unreal.Paths.project_content_dir() + 'Farm/Data/farm_config_v2.json'
-    with open(config_path, 'r') as f:
-        return json.load(f)
+    """Load v2 farm configuration, cached until the file changes"""
+    return farm_config.load(farm_config.L2_CONFIG)
 
 def load_grazing_state():
-    """Load grazing rotation state"""
-    state_path = unreal.Paths.project_content_dir() + 'Farm/Data/GrazingState.json'
-    try:
-        with open(state_path, 'r') as f:
-            return json.load(f)
-    except:
-        return {"active_paddock_index": 0, "last_rotated_iso": datetime.utcnow().isoformat() + "Z"}
-
-def save_grazing_state(state):
-    """Save grazing rotation state"""
-    state_path = unreal.Paths.project_content_dir() + 'Farm/Data/GrazingState.json'
-    with open(state_path, 'w') as f:
-        json.dump(state, f, indent=2)
-
-def calculate_cow_count(config):
-    """Calculate cow count based on paddock area and stocking density"""
-    paddock_size = config.get('paddock_size_m', [120, 80])
-    num_paddocks = config.get('paddocks', 6)
-    stocking_density = config.get('stocking_density_cows_per_ha', 2.0)
-    min_cows = config.get('min_cows', 30)
-    max_cows = config.get('max_cows', 150)
-
-    # Calculate total area in hectares
-    area_per_paddock_m2 = paddock_size[0] * paddock_size[1]
-    total_area_m2 = area_per_paddock_m2 * num_paddocks
-    total_area_ha = total_area_m2 / 10000
-
-    # Calculate cow count
-    cow_count = int(total_area_ha * stocking_density)
-    cow_count = max(min_cows, min(cow_count, max_cows))
-
-    return cow_count
+    """Current grazing rotation state from the crash-safe grazing store"""
+    return grazing_store.open_store(farm_config.data_dir()).current()
+
+def choose_next_paddock(config, current_paddock, now):
+    """Next paddock by the config's rotation_policy, plus the pasture it was judged on (or None)"""
+    sim = grazing_sim.from_store(grazing_store.open_store(farm_config.data_dir()), config)
+    if sim.pasture is not None:
+        # The herd has grazed the current paddock since the last rotation
+        sim.pasture.advance_to(now, {current_paddock: config.cow_count})
+    return sim.policy(sim), sim.pasture
+
+def save_rotation(next_paddock):
+    """Log a rotation, then compact so GrazingState.json (read by Update-Animals.ps1) is current"""
+    store = grazing_store.open_store(farm_config.data_dir())
+    store.rotate(next_paddock)
+    store.compact()
 
 def destroy_all_cows():
     """Remove all existing cow actors"""
     print("Removing existing cows...")
 
-    all_actors = unreal.EditorLevelLibrary.get_all_level_actors()
-    cow_actors = [actor for actor in all_actors if 'Cow' in actor.tags]
+    removed = actor_registry.destroy_actors(actor_registry.find_by_tag('Cow'))
 
-    for cow in cow_actors:
-        unreal.EditorLevelLibrary.destroy_actor(cow)
-
-    print(f"Removed {len(cow_actors)} cows")
+    print(f"Removed {removed} cows")
 
 def get_paddock_bounds(paddock_index, config):
-    """Calculate paddock bounds for given index"""
-    paddock_size = config.get('paddock_size_m', [120, 80])
+    """Paddock bounds for given index, memoized on the config"""
+    return config.paddock(paddock_index)
+
+def layout_cows_in_paddock(paddock_index, cow_count, config, active_paddock=None):
+    """Generate cow records (position, rotation, coat, lying) for a paddock"""
+    bounds = get_paddock_bounds(paddock_index, config)
 
-    row = paddock_index // 3
-    col = paddock_index % 3
+    # Same per-paddock stream as the L2 planner, so layouts match the generator
+    rng = farm_plan.cow_stream(config.get('seed', 42), paddock_index, active_paddock)
 
-    center_x = 500 * 100 + col * (paddock_size[0] + 20) * 100
-    center_y = row * (paddock_size[1] + 20) * 100
+    rows, coats, lying = farm_plan.layout_cows(bounds, cow_count, rng,
+                                               min_spacing=farm_plan.cow_spacing(config))
+    rows = rows.tolist()
 
-    return {
-        'center': (center_x, center_y),
-        'size': (paddock_size[0] * 100, paddock_size[1] * 100)
-    }
+    return [{
+        'x': row[0],
+        'y': row[1],
+        'rotation': tuple(row[3:6]),
+        'coat': coats[i],
+        'lying': lying[i]
+    } for i, row in enumerate(rows)]
 
-def spawn_cows_in_paddock(paddock_index, cow_count, config):
+def spawn_cows_in_paddock(paddock_index, cow_count, config, active_paddock=None):
     """Spawn cows in specific paddock"""
     print(f"Spawning {cow_count} cows in paddock {paddock_index}")
 
-    bounds = get_paddock_bounds(paddock_index, config)
-    center_x, center_y = bounds['center']
-    width, height = bounds['size']
-
-    cylinder_mesh = unreal.EditorAssetLibrary.load_asset('/Engine/BasicShapes/Cylinder')
-
-    cow_materials = [
-        '/Game/Farm/Materials/M_CowBlack',
-        '/Game/Farm/Materials/M_CowWhite',
-        '/Game/Farm/Materials/M_CowBrown'
-    ]
+    cylinder_mesh = asset_cache.load_asset('/Engine/BasicShapes/Cylinder')
 
-    random.seed(config.get('seed', 42) + paddock_index)
-
-    for i in range(cow_count):
-        # Random position within paddock
-        margin = 500  # 5m margin
-        x = center_x + random.uniform(-width/2 + margin, width/2 - margin)
-        y = center_y + random.uniform(-height/2 + margin, height/2 - margin)
-        rotation = random.uniform(0, 360)
+    for cow_record in layout_cows_in_paddock(paddock_index, cow_count, config, active_paddock):
+        # Add tags
+        tags = [
+            'Cow',
+            f'Paddock_{paddock_index}',
+            'WanderRadius:2000',
+            'StepSeconds:2.0',
+            'MoveSpeed:100'
+        ]
+        if cow_record['lying']:
+            tags.append('State:Lying')
 
         # Spawn cow
-        cow = unreal.EditorLevelLibrary.spawn_actor_from_class(
+        cow = actor_registry.spawn_actor(
             unreal.StaticMeshActor,
-            unreal.Vector(x, y, 75),
-            unreal.Rotator(0, rotation, 0)
+            unreal.Vector(cow_record['x'], cow_record['y'], 75),
+            unreal.Rotator(*cow_record['rotation']),
+            tags=tags
         )
 
         if cow:
@@ -114,24 +107,41 @@ def spawn_cows_in_paddock(paddock_index, cow_count, config):
                 mesh_component.set_relative_scale3d(unreal.Vector(0.8, 0.8, 1.5))
 
                 # Apply material
-                material = unreal.EditorAssetLibrary.load_asset(random.choice(cow_materials))
+                material = asset_cache.load_asset(farm_plan.COW_MATERIALS[cow_record['coat']])
                 if material:
                     mesh_component.set_material(0, material)
 
-            # Add tags
-            cow.tags = [
-                'Cow',
-                f'Paddock_{paddock_index}',
-                'WanderRadius:2000',
-                'StepSeconds:2.0',
-                'MoveSpeed:100'
-            ]
-
-            # 10% lying down
-            if random.random() < 0.1:
+            if cow_record['lying']:
                 cow.set_actor_scale3d(unreal.Vector(0.8, 0.8, 0.95))
-                cow.tags.append('State:Lying')
 
+def place_herd(paddock_counts, config, active_paddock=None):
+    """Place the herd given a {paddock_index: cow_count} distribution"""
+    # Actor cows are always removed so switching herd_mode leaves no leftovers
+    with profiling.scope('clear_cows'):
+        destroy_all_cows()
+
+    # herd_mode, unless the herd is over its actor budget
+    if budget.resolve_modes(config)[0]['cows'] == 'instanced':
+        # Rewrite instance transforms in bulk instead of respawning actors
+        cows_by_paddock = {}
+        centers = {}
+        with profiling.scope('layout'):
+            for paddock_index, cow_count in paddock_counts.items():
+                print(f"Placing {cow_count} instanced cows in paddock {paddock_index}")
+                cows_by_paddock[paddock_index] = layout_cows_in_paddock(
+                    paddock_index, cow_count, config, active_paddock)
+                centers[paddock_index] = get_paddock_bounds(paddock_index, config)['center']
+        with profiling.scope('apply_herd', mode='instanced'):
+            cow_herd.apply_herd(cows_by_paddock, centers)
+        return
+
+    with profiling.scope('clear_herds'):
+        cow_herd.clear_herds()
+    for paddock_index, cow_count in paddock_counts.items():
+        with profiling.scope(f'Paddock_{paddock_index}', mode='actors', cows=cow_count):
+            spawn_cows_in_paddock(paddock_index, cow_count, config, active_paddock)
+
+@profiling.profiled('rotate_herd')
 def rotate_herd(config):
     """Rotate herd to next paddock"""
     print("Rotating herd to next paddock...")
@@ -139,93 +149,92 @@ def rotate_herd(config):
     # Load current state
     state = load_grazing_state()
     current_paddock = state.get('active_paddock_index', 0)
-    last_rotated = datetime.fromisoformat(state['last_rotated_iso'].replace('Z', '+00:00'))
+    last_rotated = grazing_store.parse_time(state['last_rotated_iso'])
 
     # Check if rotation is due
     rotation_days = config.get('rotation_days', 2)
-    days_since_rotation = (datetime.utcnow() - last_rotated.replace(tzinfo=None)).days
+    days_since_rotation = (datetime.utcnow() - last_rotated).days
 
     if days_since_rotation < rotation_days:
         print(f"Rotation not due yet ({days_since_rotation}/{rotation_days} days)")
         return current_paddock
 
-    # Calculate next paddock
-    num_paddocks = config.get('paddocks', 6)
-    next_paddock = (current_paddock + 1) % num_paddocks
-
-    # Destroy existing cows
-    destroy_all_cows()
+    # Next paddock by index order, rest or grass cover
+    with profiling.scope('choose_paddock', policy=config.get('rotation_policy', 'sequential')):
+        next_paddock, grass = choose_next_paddock(config, current_paddock, datetime.utcnow())
 
     # Calculate cow distribution
-    total_cows = calculate_cow_count(config)
+    total_cows = config.cow_count
     active_cows = int(total_cows * 0.95)  # 95% in active paddock
     straggler_cows = total_cows - active_cows  # 5% stragglers
 
-    # Spawn cows in new paddock
-    spawn_cows_in_paddock(next_paddock, active_cows, config)
-
-    # Add stragglers in previous paddock
+    # Cows in new paddock, stragglers in previous paddock
+    paddock_counts = {next_paddock: active_cows}
     if straggler_cows > 0:
-        spawn_cows_in_paddock(current_paddock, straggler_cows, config)
+        paddock_counts[current_paddock] = straggler_cows
 
-    # Update state
-    new_state = {
-        'active_paddock_index': next_paddock,
-        'last_rotated_iso': datetime.utcnow().isoformat() + 'Z'
-    }
-    save_grazing_state(new_state)
+    with profiling.scope('place_herd'):
+        place_herd(paddock_counts, config, next_paddock)
+
+    # Append to the rotation log
+    with profiling.scope('save_state'):
+        save_rotation(next_paddock)
+        if grass is not None:
+            pasture.save(grass, farm_config.data_dir())
 
     print(f"Herd rotated from paddock {current_paddock} to {next_paddock}")
     return next_paddock
 
+@profiling.profiled('fast_forward')
+def fast_forward(days, policy=None):
+    """Simulate days of rotations headlessly, then place the herd once for the final state"""
+    print(f"Fast-forwarding grazing by {days:g} days...")
+
+    with profiling.scope('simulate'):
+        config = load_config_v2()
+        store = grazing_store.open_store(farm_config.data_dir())
+        sim = grazing_sim.from_store(store, config, policy).run(days)
+        grazing_sim.print_report(sim, config.cow_count)
+        grazing_sim.save(sim, store)
+
+    # Only the final state reaches the level
+    regenerate_animals()
+    return sim
+
 def update_density(new_density):
     """Update stocking density and regenerate animals"""
     print(f"Updating stocking density to {new_density} cows/ha")
 
-    # Load config
-    config = load_config_v2()
-
-    # Update density
-    config['stocking_density_cows_per_ha'] = new_density
-
-    # Save config
-    config_path = unreal.Paths.project_content_dir() + 'Farm/Data/farm_config_v2.json'
-    with open(config_path, 'w') as f:
-        json.dump(config, f, indent=2)
+    # Save config, the next load sees the new file
+    farm_config.save(farm_config.L2_CONFIG, {'stocking_density_cows_per_ha': new_density})
 
     # Regenerate animals
     regenerate_animals()
 
+@profiling.profiled('regenerate_animals')
 def regenerate_animals():
     """Regenerate all animals based on current config"""
     print("Regenerating animals...")
 
     # Load config and state
-    config = load_config_v2()
-    state = load_grazing_state()
-
-    # Destroy existing
-    destroy_all_cows()
+    with profiling.scope('config'):
+        config = load_config_v2()
+        state = load_grazing_state()
 
-    # Calculate cow count
-    total_cows = calculate_cow_count(config)
+    # Cow count and distribution are memoized on the config, as the generator plans them
+    total_cows = config.cow_count
     active_paddock = state.get('active_paddock_index', 0)
+    paddock_counts = config.herd_distribution(active_paddock)
 
-    # Distribute cows
-    active_cows = int(total_cows * 0.95)
-    straggler_cows = total_cows - active_cows
-
-    # Spawn in active paddock
-    spawn_cows_in_paddock(active_paddock, active_cows, config)
-
-    # Add stragglers
-    if active_paddock > 0 and straggler_cows > 0:
-        spawn_cows_in_paddock(active_paddock - 1, straggler_cows, config)
+    with profiling.scope('place_herd'):
+        place_herd(paddock_counts, config, active_paddock)
 
     # Save level
-    unreal.EditorLevelLibrary.save_current_level()
+    with profiling.scope('save'):
+        unreal.EditorLevelLibrary.save_current_level()
 
     print(f"Regenerated {total_cows} cows")
+    asset_cache.print_stats()
 
 def main():
     """Main entry point for animal regeneration"""
@@ -240,10 +249,10 @@ def main():
     # Regenerate based on current config
     regenerate_animals()
 
+    # Same cached config object as regenerate_animals() used
     config = load_config_v2()
-    total_cows = calculate_cow_count(config)
 
-    print(f"\nTotal cows: {total_cows}")
+    print(f"\nTotal cows: {config.cow_count}")
     print(f"Density: {config.get('stocking_density_cows_per_ha', 2.0)} cows/ha")
 
 if __name__ == '__main__':
@@ -0,0 +1,71 @@
+"""
+Asset Cache
+Process-wide cache of loaded asset handles shared by all farm generators
+"""
+import unreal
+
+# Basic shape meshes used as placeholders throughout the farm
+MESH_PATHS = {
+    'cube': '/Engine/BasicShapes/Cube',
+    'cylinder': '/Engine/BasicShapes/Cylinder',
+    'sphere': '/Engine/BasicShapes/Sphere',
+    'cone': '/Engine/BasicShapes/Cone',
+    'plane': '/Engine/BasicShapes/Plane'
+}
+
+# Module level state lives for the whole editor session
+_assets = {}
+_stats = {'hits': 0, 'misses': 0}
+
+def load_asset(asset_path):
+    """Load an asset once per editor session and return the cached handle"""
+    asset = _assets.get(asset_path)
+    if asset is not None:
+        _stats['hits'] += 1
+        return asset
+
+    _stats['misses'] += 1
+    asset = unreal.EditorAssetLibrary.load_asset(asset_path)
+
+    # Failed loads are not cached so a later build step can create the asset
+    if asset:
+        _assets[asset_path] = asset
+
+    return asset
+
+def load_mesh(mesh_type):
+    """Load a basic shape mesh by type name, falling back to cube"""
+    mesh = load_asset(MESH_PATHS.get(mesh_type, MESH_PATHS['cube']))
+    if not mesh:
+        mesh = load_asset(MESH_PATHS['cube'])
+    return mesh
+
+def invalidate(asset_path=None):
+    """Drop one cached asset, or the whole cache when no path is given"""
+    if asset_path is None:
+        _assets.clear()
+    else:
+        _assets.pop(asset_path, None)
+
+def invalidate_prefix(path_prefix):
+    """Drop every cached asset under a content directory"""
+    for asset_path in [path for path in _assets if path.startswith(path_prefix)]:
+        del _assets[asset_path]
+
+def get_stats():
+    """Return cache hit/miss counters and current size"""
+    return {
+        'hits': _stats['hits'],
+        'misses': _stats['misses'],
+        'cached': len(_assets)
+    }
+
+def reset_stats():
+    """Reset hit/miss counters without dropping cached handles"""
+    _stats['hits'] = 0
+    _stats['misses'] = 0
+
+def print_stats():
+    """Print cache counters"""
+    stats = get_stats()
+    print(f"Asset cache: {stats['hits']} hits, {stats['misses']} misses, {stats['cached']} cached")
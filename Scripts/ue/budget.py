@@ -0,0 +1,183 @@
+"""
+Scene Budget Estimator
+Predicts actors, components, draw calls and editor time per plan category
+from the farm config alone, before anything is planned or spawned, and
+switches categories that exceed their actor budget to instanced meshes.
+Does not import unreal.
+"""
+import farm_config
+import farm_plan
+
+# Categories whose representation can be switched from the config
+MODE_KEYS = {
+    'posts': 'fence_mode',
+    'rails': 'fence_mode',
+    'cows': 'herd_mode'
+}
+
+# Mode used when a key is missing: the cow wander script animates actor cows
+MODE_DEFAULTS = {
+    'fence_mode': 'instanced',
+    'herd_mode': 'actors'
+}
+
+# Tag and label prefix of the host actor holding a category's instances;
+# categories sharing a host (posts and rails) are spawned together
+INSTANCE_HOSTS = {
+    'ground': ('Ground', 'Ground_Paddock'),
+    'posts': ('Fence', 'Fence_Paddock'),
+    'rails': ('Fence', 'Fence_Paddock'),
+    'hedges': ('Hedge', 'Hedge_Paddock'),
+    'lane': ('Lane', 'Lane'),
+    'buildings': ('Building', 'Yard_Buildings')
+}
+
+# Rough editor-side costs in seconds; bench_generate.py --latency-us shows
+# how much of a build is spent crossing into the editor
+SPAWN_SECONDS = 0.0015
+COMPONENT_SECONDS = 0.004
+INSTANCE_SECONDS = 0.00002
+
+def level_of(plan_level):
+    """'L1' or 'L2' for a FarmPlan level path"""
+    return 'L1' if plan_level.endswith('_L1') else 'L2'
+
+def paddocks_of(config, level):
+    """Number of paddocks a level's layout produces"""
+    return config.get('paddocks', 4 if level == 'L1' else 6)
+
+def posts_per_paddock(config, level):
+    """Fence posts around one paddock"""
+    width, height = config.get('paddock_size_m', [120, 80])
+    spacing = config.get('fence_post_spacing_m', 4.0) * 100
+    offsets = farm_plan.fence_post_offsets_l1 if level == 'L1' else farm_plan.fence_post_offsets_l2
+    return len(offsets(width * 100, height * 100, spacing))
+
+def instance_counts(config, level='L2'):
+    """Planned instances and mesh batches per category, from the config only
+
+    Matches what farm_plan.plan_farm_l1/l2 produce without running the
+    cow and hedge placement; L2 cows include the stragglers.
+    """
+    paddocks = paddocks_of(config, level)
+    posts = posts_per_paddock(config, level)
+    hedge_density = config.get('hedge_density_per_100m', 6)
+    lane_points = config.get('lane_points', [])
+
+    if level == 'L1':
+        buildings = farm_plan.plan_buildings_l1(config.get('yard_buildings', {}), config.get('yard_origin', [0, 0, 0]))
+        rails = 2 * max(posts - 1, 0) * paddocks
+        hedges = (4 + 2 * int(hedge_density)) * paddocks
+        cows = (config.get('cow_count', 60) // paddocks) * paddocks if paddocks else 0
+        herd_paddocks = paddocks
+    else:
+        buildings = farm_plan.plan_buildings_l2(config.get('yard_buildings', {}))
+        rails = 0
+        hedges = int(hedge_density * 2) * paddocks
+        # Upper bound: after a rotation stragglers stay in the previous paddock
+        cows = farm_config.as_config(config, level).cow_count
+        herd_paddocks = min(paddocks, 2)
+
+    return {
+        'ground': {'instances': paddocks, 'batches': 1, 'hosts': paddocks},
+        'posts': {'instances': posts * paddocks, 'batches': 1, 'hosts': paddocks},
+        'rails': {'instances': rails, 'batches': 1, 'hosts': paddocks},
+        'hedges': {'instances': hedges, 'batches': 1, 'hosts': paddocks},
+        'lane': {'instances': max(len(lane_points) - 1, 0), 'batches': 1, 'hosts': 1},
+        'buildings': {'instances': sum(len(batch) for batch in buildings), 'batches': len(buildings), 'hosts': 1},
+        'cows': {'instances': cows, 'batches': 1, 'hosts': herd_paddocks}
+    }
+
+def configured_modes(config):
+    """'actors' or 'instanced' per category as set in the config"""
+    modes = {category: 'actors' for category in farm_plan.CATEGORIES}
+    modes.update({category: config.get(key, MODE_DEFAULTS[key]) for category, key in MODE_KEYS.items()})
+    return modes
+
+def category_cost(counts, mode, shares_host=False):
+    """Actors, components, draw calls and seconds of one category in one mode"""
+    instances = counts['instances']
+    if not instances:
+        return {'actors': 0, 'components': 0, 'draw_calls': 0, 'seconds': 0.0}
+
+    if mode == 'instanced':
+        # One host per paddock (or one for the yard), one component per mesh batch
+        actors = 0 if shares_host else counts['hosts']
+        components = counts['hosts'] * counts['batches']
+        draw_calls = components
+    else:
+        # A StaticMeshActor per row, each its own draw call
+        actors = instances
+        components = instances
+        draw_calls = instances
+
+    seconds = actors * SPAWN_SECONDS + instances * INSTANCE_SECONDS
+    if mode == 'instanced':
+        seconds += components * COMPONENT_SECONDS
+    return {'actors': actors, 'components': components, 'draw_calls': draw_calls, 'seconds': seconds}
+
+def estimate(config, level='L2', modes=None):
+    """Per-category cost estimate plus totals for the given (or configured) modes"""
+    modes = modes or configured_modes(config)
+    budgets = config.get('actor_budgets', {})
+    counts = instance_counts(config, level)
+
+    categories = {}
+    hosts_seen = set()
+    for category in farm_plan.CATEGORIES:
+        mode = modes[category]
+        host = INSTANCE_HOSTS.get(category)
+        shares_host = mode == 'instanced' and host in hosts_seen
+        if mode == 'instanced' and host:
+            hosts_seen.add(host)
+
+        cost = category_cost(counts[category], mode, shares_host)
+        cost.update(instances=counts[category]['instances'], mode=mode, budget=budgets.get(category))
+        cost['over_budget'] = cost['budget'] is not None and cost['actors'] > cost['budget']
+        categories[category] = cost
+
+    totals = {key: sum(cost[key] for cost in categories.values())
+              for key in ('instances', 'actors', 'components', 'draw_calls', 'seconds')}
+    return {'level': level, 'categories': categories, 'totals': totals}
+
+def resolve_modes(config, level='L2'):
+    """Configured modes with over-budget categories switched to instanced
+
+    Returns (modes, switched categories). Categories without an entry in
+    the config's actor_budgets are never switched.
+    """
+    modes = configured_modes(config)
+    switched = []
+    for category, cost in estimate(config, level, modes)['categories'].items():
+        if cost['over_budget'] and modes[category] == 'actors':
+            modes[category] = 'instanced'
+            switched.append(category)
+    return modes, switched
+
+def print_estimate(report, switched=()):
+    """Print the estimate table, marking categories moved to instancing"""
+    print(f"Budget estimate for {report['level']}:")
+    print(f"  {'category':<10} {'mode':<10} {'instances':>9} {'actors':>7} {'budget':>7} "
+          f"{'components':>10} {'draws':>6} {'seconds':>8}")
+    for category, cost in report['categories'].items():
+        budget = '-' if cost['budget'] is None else cost['budget']
+        note = '  (over budget, instanced)' if category in switched else ''
+        print(f"  {category:<10} {cost['mode']:<10} {cost['instances']:>9} {cost['actors']:>7} {budget:>7} "
+              f"{cost['components']:>10} {cost['draw_calls']:>6} {cost['seconds']:>8.2f}{note}")
+    totals = report['totals']
+    print(f"  {'total':<10} {'':<10} {totals['instances']:>9} {totals['actors']:>7} {'':>7} "
+          f"{totals['components']:>10} {totals['draw_calls']:>6} {totals['seconds']:>8.2f}")
+
+def report(config, level='L2'):
+    """Resolve modes against the budgets and print the resulting estimate"""
+    modes, switched = resolve_modes(config, level)
+    result = estimate(config, level, modes)
+    print_estimate(result, switched)
+    return result
+
+def main():
+    """Estimate the on-disk L2 config"""
+    return report(farm_config.load(farm_config.L2_CONFIG), 'L2')
+
+if __name__ == '__main__':
+    main()
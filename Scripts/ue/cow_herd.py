@@ -0,0 +1,155 @@
+"""
+Instanced Herd
+One instanced mesh component per paddock holding every cow, with coat
+color, lying state and paddock id stored as per-instance custom data
+"""
+import actor_registry
+import asset_cache
+import farm_plan
+import instancing
+
+COW_MESH_PATH = '/Engine/BasicShapes/Cylinder'
+HERD_MATERIAL_PATH = '/Game/Farm/Materials/M_CowInstanced'
+
+# Coat colors for instanced cows, in the order of farm_plan.COW_MATERIALS
+COAT_COLORS = [
+    (0.1, 0.1, 0.1),
+    (0.9, 0.9, 0.85),
+    (0.4, 0.25, 0.15)
+]
+
+# Custom data layout: R, G, B, lying (0/1), paddock index
+NUM_CUSTOM_DATA = 5
+
+STANDING_SCALE = (0.8, 0.8, 1.5)
+LYING_SCALE = (0.8, 0.8, 0.95)
+
+def coat_index(material_path):
+    """Map a per-actor cow material to its coat color index"""
+    materials = farm_plan.COW_MATERIALS
+    return materials.index(material_path) if material_path in materials else 0
+
+def make_cow(x, y, rotation, material_path, lying=False):
+    """Build a cow record as used by the instanced herd"""
+    return {
+        'x': x,
+        'y': y,
+        'rotation': tuple(rotation),
+        'coat': coat_index(material_path),
+        'lying': lying
+    }
+
+def cow_transform(cow):
+    """Build the instance transform for a cow record"""
+    scale = LYING_SCALE if cow['lying'] else STANDING_SCALE
+    return instancing.make_transform((cow['x'], cow['y'], 75), cow['rotation'], scale)
+
+def cow_custom_data(cow, paddock_index):
+    """Build the custom data floats for a cow record"""
+    r, g, b = COAT_COLORS[cow['coat']]
+    return [r, g, b, 1.0 if cow['lying'] else 0.0, float(paddock_index)]
+
+def coat_of(custom_data):
+    """Coat color index nearest to the R, G, B of an instance's custom data"""
+    if len(custom_data) < 3:
+        return 0
+    return min(range(len(COAT_COLORS)),
+               key=lambda coat: sum((a - b) ** 2 for a, b in zip(COAT_COLORS[coat], custom_data[:3])))
+
+def read_herd(component):
+    """Cow records (x, y, z, rotation, coat, lying) of a herd component, in instance order"""
+    custom_data = list(component.get_editor_property('per_instance_sm_custom_data') or [])
+    cows = []
+    for index in range(component.get_instance_count()):
+        transform = component.get_instance_transform(index, True)
+        location = transform.translation
+        rotation = transform.rotation.rotator()
+        cows.append({
+            'x': location.x,
+            'y': location.y,
+            'z': location.z,
+            'rotation': (rotation.roll, rotation.pitch, rotation.yaw),
+            'coat': coat_of(custom_data[index * NUM_CUSTOM_DATA:(index + 1) * NUM_CUSTOM_DATA]),
+            'lying': transform.scale3d.z < STANDING_SCALE[2]
+        })
+    return cows
+
+def find_herd_actors():
+    """Return herd host actors keyed by paddock index"""
+    herds = {}
+    for actor in actor_registry.find_by_tag('Herd'):
+        for tag in actor.tags:
+            tag = str(tag)
+            if tag.startswith('Paddock_'):
+                herds[int(tag.split('_')[1])] = actor
+                break
+    return herds
+
+def get_herd_component(actor):
+    """Return the instanced mesh component of a herd actor"""
+    components = instancing.get_instanced_components(actor)
+    return components[0] if components else None
+
+def update_paddock_herd(paddock_index, center, cows, herd_actor=None):
+    """Write all cows of one paddock into its instanced herd component"""
+    transforms = [cow_transform(cow) for cow in cows]
+
+    if herd_actor is None:
+        herd_actor = instancing.spawn_instance_host(
+            f"Herd_Paddock_{paddock_index}",
+            (center[0], center[1], 0),
+            tags=['Herd', f'Paddock_{paddock_index}']
+        )
+        if not herd_actor:
+            return None
+        component = instancing.add_instanced_component(
+            herd_actor,
+            asset_cache.load_asset(COW_MESH_PATH),
+            HERD_MATERIAL_PATH,
+            transforms,
+            hierarchical=False,
+            num_custom_data=NUM_CUSTOM_DATA
+        )
+    else:
+        component = get_herd_component(herd_actor)
+        if component:
+            instancing.replace_instances(component, transforms)
+
+    if component and cows:
+        instancing.set_instance_custom_data(
+            component,
+            [cow_custom_data(cow, paddock_index) for cow in cows]
+        )
+
+    return herd_actor
+
+def move_herd(component, cows):
+    """Rewrite a herd's instance transforms with one batch call, custom data untouched"""
+    instancing.replace_instances(component, [cow_transform(cow) for cow in cows])
+
+def apply_herd(cows_by_paddock, paddock_centers):
+    """Rewrite every paddock herd in bulk, emptying herds no longer used"""
+    herds = find_herd_actors()
+
+    for paddock_index, cows in cows_by_paddock.items():
+        update_paddock_herd(
+            paddock_index,
+            paddock_centers[paddock_index],
+            cows,
+            herds.get(paddock_index)
+        )
+
+    # Paddocks the herd left keep their actor but lose their instances
+    for paddock_index, actor in herds.items():
+        if paddock_index not in cows_by_paddock:
+            component = get_herd_component(actor)
+            if component:
+                component.clear_instances()
+
+    total = sum(len(cows) for cows in cows_by_paddock.values())
+    print(f"Instanced herd updated: {total} cows in {len(cows_by_paddock)} paddocks")
+    return total
+
+def clear_herds():
+    """Remove all instances from every herd actor"""
+    apply_herd({}, {})
@@ -0,0 +1,310 @@
+"""
+Farm Config
+Parses, validates and caches farm_config.json and farm_config_v2.json for
+every generator and the regen scripts. A file is re-read only when its
+mtime or size changed and re-parsed only when its content hash changed;
+derived values (cow count, area, paddock bounds) are computed once per
+parsed config. Imports unreal only to locate the project's Content folder.
+"""
+import collections.abc
+import functools
+import hashlib
+import json
+import os
+
+import farm_plan
+import solar
+
+# Content/Farm/Data of this checkout, for running outside the editor
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Content', 'Farm', 'Data'))
+
+L1_CONFIG = 'farm_config.json'
+L2_CONFIG = 'farm_config_v2.json'
+
+MODES = ('instanced', 'actors')
+
+# How rotate_herd and grazing_sim.py pick the next paddock
+ROTATION_POLICIES = ('sequential', 'most_rested', 'cover')
+
+class ConfigError(ValueError):
+    """A config file holds values of the wrong type or out of range"""
+
+def _number(minimum=None, maximum=None, integer=False):
+    """Check for an int/float (int only if integer) within [minimum, maximum]"""
+    def check(value):
+        types = (int,) if integer else (int, float)
+        if isinstance(value, bool) or not isinstance(value, types):
+            return 'an integer' if integer else 'a number'
+        if minimum is not None and value < minimum:
+            return f'>= {minimum}'
+        if maximum is not None and value > maximum:
+            return f'<= {maximum}'
+        return None
+    return check
+
+def _choice(*choices):
+    def check(value):
+        return None if value in choices else f"one of {', '.join(choices)}"
+    return check
+
+def _pair(value):
+    ok = (isinstance(value, list) and len(value) == 2
+          and all(not _number(minimum=1)(v) for v in value))
+    return None if ok else 'a [width, height] pair of positive numbers'
+
+def _point(value):
+    ok = isinstance(value, list) and len(value) == 3 and all(not _number()(v) for v in value)
+    return None if ok else 'an [x, y, z] point'
+
+def _points(value):
+    ok = isinstance(value, list) and not any(_point(p) for p in value)
+    return None if ok else 'a list of [x, y, z] points'
+
+def _date(value):
+    try:
+        solar.parse_date(value)
+    except (TypeError, ValueError):
+        return 'a YYYY-MM-DD date'
+    return None
+
+def _budgets(value):
+    ok = isinstance(value, dict) and all(
+        key in farm_plan.CATEGORIES and not _number(minimum=0, integer=True)(v) for key, v in value.items())
+    return None if ok else f"a mapping of {', '.join(farm_plan.CATEGORIES)} to actor counts"
+
+def _mapping(value):
+    return None if isinstance(value, dict) else 'an object'
+
+# Expected form of every known key; unknown keys are passed through
+SCHEMA = {
+    'seed': _number(integer=True),
+    'paddocks': _number(minimum=1, integer=True),
+    'paddock_size_m': _pair,
+    'yard_origin': _point,
+    'cow_count': _number(minimum=0, integer=True),
+    'lane_points': _points,
+    'fence_post_spacing_m': _number(minimum=0.01),
+    'fence_mode': _choice(*MODES),
+    'herd_mode': _choice(*MODES),
+    'cow_min_spacing_m': _number(minimum=0),
+    'hedge_density_per_100m': _number(minimum=0),
+    'time_of_day_hours': _number(minimum=0, maximum=24),
+    'latitude': _number(minimum=-90, maximum=90),
+    'longitude': _number(minimum=-180, maximum=180),
+    'date': _date,
+    'utc_offset_hours': _number(minimum=-14, maximum=14),
+    'planner_workers': _number(minimum=0, integer=True),
+    'stream_cell_size_m': _number(minimum=0),
+    'stream_distance_m': _number(minimum=0),
+    'hlod_transition_distance_m': _number(minimum=0),
+    'actor_budgets': _budgets,
+    'stocking_density_cows_per_ha': _number(minimum=0),
+    'min_cows': _number(minimum=0, integer=True),
+    'max_cows': _number(minimum=0, integer=True),
+    'rotation_days': _number(minimum=0),
+    'rotation_policy': _choice(*ROTATION_POLICIES),
+    'pasture_cell_m': _number(minimum=0.1),
+    'start_paddock_index': _number(minimum=0, integer=True),
+    'show_navmesh': lambda value: None if isinstance(value, bool) else 'true or false',
+    'yard_buildings': _mapping
+}
+
+def validate(data):
+    """List of problems with a parsed config, empty when it is valid"""
+    if not isinstance(data, dict):
+        return ['top level must be an object']
+
+    problems = []
+    for key, check in SCHEMA.items():
+        expected = check(data[key]) if key in data else None
+        if expected:
+            problems.append(f"{key} must be {expected}")
+    if data.get('min_cows', 0) > data.get('max_cows', float('inf')):
+        problems.append('min_cows must not exceed max_cows')
+    return problems
+
+def calculate_cow_count(config):
+    """Calculate cow count based on paddock area and stocking density"""
+    paddock_size = config.get('paddock_size_m', [120, 80])
+    num_paddocks = config.get('paddocks', 6)
+    stocking_density = config.get('stocking_density_cows_per_ha', 2.0)
+    min_cows = config.get('min_cows', 30)
+    max_cows = config.get('max_cows', 150)
+
+    total_area_ha = paddock_size[0] * paddock_size[1] * num_paddocks / 10000
+
+    cow_count = int(total_area_ha * stocking_density)
+    return max(min_cows, min(cow_count, max_cows))
+
+class FarmConfig(collections.abc.Mapping):
+    """Read-only farm config with typed accessors and memoized derived values
+
+    Behaves like the plain dict the planners expect, so config.get() keeps
+    working everywhere.
+    """
+
+    def __init__(self, data, level='L2', path=None, digest=None):
+        self._data = data
+        self.level = level
+        self.path = path
+        self.digest = digest
+        self._herds = {}
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"FarmConfig({self.level}, {self.path or 'defaults'})"
+
+    @property
+    def seed(self):
+        return self._data.get('seed', 42)
+
+    @property
+    def paddock_count(self):
+        return self._data.get('paddocks', 4 if self.level == 'L1' else 6)
+
+    @property
+    def paddock_size_m(self):
+        return tuple(self._data.get('paddock_size_m', [120, 80]))
+
+    @property
+    def time_of_day_hours(self):
+        return self._data.get('time_of_day_hours', 15.5)
+
+    @functools.cached_property
+    def total_area_ha(self):
+        """Area of all paddocks in hectares"""
+        width, height = self.paddock_size_m
+        return width * height * self.paddock_count / 10000
+
+    @functools.cached_property
+    def cow_count(self):
+        """Herd size: cow_count for L1, stocking density over the paddocks for L2"""
+        if self.level == 'L1':
+            return self._data.get('cow_count', 60)
+        return calculate_cow_count(self)
+
+    @functools.cached_property
+    def paddock_layout(self):
+        """Bounds of every paddock in the level's grid"""
+        columns = 2 if self.level == 'L1' else 3
+        return farm_plan.paddock_layout(self, columns=columns, default_paddocks=self.paddock_count)
+
+    def paddock(self, index):
+        """Bounds of one paddock, also for indices past the configured count"""
+        if 0 <= index < len(self.paddock_layout):
+            return self.paddock_layout[index]
+        return farm_plan.paddock_bounds(index, self.paddock_size_m, 2 if self.level == 'L1' else 3)
+
+    def herd_distribution(self, active_paddock):
+        """Cows per paddock with the herd in active_paddock, memoized per paddock"""
+        if active_paddock not in self._herds:
+            self._herds[active_paddock] = farm_plan.herd_distribution(self.cow_count, active_paddock)
+        return dict(self._herds[active_paddock])
+
+    def to_dict(self):
+        """Plain copy of the config values, e.g. for writing back to disk"""
+        return json.loads(json.dumps(self._data))
+
+def as_config(config, level='L2'):
+    """FarmConfig for a loaded config or a plain dict of config values"""
+    return config if isinstance(config, FarmConfig) else FarmConfig(dict(config), level)
+
+# Module level state lives for the whole editor session
+_cache = {}
+_stats = {'hits': 0, 'rereads': 0, 'parses': 0}
+
+def data_dir():
+    """Content/Farm/Data of the open project, or of this checkout outside the editor"""
+    try:
+        import unreal
+    except ImportError:
+        return DATA_DIR
+    return os.path.join(unreal.Paths.project_content_dir(), 'Farm', 'Data')
+
+def config_path(name):
+    """Full path of a config file in the farm data folder"""
+    return os.path.join(data_dir(), name)
+
+def level_of(name):
+    """'L1' for farm_config.json, 'L2' for everything else"""
+    return 'L1' if os.path.basename(name) == L1_CONFIG else 'L2'
+
+def load(name=L2_CONFIG, defaults=None):
+    """Cached FarmConfig for a config file in the farm data folder
+
+    A missing file gives the defaults (with a warning) when any are passed
+    and raises otherwise; an invalid file always raises ConfigError.
+    """
+    path = config_path(name)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        if defaults is None:
+            raise
+        print(f"Warning: Could not load {name}, using defaults")
+        return FarmConfig(dict(defaults), level_of(name))
+
+    cached = _cache.get(path)
+    if cached and cached['mtime'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+        _stats['hits'] += 1
+        return cached['config']
+
+    with open(path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha1(raw).hexdigest()
+
+    # Touched but unchanged: keep the parsed config and its memoized values
+    _stats['rereads'] += 1
+    if cached and cached['config'].digest == digest:
+        cached.update(mtime=stat.st_mtime_ns, size=stat.st_size)
+        return cached['config']
+
+    _stats['parses'] += 1
+    try:
+        data = json.loads(raw.decode('utf-8'))
+    except ValueError as e:
+        raise ConfigError(f"{path}: {e}") from e
+    problems = validate(data)
+    if problems:
+        raise ConfigError(f"{path}: " + '; '.join(problems))
+
+    config = FarmConfig(data, level_of(name), path, digest)
+    _cache[path] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'config': config}
+    return config
+
+def save(name, changes):
+    """Write changed keys back to a config file and return the reloaded config"""
+    data = load(name).to_dict()
+    data.update(changes)
+    problems = validate(data)
+    if problems:
+        raise ConfigError('; '.join(problems))
+
+    with open(config_path(name), 'w') as f:
+        json.dump(data, f, indent=2)
+    invalidate(name)
+    return load(name)
+
+def invalidate(name=None):
+    """Drop one cached config, or all of them"""
+    if name is None:
+        _cache.clear()
+    else:
+        _cache.pop(config_path(name), None)
+
+def get_stats():
+    """Return cache counters"""
+    return dict(_stats, cached=len(_cache))
+
+def print_stats():
+    """Print cache counters"""
+    stats = get_stats()
+    print(f"Config cache: {stats['hits']} hits, {stats['rereads']} re-reads, {stats['parses']} parses")
@@ -3,43 +3,41 @@ Dairy Farm L2 Scene Generator
 Enhanced version with sublevels, density controls, and landscape
 """
 import unreal
-import json
-import math
-import random
-from datetime import datetime
+import os
+import sys
+
+# Make sibling helper modules importable when run via -ExecutePythonScript
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import actor_registry
+import asset_cache
+import budget
+import farm_config
+import farm_plan
+import grazing_store
+import hlod_build
+import plan_executor
+import profiling
+import regen_manifest
+import solar
+import stream_cells
 
 def load_config_v2():
     """Load v2 farm configuration"""
-    config_path = unreal.Paths.project_content_dir() + 'Farm/Data/farm_config_v2.json'
-    try:
-        with open(config_path, 'r') as f:
-            return json.load(f)
-    except:
-        print("Warning: Could not load config v2, using defaults")
-        return {
-            "seed": 42,
-            "time_of_day_hours": 15.5,
-            "paddocks": 6,
-            "paddock_size_m": [120, 80],
-            "stocking_density_cows_per_ha": 2.0,
-            "min_cows": 30,
-            "max_cows": 150
-        }
+    return farm_config.load(farm_config.L2_CONFIG, defaults={
+        "seed": 42,
+        "time_of_day_hours": 15.5,
+        "paddocks": 6,
+        "paddock_size_m": [120, 80],
+        "stocking_density_cows_per_ha": 2.0,
+        "min_cows": 30,
+        "max_cows": 150,
+        "fence_mode": "instanced",
+        "herd_mode": "actors"
+    })
 
 def load_grazing_state():
-    """Load grazing rotation state"""
-    state_path = unreal.Paths.project_content_dir() + 'Farm/Data/GrazingState.json'
-    try:
-        with open(state_path, 'r') as f:
-            return json.load(f)
-    except:
-        return {"active_paddock_index": 0, "last_rotated_iso": datetime.utcnow().isoformat() + "Z"}
-
-def save_grazing_state(state):
-    """Save grazing rotation state"""
-    state_path = unreal.Paths.project_content_dir() + 'Farm/Data/GrazingState.json'
-    with open(state_path, 'w') as f:
-        json.dump(state, f, indent=2)
+    """Current grazing rotation state from the crash-safe grazing store"""
+    return grazing_store.open_store(farm_config.data_dir()).current()
 
 def create_l2_levels():
     """Create persistent level and sublevels for L2"""
@@ -52,72 +50,62 @@ def create_l2_levels():
     # Create persistent level
     persistent_level = '/Game/Farm/Maps/DairyFarm_L2'
     if not unreal.EditorAssetLibrary.does_asset_exist(persistent_level):
-        unreal.EditorLevelLibrary.new_level(persistent_level)
+        actor_registry.new_level(persistent_level)
     else:
-        unreal.EditorLevelLibrary.load_level(persistent_level)
+        actor_registry.load_level(persistent_level)
 
     # Create sublevels
     sublevel_names = ['DairyFarm_L2_Paddocks', 'DairyFarm_L2_Yard', 'DairyFarm_L2_Animals']
 
     for sublevel_name in sublevel_names:
-        sublevel_path = f'/Game/Farm/Maps/{sublevel_name}'
-
-        # Create sublevel if it doesn't exist
-        if not unreal.EditorAssetLibrary.does_asset_exist(sublevel_path):
-            # Save current level first
-            unreal.EditorLevelLibrary.save_current_level()
-            # Create new level for sublevel
-            unreal.EditorLevelLibrary.new_level(sublevel_path)
-            unreal.EditorLevelLibrary.save_current_level()
-            # Return to persistent level
-            unreal.EditorLevelLibrary.load_level(persistent_level)
-
-        # Add sublevel to persistent level
-        streaming_level = unreal.EditorLevelUtils.add_level_to_world(
-            unreal.EditorLevelLibrary.get_editor_world(),
-            sublevel_path,
-            unreal.LevelStreamingDynamic
-        )
-
-        if streaming_level:
-            streaming_level.set_should_be_loaded(True)
-            streaming_level.set_should_be_visible(True)
-            print(f"Added sublevel: {sublevel_name}")
+        add_sublevel(persistent_level, sublevel_name)
 
     return persistent_level
 
-def calculate_cow_count(config):
-    """Calculate cow count based on paddock area and stocking density"""
-    paddock_size = config.get('paddock_size_m', [120, 80])
-    num_paddocks = config.get('paddocks', 6)
-    stocking_density = config.get('stocking_density_cows_per_ha', 2.0)
-    min_cows = config.get('min_cows', 30)
-    max_cows = config.get('max_cows', 150)
-
-    # Calculate total area in hectares
-    area_per_paddock_m2 = paddock_size[0] * paddock_size[1]
-    total_area_m2 = area_per_paddock_m2 * num_paddocks
-    total_area_ha = total_area_m2 / 10000  # Convert to hectares
+def add_sublevel(persistent_level, sublevel_name, visible=True):
+    """Create a sublevel if needed and stream it into the persistent level"""
+    sublevel_path = f'/Game/Farm/Maps/{sublevel_name}'
+
+    # Create sublevel if it doesn't exist
+    if not unreal.EditorAssetLibrary.does_asset_exist(sublevel_path):
+        # Save current level first
+        unreal.EditorLevelLibrary.save_current_level()
+        # Create new level for sublevel
+        actor_registry.new_level(sublevel_path)
+        unreal.EditorLevelLibrary.save_current_level()
+        # Return to persistent level
+        actor_registry.load_level(persistent_level)
+
+    # Add sublevel to persistent level, or reuse it when already added
+    world = unreal.EditorLevelLibrary.get_editor_world()
+    streaming_level = unreal.EditorLevelUtils.add_level_to_world(
+        world,
+        sublevel_path,
+        unreal.LevelStreamingDynamic
+    )
+    if not streaming_level:
+        streaming_level = unreal.GameplayStatics.get_streaming_level(world, sublevel_path)
 
-    # Calculate cow count
-    cow_count = int(total_area_ha * stocking_density)
-    cow_count = max(min_cows, min(cow_count, max_cows))
+    if streaming_level:
+        streaming_level.set_should_be_loaded(True)
+        streaming_level.set_should_be_visible(visible)
+        print(f"Added sublevel: {sublevel_name}")
 
-    print(f"Calculated cow count: {cow_count} (Area: {total_area_ha:.2f} ha, Density: {stocking_density} cows/ha)")
-    return cow_count
+    return streaming_level
 
 def create_landscape(size_x=12800, size_y=12800):
     """Create a simple landscape"""
     print("Creating landscape...")
 
     # Create landscape actor
-    landscape = unreal.EditorLevelLibrary.spawn_actor_from_class(
+    landscape = actor_registry.spawn_actor(
         unreal.Landscape,
         unreal.Vector(0, 0, 0),
         unreal.Rotator(0, 0, 0)
     )
 
     if landscape:
+        actor_registry.set_tags(landscape, [regen_manifest.section_tag('Paddocks')])
         print("Landscape created (using default flat terrain)")
         # Note: Full landscape creation requires complex heightmap import
         # For now, we'll use a flat landscape as placeholder
@@ -131,7 +119,7 @@ def add_navmesh_bounds(config):
     print("Adding NavMeshBoundsVolume...")
 
     # Create NavMeshBoundsVolume
-    nav_volume = unreal.EditorLevelLibrary.spawn_actor_from_class(
+    nav_volume = actor_registry.spawn_actor(
         unreal.NavMeshBoundsVolume,
         unreal.Vector(600 * 100, 400 * 100, 250),  # Center of paddocks area
         unreal.Rotator(0, 0, 0)
@@ -143,317 +131,116 @@ def add_navmesh_bounds(config):
 
         # Control visibility
         nav_volume.set_actor_hidden_in_game(not show_navmesh)
+        actor_registry.set_tags(nav_volume, [regen_manifest.section_tag('Paddocks')])
 
         print(f"NavMeshBoundsVolume added (visible: {show_navmesh})")
 
     return nav_volume
 
-def create_paddocks_sublevel(config):
+def create_paddocks_sublevel(config, plan):
     """Generate paddocks in the Paddocks sublevel"""
     print("Generating paddocks sublevel...")
 
     # Switch to paddocks sublevel
     sublevel_path = '/Game/Farm/Maps/DairyFarm_L2_Paddocks'
 
-    num_paddocks = config.get('paddocks', 6)
-    paddock_size = config.get('paddock_size_m', [120, 80])
-    fence_spacing = config.get('fence_post_spacing_m', 4.0)
+    plan_executor.apply_plan(plan, config, ['ground', 'posts', 'hedges'],
+                             [regen_manifest.section_tag('Paddocks')])
 
-    paddock_actors = []
+    return plan.paddocks
 
-    # Create mesh assets
-    cube_mesh = unreal.EditorAssetLibrary.load_asset('/Engine/BasicShapes/Cube')
-    plane_mesh = unreal.EditorAssetLibrary.load_asset('/Engine/BasicShapes/Plane')
+def add_streaming_volume(streaming_level, bounds, stream_distance):
+    """Volume that loads a tile sublevel once the viewer is within stream_distance"""
+    center, extent = stream_cells.streaming_box(bounds, stream_distance)
 
-    for i in range(num_paddocks):
-        row = i // 3
-        col = i % 3
+    # The default volume brush is a 200cm cube
+    volume = actor_registry.spawn_actor(
+        unreal.LevelStreamingVolume,
+        unreal.Vector(*center),
+        unreal.Rotator(0, 0, 0),
+        tags=[regen_manifest.section_tag('Paddocks'), 'StreamingVolume']
+    )
+    if volume:
+        volume.set_actor_scale3d(unreal.Vector(extent[0] / 100, extent[1] / 100, extent[2] / 100))
+        volume.set_editor_property('streaming_usage', unreal.StreamingVolumeUsage.SVB_LOADING_AND_VISIBILITY)
+        streaming_level.set_editor_property('editor_streaming_volumes', [volume])
 
-        # Calculate paddock center
-        x = 500 * 100 + col * (paddock_size[0] + 20) * 100
-        y = row * (paddock_size[1] + 20) * 100
+    return volume
 
-        # Create ground plane
-        ground = spawn_static_mesh_actor(
-            plane_mesh,
-            unreal.Vector(x, y, 0),
-            unreal.Rotator(0, 0, 0),
-            unreal.Vector(paddock_size[0]/10, paddock_size[1]/10, 1)
-        )
+def create_cell_levels(config, plan, persistent_level):
+    """Create or load every tile sublevel, before anything is spawned into them
 
-        if ground:
-            # Apply grass material
-            apply_material(ground, '/Game/Farm/Materials/M_Grass')
+    Creating a sublevel saves and reloads the persistent level, which
+    would drop unsaved actors in tiles filled earlier.
+    """
+    cell_size = config.get('stream_cell_size_m', 0) * 100
+    cells = stream_cells.assign_paddocks(plan.paddocks, cell_size)
 
-        # Create fence perimeter
-        create_fence_perimeter_l2(x, y, paddock_size[0] * 100, paddock_size[1] * 100, fence_spacing * 100)
+    cell_levels = {}
+    for cell, indices in cells.items():
+        streaming_level = add_sublevel(persistent_level, stream_cells.cell_level_name(cell))
+        if streaming_level:
+            cell_levels[cell] = (indices, streaming_level)
 
-        # Add hedgerows
-        add_hedgerows_l2(x, y, paddock_size[0] * 100, paddock_size[1] * 100, config)
+    return cell_levels
 
-        paddock_actors.append({
-            'index': i,
-            'center': (x, y),
-            'size': (paddock_size[0] * 100, paddock_size[1] * 100)
-        })
+def create_paddock_cells(config, plan, persistent_level, cell_levels):
+    """Generate paddocks into the streaming sublevel of each N x N metre tile"""
+    stream_distance = config.get('stream_distance_m', 500) * 100
+    print(f"Generating {len(cell_levels)} paddock cells of {config.get('stream_cell_size_m', 0):g}m...")
 
-    return paddock_actors
+    level_editor = unreal.get_editor_subsystem(unreal.LevelEditorSubsystem)
+    persistent_name = persistent_level.rsplit('/', 1)[-1]
 
-def create_yard_sublevel(config):
-    """Generate farm yard in the Yard sublevel"""
-    print("Generating yard sublevel...")
+    for cell, (indices, streaming_level) in cell_levels.items():
+        cell_name = stream_cells.cell_level_name(cell)
 
-    yard_buildings = config.get('yard_buildings', {})
-    yard_origin = [0, 0, 0]
-
-    cube_mesh = unreal.EditorAssetLibrary.load_asset('/Engine/BasicShapes/Cube')
-    cylinder_mesh = unreal.EditorAssetLibrary.load_asset('/Engine/BasicShapes/Cylinder')
-
-    # Dairy shed
-    if 'dairy_shed' in yard_buildings:
-        shed = yard_buildings['dairy_shed']
-        building = spawn_static_mesh_actor(
-            cube_mesh,
-            unreal.Vector(shed['position'][0] * 100, shed['position'][1] * 100, shed['size'][2] * 50),
-            unreal.Rotator(0, 0, 0),
-            unreal.Vector(shed['size'][0]/10, shed['size'][1]/10, shed['size'][2]/10)
-        )
-        apply_material(building, '/Game/Farm/Materials/M_Concrete')
-
-        # Add roof
-        roof = spawn_static_mesh_actor(
-            cube_mesh,
-            unreal.Vector(shed['position'][0] * 100, shed['position'][1] * 100, shed['size'][2] * 100 + 50),
-            unreal.Rotator(0, 0, 0),
-            unreal.Vector(shed['size'][0]/10 + 0.2, shed['size'][1]/10 + 0.2, 0.1)
-        )
-        apply_material(roof, '/Game/Farm/Materials/M_Shed_Roof')
-
-    # Milking parlour
-    if 'milking_parlour' in yard_buildings:
-        parlour = yard_buildings['milking_parlour']
-        building = spawn_static_mesh_actor(
-            cube_mesh,
-            unreal.Vector(parlour['position'][0] * 100, parlour['position'][1] * 100, parlour['size'][2] * 50),
-            unreal.Rotator(0, 0, 0),
-            unreal.Vector(parlour['size'][0]/10, parlour['size'][1]/10, parlour['size'][2]/10)
-        )
-        apply_material(building, '/Game/Farm/Materials/M_Concrete')
-
-    # Slurry tank
-    if 'slurry_tank' in yard_buildings:
-        tank = yard_buildings['slurry_tank']
-        tank_actor = spawn_static_mesh_actor(
-            cylinder_mesh,
-            unreal.Vector(tank['position'][0] * 100, tank['position'][1] * 100, tank['height'] * 50),
-            unreal.Rotator(0, 0, 0),
-            unreal.Vector(tank['radius']/5, tank['radius']/5, tank['height']/10)
-        )
-        apply_material(tank_actor, '/Game/Farm/Materials/M_Slurry')
-
-    # Create lane
-    create_farm_lane_l2(config)
-
-def create_animals_sublevel(config, paddock_data):
-    """Generate cows in the Animals sublevel"""
-    print("Generating animals sublevel...")
+        # Spawned actors land in the current level, so make the tile current
+        cell_plan = plan.select_paddocks(indices, ['ground', 'posts', 'hedges'])
+        level_editor.set_current_level_by_name(cell_name)
+        plan_executor.apply_plan(cell_plan, config, ['ground', 'posts', 'hedges'],
+                                 [regen_manifest.section_tag('Paddocks'), f'StreamCell:{cell_name}'])
+        level_editor.set_current_level_by_name(persistent_name)
 
-    # Calculate cow count
-    cow_count = calculate_cow_count(config)
+        # Volumes live in the persistent level and may reach past the tile
+        bounds = stream_cells.content_bounds(cell_plan.paddocks)
+        add_streaming_volume(streaming_level, bounds, stream_distance)
 
-    # Load grazing state
-    grazing_state = load_grazing_state()
-    active_paddock = grazing_state.get('active_paddock_index', 0)
+        # Only tiles within streaming distance of the yard stay visible in the editor
+        near_yard = stream_cells.distance_to_bounds((0, 0), bounds) <= stream_distance
+        streaming_level.set_should_be_visible(near_yard)
+        loaded_level = streaming_level.get_loaded_level()
+        if loaded_level:
+            unreal.EditorLevelUtils.set_level_visibility(loaded_level, near_yard, False)
 
-    # Get rotation settings
-    rotation_days = config.get('rotation_days', 2)
+    return cell_levels
 
-    # Place cows in active paddock (with 5% stragglers in previous)
-    active_cow_count = int(cow_count * 0.95)
-    straggler_count = cow_count - active_cow_count
+def create_yard_sublevel(config, plan):
+    """Generate farm yard in the Yard sublevel"""
+    print("Generating yard sublevel...")
 
-    # Spawn BP_Cow actors
-    create_cow_blueprints(active_paddock, active_cow_count, paddock_data)
+    plan_executor.apply_plan(plan, config, ['buildings', 'lane'],
+                             [regen_manifest.section_tag('Yard')])
 
-    # Add stragglers in previous paddock
-    if active_paddock > 0:
-        create_cow_blueprints(active_paddock - 1, straggler_count, paddock_data)
+def create_animals_sublevel(config, plan):
+    """Generate cows in the Animals sublevel"""
+    print("Generating animals sublevel...")
 
-    # Spawn BP_HerdManager for each paddock
-    for paddock in paddock_data:
-        create_herd_manager(paddock)
-
-def spawn_static_mesh_actor(mesh, location, rotation, scale):
-    """Helper to spawn static mesh actor"""
-    actor = unreal.EditorLevelLibrary.spawn_actor_from_class(
-        unreal.StaticMeshActor,
-        location,
-        rotation
-    )
+    # Cows were placed by the planner: 95% in the active paddock, 5% stragglers
+    print(f"Spawning {plan.count('cows')} cows")
+    plan_executor.apply_plan(plan, config, ['cows'], [regen_manifest.section_tag('Animals')])
 
-    if actor:
-        mesh_component = actor.get_component_by_class(unreal.StaticMeshComponent)
-        if mesh_component:
-            mesh_component.set_static_mesh(mesh)
-            mesh_component.set_relative_scale3d(scale)
-
-    return actor
-
-def apply_material(actor, material_path):
-    """Apply material to actor"""
-    if actor:
-        mesh_component = actor.get_component_by_class(unreal.StaticMeshComponent)
-        if mesh_component:
-            material = unreal.EditorAssetLibrary.load_asset(material_path)
-            if material:
-                mesh_component.set_material(0, material)
-
-def create_fence_perimeter_l2(center_x, center_y, width, height, spacing):
-    """Enhanced fence creation for L2"""
-    half_width = width / 2
-    half_height = height / 2
-
-    post_mesh = unreal.EditorAssetLibrary.load_asset('/Engine/BasicShapes/Cube')
-    rail_mesh = unreal.EditorAssetLibrary.load_asset('/Engine/BasicShapes/Cube')
-
-    # Create fence posts along perimeter
-    posts = []
-
-    # Calculate post positions for all edges
-    for x in range(int(-half_width), int(half_width + spacing), int(spacing)):
-        posts.append((center_x + x, center_y + half_height, 0))
-        posts.append((center_x + x, center_y - half_height, 0))
-
-    for y in range(int(-half_height + spacing), int(half_height), int(spacing)):
-        posts.append((center_x - half_width, center_y + y, 0))
-        posts.append((center_x + half_width, center_y + y, 0))
-
-    # Spawn posts and rails
-    for i, pos in enumerate(posts):
-        # Fence post
-        post = spawn_static_mesh_actor(
-            post_mesh,
-            unreal.Vector(pos[0], pos[1], 100),
-            unreal.Rotator(0, 0, 0),
-            unreal.Vector(0.1, 0.1, 2)
-        )
-        apply_material(post, '/Game/Farm/Materials/M_FencePost')
-
-def add_hedgerows_l2(center_x, center_y, width, height, config):
-    """Add enhanced hedgerows for L2"""
-    hedge_density = config.get('hedge_density_per_100m', 6)
-    cone_mesh = unreal.EditorAssetLibrary.load_asset('/Engine/BasicShapes/Cone')
-
-    # Add trees at corners and along edges
-    num_trees = int(hedge_density * 2)
-
-    for i in range(num_trees):
-        # Random position along edge
-        edge = random.choice(['north', 'south', 'east', 'west'])
-
-        if edge == 'north':
-            x = center_x + random.uniform(-width/2, width/2)
-            y = center_y + height/2
-        elif edge == 'south':
-            x = center_x + random.uniform(-width/2, width/2)
-            y = center_y - height/2
-        elif edge == 'east':
-            x = center_x + width/2
-            y = center_y + random.uniform(-height/2, height/2)
-        else:
-            x = center_x - width/2
-            y = center_y + random.uniform(-height/2, height/2)
-
-        tree = spawn_static_mesh_actor(
-            cone_mesh,
-            unreal.Vector(x, y, 250),
-            unreal.Rotator(0, random.uniform(0, 360), 0),
-            unreal.Vector(2, 2, 5)
-        )
-        apply_material(tree, '/Game/Farm/Materials/M_Hedge')
-
-def create_farm_lane_l2(config):
-    """Create enhanced farm lane for L2"""
-    lane_points = config.get('lane_points', [])
-
-    if len(lane_points) < 2:
-        return
-
-    cube_mesh = unreal.EditorAssetLibrary.load_asset('/Engine/BasicShapes/Cube')
-
-    for i in range(len(lane_points) - 1):
-        p1 = lane_points[i]
-        p2 = lane_points[i + 1]
-
-        mid_x = (p1[0] + p2[0]) / 2 * 100
-        mid_y = (p1[1] + p2[1]) / 2 * 100
-
-        dx = (p2[0] - p1[0]) * 100
-        dy = (p2[1] - p1[1]) * 100
-        length = math.sqrt(dx*dx + dy*dy) / 100
-        angle = math.degrees(math.atan2(dy, dx))
-
-        road = spawn_static_mesh_actor(
-            cube_mesh,
-            unreal.Vector(mid_x, mid_y, 5),
-            unreal.Rotator(0, angle, 0),
-            unreal.Vector(length, 5, 0.1)
-        )
-        apply_material(road, '/Game/Farm/Materials/M_Gravel_Lane')
-
-def create_cow_blueprints(paddock_index, cow_count, paddock_data):
-    """Create BP_Cow actors using Python"""
-    print(f"Spawning {cow_count} cows in paddock {paddock_index}")
-
-    if paddock_index >= len(paddock_data):
-        return
-
-    paddock = paddock_data[paddock_index]
-    center_x, center_y = paddock['center']
-    width, height = paddock['size']
-
-    # Use cylinder as cow placeholder
-    cylinder_mesh = unreal.EditorAssetLibrary.load_asset('/Engine/BasicShapes/Cylinder')
-
-    cow_materials = [
-        '/Game/Farm/Materials/M_CowBlack',
-        '/Game/Farm/Materials/M_CowWhite',
-        '/Game/Farm/Materials/M_CowBrown'
-    ]
-
-    for i in range(cow_count):
-        # Random position within paddock
-        margin = 500  # 5m margin from fence
-        x = center_x + random.uniform(-width/2 + margin, width/2 - margin)
-        y = center_y + random.uniform(-height/2 + margin, height/2 - margin)
-        rotation = random.uniform(0, 360)
-
-        # Create cow actor
-        cow = spawn_static_mesh_actor(
-            cylinder_mesh,
-            unreal.Vector(x, y, 75),
-            unreal.Rotator(0, rotation, 0),
-            unreal.Vector(0.8, 0.8, 1.5)
-        )
-
-        if cow:
-            # Apply random cow material
-            apply_material(cow, random.choice(cow_materials))
-
-            # Add cow tags
-            cow.tags = ['Cow', f'Paddock_{paddock_index}', 'WanderRadius:2000', 'StepSeconds:2.0', 'MoveSpeed:100']
-
-            # 10% chance of lying down (idle)
-            if random.random() < 0.1:
-                cow.set_actor_scale3d(unreal.Vector(0.8, 0.8, 0.95))
-                cow.tags.append('State:Lying')
+    # Spawn BP_HerdManager for each paddock
+    with profiling.scope('herd_managers'):
+        for paddock in plan.paddocks:
+            create_herd_manager(paddock)
 
 def create_herd_manager(paddock):
     """Create BP_HerdManager for paddock"""
     center_x, center_y = paddock['center']
 
     # Spawn manager actor
-    manager = unreal.EditorLevelLibrary.spawn_actor_from_class(
+    manager = actor_registry.spawn_actor(
         unreal.Actor,
         unreal.Vector(center_x, center_y, 0),
         unreal.Rotator(0, 0, 0)
@@ -461,44 +248,43 @@ def create_herd_manager(paddock):
 
     if manager:
         manager.set_actor_label(f"HerdManager_Paddock_{paddock['index']}")
-        manager.tags = ['HerdManager', f"Paddock_{paddock['index']}", f"Size:{paddock['size']}"]
+        actor_registry.set_tags(manager, ['HerdManager', f"Paddock_{paddock['index']}", f"Size:{paddock['size']}",
+                                          regen_manifest.section_tag('Animals')])
 
 def setup_lighting_l2(config):
     """Enhanced lighting setup for L2"""
-    time_of_day = config.get('time_of_day_hours', 15.5)
+    time_of_day = config.time_of_day_hours
 
     # Clear existing lights
-    for actor in unreal.EditorLevelLibrary.get_all_level_actors():
-        if isinstance(actor, (unreal.DirectionalLight, unreal.SkyLight, unreal.SkyAtmosphere)):
-            unreal.EditorLevelLibrary.destroy_actor(actor)
+    for light_class in (unreal.DirectionalLight, unreal.SkyLight, unreal.SkyAtmosphere):
+        actor_registry.destroy_actors(actor_registry.find_by_class(light_class))
 
-    # Add Directional Light (sun)
-    sun_angle = (time_of_day - 6) * 15
-    pitch = -sun_angle if sun_angle < 180 else -sun_angle + 360
+    # Add Directional Light (sun) at the real sun position for the farm
+    pitch, yaw, roll = solar.sun_rotation(time_of_day, config)
 
-    sun = unreal.EditorLevelLibrary.spawn_actor_from_class(
+    sun = actor_registry.spawn_actor(
         unreal.DirectionalLight,
         unreal.Vector(0, 0, 1000),
-        unreal.Rotator(pitch, 45, 0)
+        unreal.Rotator(roll=roll, pitch=pitch, yaw=yaw)
     )
 
     if sun:
         sun.set_actor_label("Sun")
-        sun.tags = ['Sun', f'TimeOfDay:{time_of_day}']
+        actor_registry.set_tags(sun, ['Sun', f'TimeOfDay:{time_of_day}', regen_manifest.section_tag('Lighting')])
         light_component = sun.get_component_by_class(unreal.DirectionalLightComponent)
         if light_component:
             light_component.set_intensity(5.0)
             light_component.set_light_color(unreal.LinearColor(1.0, 0.95, 0.8))
 
     # Add Sky Atmosphere
-    sky_atmosphere = unreal.EditorLevelLibrary.spawn_actor_from_class(
+    sky_atmosphere = actor_registry.spawn_actor(
         unreal.SkyAtmosphere,
         unreal.Vector(0, 0, 0),
         unreal.Rotator(0, 0, 0)
     )
 
     # Add Sky Light
-    sky_light = unreal.EditorLevelLibrary.spawn_actor_from_class(
+    sky_light = actor_registry.spawn_actor(
         unreal.SkyLight,
         unreal.Vector(0, 0, 500),
         unreal.Rotator(0, 0, 0)
@@ -511,7 +297,7 @@ def setup_lighting_l2(config):
             sky_light_component.recapture_sky()
 
     # Add Exponential Height Fog
-    fog = unreal.EditorLevelLibrary.spawn_actor_from_class(
+    fog = actor_registry.spawn_actor(
         unreal.ExponentialHeightFog,
         unreal.Vector(0, 0, 0),
         unreal.Rotator(0, 0, 0)
@@ -524,7 +310,7 @@ def setup_lighting_l2(config):
             fog_component.set_fog_height_falloff(0.2)
 
     # Add Post Process Volume
-    ppv = unreal.EditorLevelLibrary.spawn_actor_from_class(
+    ppv = actor_registry.spawn_actor(
         unreal.PostProcessVolume,
         unreal.Vector(0, 0, 0),
         unreal.Rotator(0, 0, 0)
@@ -534,46 +320,117 @@ def setup_lighting_l2(config):
         ppv.set_actor_scale3d(unreal.Vector(10000, 10000, 10000))
         ppv.unbound = True
 
-def main():
+    # Tag everything so an incremental rebuild can clear this step
+    for actor in (sky_atmosphere, sky_light, fog, ppv):
+        if actor:
+            actor_registry.set_tags(actor, [regen_manifest.section_tag('Lighting')])
+
+def clear_section(section):
+    """Destroy all actors spawned by one build step"""
+    tag = regen_manifest.section_tag(section)
+    removed = actor_registry.destroy_actors(actor_registry.find_by_tag(tag))
+
+    if removed:
+        print(f"Cleared {removed} actors from {section}")
+
+def get_dirty_sections(config, grazing_state, manifest_path, force_rebuild=False):
+    """Sections whose inputs changed since the last run, plus their new hashes"""
+    hashes = regen_manifest.section_hashes(config, grazing_state)
+
+    # A missing level means nothing to reuse
+    if force_rebuild or not unreal.EditorAssetLibrary.does_asset_exist('/Game/Farm/Maps/DairyFarm_L2'):
+        return list(regen_manifest.SECTIONS), hashes
+
+    return regen_manifest.changed_sections(regen_manifest.load_manifest(manifest_path), hashes), hashes
+
+@profiling.profiled('farm_generate_l2')
+def main(force_rebuild=False):
     """Main L2 generation function"""
     print("\n=== Starting Dairy Farm L2 Generation ===\n")
 
     # Load configurations
-    config = load_config_v2()
-    grazing_state = load_grazing_state()
+    with profiling.scope('config'):
+        config = load_config_v2()
+        grazing_state = load_grazing_state()
 
-    # Set random seed
-    random.seed(config.get('seed', 42))
+        # Only rebuild sublevels whose config sections changed
+        manifest_path = regen_manifest.manifest_path(farm_config.data_dir())
+        dirty_sections, section_hashes = get_dirty_sections(config, grazing_state, manifest_path, force_rebuild)
+    print(f"Sections to rebuild: {', '.join(dirty_sections) or 'none'}")
 
-    # Create L2 level structure
-    persistent_level = create_l2_levels()
+    # Categories over their actor_budgets entry are spawned as instances
+    budget.report(config, 'L2')
+
+    # Plan the whole layout up front, no editor calls involved
+    with profiling.scope('plan'):
+        plan = farm_plan.plan_farm_l2(config, grazing_state)
 
-    # Create landscape
-    create_landscape()
+    # Create L2 level structure
+    with profiling.scope('levels'):
+        persistent_level = create_l2_levels()
 
-    # Add NavMesh bounds
-    add_navmesh_bounds(config)
+        # stream_cell_size_m > 0 splits paddocks into streamed tile sublevels
+        cell_levels = {}
+        if 'Paddocks' in dirty_sections and config.get('stream_cell_size_m', 0) > 0:
+            cell_levels = create_cell_levels(config, plan, persistent_level)
 
     # Generate sublevels
-    paddock_data = create_paddocks_sublevel(config)
-    create_yard_sublevel(config)
-    create_animals_sublevel(config, paddock_data)
+    if 'Paddocks' in dirty_sections:
+        with profiling.scope('Paddocks'):
+            with profiling.scope('clear'):
+                clear_section('Paddocks')
+
+            # Create landscape
+            with profiling.scope('landscape'):
+                create_landscape()
+
+            # Add NavMesh bounds
+            with profiling.scope('navmesh'):
+                add_navmesh_bounds(config)
+
+            if cell_levels:
+                with profiling.scope('cells'):
+                    create_paddock_cells(config, plan, persistent_level, cell_levels)
+            else:
+                create_paddocks_sublevel(config, plan)
+
+            # Far paddocks draw one merged proxy instead of every post and hedge
+            if config.get('hlod_transition_distance_m', 0) > 0:
+                with profiling.scope('hlod'):
+                    hlod_build.build_hlods(config)
+
+    if 'Yard' in dirty_sections:
+        with profiling.scope('Yard'):
+            clear_section('Yard')
+            create_yard_sublevel(config, plan)
+
+    if 'Animals' in dirty_sections:
+        with profiling.scope('Animals'):
+            clear_section('Animals')
+            create_animals_sublevel(config, plan)
 
     # Setup lighting
-    setup_lighting_l2(config)
+    if 'Lighting' in dirty_sections:
+        with profiling.scope('Lighting'):
+            clear_section('Lighting')
+            setup_lighting_l2(config)
 
     # Save all levels
-    unreal.EditorLevelLibrary.save_current_level()
+    with profiling.scope('save'):
+        unreal.EditorLevelLibrary.save_current_level()
+        regen_manifest.save_manifest(manifest_path, section_hashes)
 
-    # Calculate final cow count
-    final_cow_count = calculate_cow_count(config)
+    # Cow count and area are memoized on the config
+    print(f"Calculated cow count: {config.cow_count} (Area: {config.total_area_ha:.2f} ha, "
+          f"Density: {config.get('stocking_density_cows_per_ha', 2.0)} cows/ha)")
 
     print(f"\n=== L2 Farm Generation Complete ===")
     print(f"Level: {persistent_level}")
-    print(f"Paddocks: {config.get('paddocks', 6)}")
-    print(f"Total cows: {final_cow_count}")
+    print(f"Paddocks: {config.paddock_count}")
+    print(f"Total cows: {config.cow_count}")
     print(f"Active paddock: {grazing_state.get('active_paddock_index', 0)}")
-    print(f"Time of day: {config.get('time_of_day_hours', 15.5)} hours")
+    print(f"Time of day: {config.time_of_day_hours} hours")
+    asset_cache.print_stats()
 
     return persistent_level
 
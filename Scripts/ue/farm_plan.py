@@ -0,0 +1,645 @@
+"""
+Farm Layout Planner
+Engine-independent planning stage: turns farm config and grazing state into
+array-backed transforms per category. Does not import unreal, so layouts can
+be profiled and tested outside the editor. See plan_executor.py for spawning.
+"""
+import math
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import poisson_disk
+import rng_streams
+
+CATEGORIES = ('ground', 'posts', 'rails', 'hedges', 'lane', 'buildings', 'cows')
+
+MESH_CUBE = '/Engine/BasicShapes/Cube'
+MESH_CYLINDER = '/Engine/BasicShapes/Cylinder'
+MESH_CONE = '/Engine/BasicShapes/Cone'
+MESH_PLANE = '/Engine/BasicShapes/Plane'
+
+COW_MATERIALS = [
+    '/Game/Farm/Materials/M_CowBlack',
+    '/Game/Farm/Materials/M_CowWhite',
+    '/Game/Farm/Materials/M_CowBrown'
+]
+
+# Columns of one transform row: location, rotation (Rotator argument order), scale
+LOCATION = slice(0, 3)
+ROTATION = slice(3, 6)
+SCALE = slice(6, 9)
+
+def transform_row(location, rotation=(0, 0, 0), scale=(1, 1, 1)):
+    """Pack location/rotation/scale into one 9-float transform row"""
+    return [location[0], location[1], location[2],
+            rotation[0], rotation[1], rotation[2],
+            scale[0], scale[1], scale[2]]
+
+class TransformBatch:
+    """Transforms sharing one mesh and material, stored as an (N, 9) array"""
+
+    def __init__(self, mesh, material, transforms, attributes=None, tags=None):
+        self.mesh = mesh
+        self.material = material
+        self.transforms = np.asarray(transforms, dtype=np.float64).reshape(-1, 9)
+        # Optional per-row arrays such as 'paddock', 'coat' or 'lying'
+        self.attributes = {name: np.asarray(values) for name, values in (attributes or {}).items()}
+        self.tags = list(tags or [])
+
+    def __len__(self):
+        return len(self.transforms)
+
+    def select(self, mask):
+        """Return a new batch holding only the rows selected by mask"""
+        return TransformBatch(
+            self.mesh,
+            self.material,
+            self.transforms[mask],
+            {name: values[mask] for name, values in self.attributes.items()},
+            self.tags
+        )
+
+def concat_batches(batches):
+    """Join batches of the same mesh and material, keeping row order"""
+    first = batches[0]
+    return TransformBatch(
+        first.mesh,
+        first.material,
+        np.concatenate([batch.transforms for batch in batches]),
+        {name: np.concatenate([batch.attributes[name] for batch in batches]) for name in first.attributes},
+        first.tags
+    )
+
+class FarmPlan:
+    """Planned farm layout: paddock bounds plus transform batches per category"""
+
+    def __init__(self, level, paddocks=None):
+        self.level = level
+        self.paddocks = paddocks or []
+        self.batches = {category: [] for category in CATEGORIES}
+
+    def add(self, category, batch):
+        """Add a batch to a category, skipping empty batches"""
+        if len(batch):
+            self.batches[category].append(batch)
+
+    def count(self, category=None):
+        """Number of planned instances in one category or in total"""
+        categories = [category] if category else CATEGORIES
+        return sum(len(batch) for name in categories for batch in self.batches[name])
+
+    def transforms(self, category):
+        """All transforms of a category as a single (N, 9) array"""
+        arrays = [batch.transforms for batch in self.batches[category]]
+        return np.concatenate(arrays) if arrays else np.zeros((0, 9))
+
+    def summary(self):
+        """Instance counts per category"""
+        return {category: self.count(category) for category in CATEGORIES}
+
+    def select_paddocks(self, indices, categories=CATEGORIES):
+        """Plan holding only the given paddocks' rows of the given categories
+
+        Batches without a 'paddock' attribute (yard, lane) are left out.
+        """
+        indices = np.asarray(sorted(indices))
+        subset = FarmPlan(self.level, [p for p in self.paddocks if p['index'] in set(indices.tolist())])
+        for category in categories:
+            for batch in self.batches[category]:
+                if 'paddock' in batch.attributes:
+                    subset.add(category, batch.select(np.isin(batch.attributes['paddock'], indices)))
+        return subset
+
+def paddock_bounds(index, paddock_size, columns=3):
+    """Center and size (cm) of a paddock in the grid layout"""
+    row = index // columns
+    col = index % columns
+
+    center_x = 500 * 100 + col * (paddock_size[0] + 20) * 100
+    center_y = row * (paddock_size[1] + 20) * 100
+
+    return {
+        'index': index,
+        'center': (center_x, center_y),
+        'size': (paddock_size[0] * 100, paddock_size[1] * 100)
+    }
+
+def paddock_layout(config, columns=3, default_paddocks=6):
+    """Bounds of every paddock in the config"""
+    paddock_size = config.get('paddock_size_m', [120, 80])
+    num_paddocks = config.get('paddocks', default_paddocks)
+    return [paddock_bounds(i, paddock_size, columns) for i in range(num_paddocks)]
+
+def transform_rows(locations, rotations=None, scale=(1, 1, 1)):
+    """Pack (N, 3) location and rotation arrays plus a scale into (N, 9) rows"""
+    rows = np.empty((len(locations), 9))
+    rows[:, LOCATION] = locations
+    rows[:, ROTATION] = 0 if rotations is None else rotations
+    rows[:, SCALE] = scale
+    return rows
+
+def paddock_arrays(paddocks):
+    """Paddock indices, centers (N, 2) and sizes (N, 2) as arrays"""
+    indices = np.array([p['index'] for p in paddocks], dtype=np.int64)
+    centers = np.array([p['center'] for p in paddocks], dtype=np.float64).reshape(-1, 2)
+    sizes = np.array([p['size'] for p in paddocks], dtype=np.float64).reshape(-1, 2)
+    return indices, centers, sizes
+
+def tile_paddocks(paddocks, offsets_for_size):
+    """Place an offset template around every paddock center
+
+    Paddocks are grouped by size so the template is built once per size.
+    Yields (paddock indices, positions) with positions shaped (n, M, 2).
+    """
+    indices, centers, sizes = paddock_arrays(paddocks)
+
+    for size in np.unique(sizes, axis=0):
+        mask = (sizes == size).all(axis=1)
+        template = offsets_for_size(size[0], size[1])
+        yield indices[mask], centers[mask][:, None, :] + template[None, :, :]
+
+def concat_by_paddock(groups):
+    """Concatenate (paddock ids, rows) groups, ordered by paddock index"""
+    if not groups:
+        return np.zeros((0, 9)), np.zeros(0, dtype=np.int64)
+
+    ids = np.concatenate([ids for ids, rows in groups])
+    rows = np.concatenate([rows for ids, rows in groups])
+    order = np.argsort(ids, kind='stable')
+    return rows[order], ids[order]
+
+def edge_range(start, stop, spacing):
+    """Same values as range(int(start), int(stop), int(spacing)), as floats"""
+    return np.arange(int(start), int(stop), int(spacing)).astype(np.float64)
+
+def fence_post_offsets_l2(width, height, spacing):
+    """Post offsets for L2 fences, top/bottom and left/right interleaved"""
+    half_width = width / 2
+    half_height = height / 2
+
+    xs = edge_range(-half_width, half_width + spacing, spacing)
+    ys = edge_range(-half_height + spacing, half_height, spacing)
+
+    top_bottom = np.empty((len(xs), 2, 2))
+    top_bottom[:, :, 0] = xs[:, None]
+    top_bottom[:, 0, 1] = half_height
+    top_bottom[:, 1, 1] = -half_height
+
+    left_right = np.empty((len(ys), 2, 2))
+    left_right[:, 0, 0] = -half_width
+    left_right[:, 1, 0] = half_width
+    left_right[:, :, 1] = ys[:, None]
+
+    return np.concatenate([top_bottom.reshape(-1, 2), left_right.reshape(-1, 2)])
+
+def fence_post_offsets_l1(width, height, spacing):
+    """Post offsets for L1 fences, one edge after another"""
+    half_width = width / 2
+    half_height = height / 2
+
+    xs = edge_range(-half_width, half_width + spacing, spacing)
+    ys = edge_range(-half_height + spacing, half_height, spacing)
+
+    # Top, bottom, left, right edge
+    return np.concatenate([
+        np.column_stack([xs, np.full(len(xs), half_height)]),
+        np.column_stack([xs, np.full(len(xs), -half_height)]),
+        np.column_stack([np.full(len(ys), -half_width), ys]),
+        np.column_stack([np.full(len(ys), half_width), ys])
+    ])
+
+def plan_ground(paddocks):
+    """One grass plane per paddock"""
+    indices, centers, sizes = paddock_arrays(paddocks)
+
+    rows = transform_rows(np.column_stack([centers, np.zeros(len(centers))]))
+    rows[:, 6:8] = sizes / 1000
+
+    return TransformBatch(MESH_PLANE, '/Game/Farm/Materials/M_Grass', rows, {'paddock': indices})
+
+def plan_posts(paddocks, spacing, post_offsets):
+    """Fence post transforms for every paddock in one batched call"""
+    groups = []
+
+    for ids, positions in tile_paddocks(paddocks, lambda w, h: post_offsets(w, h, spacing)):
+        flat = positions.reshape(-1, 2)
+        rows = transform_rows(np.column_stack([flat, np.full(len(flat), 100.0)]), scale=(0.1, 0.1, 2))
+        groups.append((np.repeat(ids, positions.shape[1]), rows))
+
+    rows, paddock_ids = concat_by_paddock(groups)
+    return TransformBatch(MESH_CUBE, '/Game/Farm/Materials/M_FencePost', rows, {'paddock': paddock_ids}, ['Fence'])
+
+def plan_rails(paddocks, spacing):
+    """Top and bottom rails joining consecutive L1 fence posts"""
+    groups = []
+
+    for ids, positions in tile_paddocks(paddocks, lambda w, h: fence_post_offsets_l1(w, h, spacing)):
+        start = positions[:, :-1]
+        end = positions[:, 1:]
+        if not start.shape[1]:
+            continue
+
+        mids = ((start + end) / 2).reshape(-1, 2)
+        deltas = (end - start).reshape(-1, 2)
+        lengths = np.hypot(deltas[:, 0], deltas[:, 1]) / 100
+        angles = np.degrees(np.arctan2(deltas[:, 1], deltas[:, 0]))
+
+        # Two rails per segment: top (150) then bottom (50)
+        segment_rows = np.empty((len(mids), 2, 9))
+        segment_rows[:, :, 0:2] = mids[:, None, :]
+        segment_rows[:, 0, 2] = 150
+        segment_rows[:, 1, 2] = 50
+        segment_rows[:, :, 3] = 0
+        segment_rows[:, :, 4] = angles[:, None]
+        segment_rows[:, :, 5] = 0
+        segment_rows[:, :, 6] = lengths[:, None]
+        segment_rows[:, :, 7] = 0.05
+        segment_rows[:, :, 8] = 0.1
+
+        groups.append((np.repeat(ids, 2 * start.shape[1]), segment_rows.reshape(-1, 9)))
+
+    rows, paddock_ids = concat_by_paddock(groups)
+    return TransformBatch(MESH_CUBE, '/Game/Farm/Materials/M_Wood', rows, {'paddock': paddock_ids}, ['Fence'])
+
+def draw_hedges(rng, num_trees):
+    """Edge, position along the edge and yaw for one paddock's hedge trees"""
+    edges = rng.integers(0, 4, size=num_trees)
+    along = rng.uniform(-0.5, 0.5, size=num_trees)
+    yaw = rng.uniform(0, 360, size=num_trees)
+    return edges, along, yaw
+
+def plan_hedges_l2(paddocks, hedge_density, seed):
+    """Hedge trees at random points along each paddock edge
+
+    Every paddock draws from its own 'hedges' stream, so a paddock's trees
+    depend only on the seed and its index, not on the other paddocks.
+    """
+    indices, centers, sizes = paddock_arrays(paddocks)
+    num_trees = int(hedge_density * 2)
+
+    # Edge 0 north, 1 south, 2 east, 3 west
+    edges = np.zeros((len(indices), num_trees), dtype=np.int64)
+    along = np.zeros((len(indices), num_trees))
+    yaw = np.zeros((len(indices), num_trees))
+    for row, index in enumerate(indices.tolist()):
+        edges[row], along[row], yaw[row] = draw_hedges(rng_streams.stream(seed, 'hedges', index), num_trees)
+
+    width = sizes[:, 0:1]
+    height = sizes[:, 1:2]
+    offset_x = np.where(edges < 2, along * width, np.where(edges == 2, width / 2, -width / 2))
+    offset_y = np.where(edges >= 2, along * height, np.where(edges == 0, height / 2, -height / 2))
+
+    locations = np.column_stack([
+        (centers[:, 0:1] + offset_x).ravel(),
+        (centers[:, 1:2] + offset_y).ravel(),
+        np.full(offset_x.size, 250.0)
+    ])
+    rotations = np.column_stack([np.zeros(yaw.size), yaw.ravel(), np.zeros(yaw.size)])
+    rows = transform_rows(locations, rotations, scale=(2, 2, 5))
+
+    return TransformBatch(MESH_CONE, '/Game/Farm/Materials/M_Hedge', rows,
+                          {'paddock': np.repeat(indices, num_trees)}, ['Hedge'])
+
+def hedge_offsets_l1(width, height, hedge_density):
+    """Corner trees plus evenly spaced trees on the left and right edges"""
+    corners = np.array([
+        (-width/2, -height/2),
+        (width/2, -height/2),
+        (-width/2, height/2),
+        (width/2, height/2),
+    ])
+
+    t = (np.arange(int(hedge_density)) + 1) / (hedge_density + 1)
+    sides = np.empty((len(t), 2, 2))
+    sides[:, 0, 0] = -width/2
+    sides[:, 1, 0] = width/2
+    sides[:, :, 1] = (-height/2 + t * height)[:, None]
+
+    return np.concatenate([corners, sides.reshape(-1, 2)])
+
+def plan_hedges_l1(paddocks, hedge_density):
+    """Hedge trees at paddock corners and evenly along the side edges"""
+    groups = []
+
+    for ids, positions in tile_paddocks(paddocks, lambda w, h: hedge_offsets_l1(w, h, hedge_density)):
+        flat = positions.reshape(-1, 2)
+        rows = transform_rows(np.column_stack([flat, np.full(len(flat), 250.0)]), scale=(2, 2, 5))
+        groups.append((np.repeat(ids, positions.shape[1]), rows))
+
+    rows, paddock_ids = concat_by_paddock(groups)
+    return TransformBatch(MESH_CONE, '/Game/Farm/Materials/M_Hedge', rows, {'paddock': paddock_ids}, ['Hedge'])
+
+def plan_lane(lane_points, width, material):
+    """Road segments between consecutive lane points"""
+    rows = []
+
+    for i in range(len(lane_points) - 1):
+        p1 = lane_points[i]
+        p2 = lane_points[i + 1]
+
+        mid_x = (p1[0] + p2[0]) / 2 * 100
+        mid_y = (p1[1] + p2[1]) / 2 * 100
+
+        dx = (p2[0] - p1[0]) * 100
+        dy = (p2[1] - p1[1]) * 100
+        length = math.sqrt(dx*dx + dy*dy) / 100
+        angle = math.degrees(math.atan2(dy, dx))
+
+        rows.append(transform_row((mid_x, mid_y, 5), (0, angle, 0), (length, width, 0.1)))
+
+    return TransformBatch(MESH_CUBE, material, rows)
+
+def plan_buildings_l2(yard_buildings):
+    """Yard buildings for L2, one single-row batch per building part"""
+    batches = []
+
+    if 'dairy_shed' in yard_buildings:
+        shed = yard_buildings['dairy_shed']
+        batches.append(TransformBatch(MESH_CUBE, '/Game/Farm/Materials/M_Concrete', [transform_row(
+            (shed['position'][0] * 100, shed['position'][1] * 100, shed['size'][2] * 50),
+            scale=(shed['size'][0]/10, shed['size'][1]/10, shed['size'][2]/10))]))
+        batches.append(TransformBatch(MESH_CUBE, '/Game/Farm/Materials/M_Shed_Roof', [transform_row(
+            (shed['position'][0] * 100, shed['position'][1] * 100, shed['size'][2] * 100 + 50),
+            scale=(shed['size'][0]/10 + 0.2, shed['size'][1]/10 + 0.2, 0.1))]))
+
+    if 'milking_parlour' in yard_buildings:
+        parlour = yard_buildings['milking_parlour']
+        batches.append(TransformBatch(MESH_CUBE, '/Game/Farm/Materials/M_Concrete', [transform_row(
+            (parlour['position'][0] * 100, parlour['position'][1] * 100, parlour['size'][2] * 50),
+            scale=(parlour['size'][0]/10, parlour['size'][1]/10, parlour['size'][2]/10))]))
+
+    if 'slurry_tank' in yard_buildings:
+        tank = yard_buildings['slurry_tank']
+        batches.append(TransformBatch(MESH_CYLINDER, '/Game/Farm/Materials/M_Slurry', [transform_row(
+            (tank['position'][0] * 100, tank['position'][1] * 100, tank['height'] * 50),
+            scale=(tank['radius']/5, tank['radius']/5, tank['height']/10))]))
+
+    return batches
+
+def plan_buildings_l1(yard_buildings, yard_origin):
+    """Yard buildings for L1, one single-row batch per building part"""
+    batches = []
+
+    # Dairy shed position is used as-is, the other buildings are in metres
+    if 'dairy_shed' in yard_buildings:
+        shed = yard_buildings['dairy_shed']
+        batches.append(TransformBatch(MESH_CUBE, '/Game/Farm/Materials/M_Concrete', [transform_row(
+            (yard_origin[0] + shed['position'][0], yard_origin[1] + shed['position'][1], shed['size'][2] * 50),
+            scale=(shed['size'][0]/10, shed['size'][1]/10, shed['size'][2]/10))]))
+        batches.append(TransformBatch(MESH_CUBE, '/Game/Farm/Materials/M_Roof', [transform_row(
+            (yard_origin[0] + shed['position'][0], yard_origin[1] + shed['position'][1], shed['size'][2] * 100 + 50),
+            scale=(shed['size'][0]/10 + 0.2, shed['size'][1]/10 + 0.2, 0.1))]))
+
+    if 'milking_parlour' in yard_buildings:
+        parlour = yard_buildings['milking_parlour']
+        batches.append(TransformBatch(MESH_CUBE, '/Game/Farm/Materials/M_Concrete', [transform_row(
+            (yard_origin[0] + parlour['position'][0] * 100, yard_origin[1] + parlour['position'][1] * 100,
+             parlour['size'][2] * 50),
+            scale=(parlour['size'][0]/10, parlour['size'][1]/10, parlour['size'][2]/10))]))
+
+    if 'slurry_tank' in yard_buildings:
+        tank = yard_buildings['slurry_tank']
+        batches.append(TransformBatch(MESH_CYLINDER, '/Game/Farm/Materials/M_Slurry', [transform_row(
+            (yard_origin[0] + tank['position'][0] * 100, yard_origin[1] + tank['position'][1] * 100,
+             tank['height'] * 50),
+            scale=(tank['radius']/5, tank['radius']/5, tank['height']/10))]))
+
+    if 'feed_bunk' in yard_buildings:
+        bunk = yard_buildings['feed_bunk']
+        batches.append(TransformBatch(MESH_CUBE, '/Game/Farm/Materials/M_Wood', [transform_row(
+            (yard_origin[0] + bunk['position'][0] * 100, yard_origin[1] + bunk['position'][1] * 100,
+             bunk['size'][2] * 50),
+            scale=(bunk['size'][0]/10, bunk['size'][1]/10, bunk['size'][2]/10))]))
+
+    if 'water_trough' in yard_buildings:
+        trough = yard_buildings['water_trough']
+        rows = [transform_row(
+            (yard_origin[0] + pos[0] * 100, yard_origin[1] + pos[1] * 100, trough['size'][2] * 50),
+            scale=(trough['size'][0]/10, trough['size'][1]/10, trough['size'][2]/10))
+            for pos in trough['positions']]
+        batches.append(TransformBatch(MESH_CUBE, '/Game/Farm/Materials/M_MetalTrough', rows))
+
+    return batches
+
+# Minimum distance between cows in meters, 0 disables Poisson-disk placement
+DEFAULT_COW_SPACING_M = 2.5
+
+def cow_spacing(config):
+    """Minimum cow spacing from the config, in cm"""
+    return config.get('cow_min_spacing_m', DEFAULT_COW_SPACING_M) * 100
+
+# Rotation slot the planners write cow yaw into, per level
+COW_YAW_AXIS = {'L1': 2, 'L2': 1}
+
+def layout_cows(paddock, cow_count, rng, yaw_axis=1, lying_chance=0.1, margin=500, min_spacing=0):
+    """Random cow rows and attributes inside a paddock, 5m from the fence
+
+    rng is a numpy Generator, normally the paddock's stream from
+    rng_streams; every attribute is drawn as one batch. With min_spacing
+    (cm) positions come from a Poisson-disk sample, so no two cows are
+    closer than that unless the paddock is too crowded to allow it.
+    """
+    center_x, center_y = paddock['center']
+    width, height = paddock['size']
+    inner_width = width - 2 * margin
+    inner_height = height - 2 * margin
+
+    if min_spacing > 0:
+        points, spacing = poisson_disk.sample_points(inner_width, inner_height, cow_count, min_spacing, rng)
+        if spacing < min_spacing:
+            print(f"Warning: paddock {paddock['index']} too small for {cow_count} cows "
+                  f"{min_spacing / 100:g}m apart, spacing relaxed to {spacing / 100:.2f}m")
+        x = center_x - inner_width / 2 + points[:, 0]
+        y = center_y - inner_height / 2 + points[:, 1]
+    else:
+        x = center_x + rng.uniform(-width/2 + margin, width/2 - margin, size=cow_count)
+        y = center_y + rng.uniform(-height/2 + margin, height/2 - margin, size=cow_count)
+    yaw = rng.uniform(0, 360, size=cow_count)
+    coats = rng.integers(0, len(COW_MATERIALS), size=cow_count)
+    lying = rng.random(cow_count) < lying_chance
+
+    rotations = np.zeros((cow_count, 3))
+    rotations[:, yaw_axis] = yaw
+    rows = transform_rows(np.column_stack([x, y, np.full(cow_count, 75.0)]), rotations, (0.8, 0.8, 1.5))
+
+    return rows, coats.tolist(), lying.tolist()
+
+def cow_stream(seed, paddock_index, active_paddock=None):
+    """RNG stream for a paddock's cows; stragglers have their own category"""
+    category = 'cows' if active_paddock is None or paddock_index == active_paddock else 'stragglers'
+    return rng_streams.stream(seed, category, paddock_index)
+
+def cow_batch(rows, coats, lying, paddock_ids, tags):
+    """Wrap planned cow rows into a batch"""
+    return TransformBatch(MESH_CYLINDER, None, rows,
+                          {'paddock': paddock_ids, 'coat': coats, 'lying': lying}, tags)
+
+def herd_distribution(cow_count, active_paddock):
+    """95% of the herd in the active paddock, stragglers in the previous one"""
+    active_cows = int(cow_count * 0.95)
+    straggler_cows = cow_count - active_cows
+
+    counts = {active_paddock: active_cows}
+    if active_paddock > 0 and straggler_cows > 0:
+        counts[active_paddock - 1] = straggler_cows
+    return counts
+
+def plan_cows_l2(paddocks, paddock_counts, seed, active_paddock=None, min_spacing=0):
+    """Cow rows for the L2 herd given a {paddock_index: count} distribution"""
+    rows, coats, lying, paddock_ids = [], [], [], []
+
+    for paddock_index, count in paddock_counts.items():
+        if paddock_index >= len(paddocks):
+            continue
+        rng = cow_stream(seed, paddock_index, active_paddock)
+        r, c, l = layout_cows(paddocks[paddock_index], count, rng, min_spacing=min_spacing)
+        rows += r.tolist()
+        coats += c
+        lying += l
+        paddock_ids += [paddock_index] * len(r)
+
+    return cow_batch(rows, coats, lying, paddock_ids,
+                     ['Cow', 'WanderRadius:2000', 'StepSeconds:2.0', 'MoveSpeed:100'])
+
+# Categories whose rows depend only on their own paddock, in plan order
+PADDOCK_CATEGORIES_L2 = ('ground', 'posts', 'hedges')
+
+def plan_paddock_batches_l2(paddocks, config):
+    """Paddock-local L2 categories for a list of paddocks
+
+    Every row depends only on the config and its own paddock, so any
+    contiguous slice of the paddock list can be planned on its own.
+    """
+    spacing = config.get('fence_post_spacing_m', 4.0) * 100
+    return {
+        'ground': plan_ground(paddocks),
+        'posts': plan_posts(paddocks, spacing, fence_post_offsets_l2),
+        'hedges': plan_hedges_l2(paddocks, config.get('hedge_density_per_100m', 6), config.get('seed', 42))
+    }
+
+def chunk_paddocks(paddocks, chunks):
+    """Split the paddock list into contiguous, nearly equal slices"""
+    bounds = np.linspace(0, len(paddocks), chunks + 1).astype(int)
+    return [paddocks[start:stop] for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+def _plan_chunk(args):
+    """Worker entry point: plan one paddock slice"""
+    paddocks, config = args
+    return plan_paddock_batches_l2(paddocks, config)
+
+def in_editor():
+    """True when running inside the editor's embedded interpreter"""
+    return 'unreal' in sys.modules
+
+def plan_paddocks_parallel(paddocks, config, workers):
+    """Plan paddock-local categories across a process pool
+
+    Slices are contiguous and merged in slice order, so the result matches
+    the serial plan exactly whatever the worker count.
+    """
+    context = multiprocessing.get_context('spawn')
+
+    # A few slices per worker keeps the pool busy when slices finish unevenly
+    slices = chunk_paddocks(paddocks, workers * 4)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        results = list(pool.map(_plan_chunk, [(chunk, config) for chunk in slices]))
+
+    merged = {}
+    for category in PADDOCK_CATEGORIES_L2:
+        batches = [result[category] for result in results if len(result[category])]
+        merged[category] = concat_batches(batches) if batches else results[0][category]
+    return merged
+
+def plan_farm_l2(config, grazing_state=None, workers=None):
+    """Plan the complete L2 farm
+
+    Paddock categories are planned serially unless workers (default:
+    config 'planner_workers', 0) is above 1. Inside the editor planning is
+    always serial: spawned workers re-import the entry script, which
+    imports unreal. config is a farm_config.FarmConfig (wrap plain dicts
+    with farm_config.as_config), whose memoized layout and herd are reused.
+    """
+    grazing_state = grazing_state or {}
+    seed = config.seed
+    workers = config.get('planner_workers', 0) if workers is None else workers
+    if workers > 1 and in_editor():
+        print("planner_workers ignored inside the editor, planning serially")
+        workers = 0
+
+    paddocks = config.paddock_layout
+
+    plan = FarmPlan('/Game/Farm/Maps/DairyFarm_L2', paddocks)
+
+    # Paddocks sublevel
+    if workers > 1 and len(paddocks) > 1:
+        paddock_batches = plan_paddocks_parallel(paddocks, config, workers)
+    else:
+        paddock_batches = plan_paddock_batches_l2(paddocks, config)
+    for category in PADDOCK_CATEGORIES_L2:
+        plan.add(category, paddock_batches[category])
+
+    # Yard sublevel
+    for batch in plan_buildings_l2(config.get('yard_buildings', {})):
+        plan.add('buildings', batch)
+    plan.add('lane', plan_lane(config.get('lane_points', []), 5, '/Game/Farm/Materials/M_Gravel_Lane'))
+
+    # Animals sublevel
+    active_paddock = grazing_state.get('active_paddock_index', 0)
+    counts = config.herd_distribution(active_paddock)
+    plan.add('cows', plan_cows_l2(paddocks, counts, seed, active_paddock, cow_spacing(config)))
+
+    return plan
+
+def plan_farm_l1(config):
+    """Plan the complete L1 farm from a farm_config.FarmConfig"""
+    paddocks = config.paddock_layout
+    spacing = config.get('fence_post_spacing_m', 4.0) * 100
+
+    plan = FarmPlan('/Game/Farm/Maps/DairyFarm_L1', paddocks)
+
+    for batch in plan_buildings_l1(config.get('yard_buildings', {}), config.get('yard_origin', [0, 0, 0])):
+        plan.add('buildings', batch)
+
+    plan.add('ground', plan_ground(paddocks))
+    plan.add('posts', plan_posts(paddocks, spacing, fence_post_offsets_l1))
+    plan.add('rails', plan_rails(paddocks, spacing))
+    plan.add('hedges', plan_hedges_l1(paddocks, config.get('hedge_density_per_100m', 6)))
+    plan.add('lane', plan_lane(config.get('lane_points', []), 4, '/Game/Farm/Materials/M_DirtRoad'))
+
+    # Cows are spread evenly, L1 has no lying cows and yaws on the third axis
+    seed = config.seed
+    cows_per_paddock = config.cow_count // len(paddocks) if paddocks else 0
+    rows, coats, lying, paddock_ids = [], [], [], []
+    for p in paddocks:
+        rng = cow_stream(seed, p['index'])
+        r, c, l = layout_cows(p, cows_per_paddock, rng, yaw_axis=COW_YAW_AXIS['L1'], lying_chance=0,
+                              min_spacing=cow_spacing(config))
+        rows += r.tolist()
+        coats += c
+        lying += l
+        paddock_ids += [p['index']] * len(r)
+    plan.add('cows', cow_batch(rows, coats, lying, paddock_ids, ['Cow']))
+
+    return plan
+
+def main():
+    """Plan the L2 farm from the on-disk config and print instance counts"""
+    # Only the command line entry point reads files; farm_config imports this module
+    import farm_config
+    import grazing_store
+    config = farm_config.load(farm_config.L2_CONFIG, {})
+    grazing_state = grazing_store.open_store(farm_config.data_dir()).current()
+
+    plan = plan_farm_l2(config, grazing_state)
+
+    print(f"Plan for {plan.level}: {len(plan.paddocks)} paddocks")
+    for category, count in plan.summary().items():
+        print(f"  {category}: {count}")
+
+    return plan
+
+if __name__ == '__main__':
+    main()
@@ -3,69 +3,293 @@ Dairy Farm Simulation
 Adds simple wandering behavior to cows and time-of-day control
 """
 import unreal
-import random
-import math
-
-def add_cow_wander_blueprint():
-    """Create a simple Blueprint for cow wandering behavior"""
+import os
+import sys
+
+import numpy as np
+
+# Make sibling helper modules importable when run via -ExecutePythonScript
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import actor_registry
+import cow_herd
+import farm_config
+import farm_plan
+import grazing_store
+import herd_engine
+import herd_state
+
+# Cow actors by CowId, and (herd component, engine rows) per instanced herd
+# with its last written (coat, lying, paddock), resolved once per engine
+_engine_actors = {}
+_engine_herds = []
+_engine_custom_data = []
+_engine_level = {'yaw_axis': farm_plan.COW_YAW_AXIS['L2']}
+
+def get_herd_state_path():
+    """Location of the saved herd simulation state"""
+    return unreal.Paths.project_saved_dir() + 'Farm/HerdState.npz'
+
+def level_config():
+    """Farm config of the open level: farm_config.json for DairyFarm_L1, farm_config_v2.json otherwise"""
+    world = unreal.EditorLevelLibrary.get_editor_world()
+    path = world.get_path_name() if world else ''
+    return farm_config.load(farm_config.L1_CONFIG if 'DairyFarm_L1' in path else farm_config.L2_CONFIG)
+
+def paddock_at(paddocks, x, y):
+    """Index of the paddock holding a point, or of the nearest paddock center"""
+    indices, centers, sizes = farm_plan.paddock_arrays(paddocks)
+    offset = np.abs(centers - (x, y))
+    inside = np.flatnonzero((offset <= sizes / 2).all(axis=1))
+    if len(inside):
+        return int(indices[inside[0]])
+    return int(indices[np.argmin((offset ** 2).sum(axis=1))])
+
+def yaw_rotation(yaw, yaw_axis):
+    """Rotator arguments with yaw in the level's yaw slot"""
+    rotation = [0, 0, 0]
+    rotation[yaw_axis] = yaw
+    return tuple(rotation)
+
+def find_cow_actors():
+    """Actor cows keyed by their CowId tag"""
+    actors = {}
+    for cow in actor_registry.find_by_tag('Cow'):
+        cow_id = herd_state.cow_id_from_tags(cow.tags)
+        if cow_id is not None:
+            actors[cow_id] = cow
+    return actors
+
+def find_instanced_cows(first_id):
+    """Instanced cows as (cow id, paddock, herd component, cow record)
+
+    Instances carry no tags, so ids are handed out from first_id in paddock
+    and instance order; the same level always gives the same ids.
+    """
+    cows = []
+    for paddock, actor in sorted(cow_herd.find_herd_actors().items()):
+        component = cow_herd.get_herd_component(actor)
+        if not component:
+            continue
+        for cow in cow_herd.read_herd(component):
+            cows.append((first_id + len(cows), paddock, component, cow))
+    return cows
+
+def group_herds(herd, instanced_cows):
+    """(herd component, herd rows in instance order) per instanced herd"""
+    herds = {}
+    for cow_id, paddock, component, cow in instanced_cows:
+        herds.setdefault(paddock, (component, []))[1].append(herd.index_of(cow_id))
+
+    groups = []
+    for paddock, (component, rows) in sorted(herds.items()):
+        if None in rows:
+            print(f"Warning: herd state has no row for some cows of paddock {paddock}, skipping its herd")
+            continue
+        groups.append((component, np.asarray(rows, dtype=np.int64)))
+    return groups
+
+def push_herds(groups, positions, yaws, lying, changed=None, yaw_axis=1):
+    """Move instanced herds with one batch transform update per herd component
+
+    positions, yaws and lying are indexed by herd row; with a changed mask
+    only herds holding a changed row are rewritten.
+    """
+    for component, rows in groups:
+        if changed is not None and not changed[rows].any():
+            continue
+        cow_herd.move_herd(component, [
+            {'x': position[0], 'y': position[1], 'rotation': yaw_rotation(yaw, yaw_axis), 'lying': is_lying}
+            for position, yaw, is_lying in zip(positions[rows].tolist(), yaws[rows].tolist(), lying[rows].tolist())
+        ])
+
+def add_cow_wander_blueprint(export_tags=False):
+    """Seed the herd simulation state store from the cows in the level"""
     print("Adding cow wandering behavior...")
 
     # Get all actors tagged as 'Cow'
-    all_actors = unreal.EditorLevelLibrary.get_all_level_actors()
-    cow_actors = [actor for actor in all_actors if 'Cow' in actor.tags]
-
-    print(f"Found {len(cow_actors)} cows to animate")
+    cow_actors = actor_registry.find_by_tag('Cow')
+
+    # Give every cow a stable id, keeping ids assigned by an earlier run
+    known_ids = [herd_state.cow_id_from_tags(cow.tags) for cow in cow_actors]
+    next_id = max([cow_id for cow_id in known_ids if cow_id is not None], default=-1) + 1
+
+    ids = []
+    positions = []
+    radii = []
+    states = []
+    for cow, cow_id in zip(cow_actors, known_ids):
+        if cow_id is None:
+            cow_id = next_id
+            next_id += 1
+            actor_registry.set_tags(cow, list(cow.tags) + [f"{herd_state.COW_ID_TAG}{cow_id}"])
 
-    # For each cow, add simple movement metadata
-    # Since we can't easily create Blueprint from Python, we'll use actor metadata
-    for cow in cow_actors:
-        # Store initial position
         location = cow.get_actor_location()
-
-        # Set custom properties using actor tags
-        cow.tags.append(f"HomeX:{location.x}")
-        cow.tags.append(f"HomeY:{location.y}")
-        cow.tags.append(f"WanderRadius:2000")  # 20m wander radius
-
-        # Random initial target
-        angle = random.uniform(0, 2 * math.pi)
-        radius = random.uniform(0, 2000)
-        target_x = location.x + radius * math.cos(angle)
-        target_y = location.y + radius * math.sin(angle)
-
-        cow.tags.append(f"TargetX:{target_x}")
-        cow.tags.append(f"TargetY:{target_y}")
-
-    print("Cow wandering metadata added")
+        ids.append(cow_id)
+        positions.append((location.x, location.y, location.z))
+        radii.append(herd_state.tag_value(cow.tags, 'WanderRadius:', herd_state.DEFAULT_WANDER_RADIUS))
+        states.append(herd_state.STATE_LYING if 'State:Lying' in cow.tags else herd_state.STATE_WANDERING)
+
+    # Instanced herds carry no tags, their cows take the ids after the actor cows
+    instanced_cows = find_instanced_cows(next_id)
+    for cow_id, paddock, component, cow in instanced_cows:
+        ids.append(cow_id)
+        positions.append((cow['x'], cow['y'], cow['z']))
+        radii.append(herd_state.DEFAULT_WANDER_RADIUS)
+        states.append(herd_state.STATE_LYING if cow['lying'] else herd_state.STATE_WANDERING)
+
+    print(f"Found {len(cow_actors)} cow actors and {len(instanced_cows)} instanced cows to animate")
+
+    # Home is the current position, first target is random within the radius
+    state = herd_state.HerdState(ids, positions, radii=radii, states=states)
+    state.retarget(slice(None), np.random.default_rng())
+    state.save(get_herd_state_path())
+
+    # Tags are only an export format now, the simulation reads the store
+    if export_tags:
+        for row, cow in enumerate(cow_actors):
+            keep = [tag for tag in cow.tags if not str(tag).startswith(
+                ('HomeX:', 'HomeY:', 'TargetX:', 'TargetY:', 'WanderRadius:', herd_state.COW_ID_TAG))]
+            actor_registry.set_tags(cow, keep + state.export_tags(row))
+
+    print(f"Cow wandering state saved for {len(state)} cows")
+    return state
+
+def read_level_cows(config):
+    """Cow records (id, position, yaw, lying, paddock, coat) plus instanced cows from the open level
+
+    Reads actor cows by their tags and instanced herds by instance
+    transform and custom data; an instanced cow is lying when it has the
+    lying scale. Yaw is read from the Rotator slot the level's planner
+    writes it to, and a cow without a Paddock_ tag belongs to the config
+    paddock it stands in. Untagged actor cows and instanced cows take ids
+    after the highest CowId tag.
+    """
+    yaw_axis = farm_plan.COW_YAW_AXIS[config.level]
+    _engine_actors.clear()
+    cow_actors = actor_registry.find_by_tag('Cow')
+    known_ids = [herd_state.cow_id_from_tags(cow.tags) for cow in cow_actors]
+    next_id = max([cow_id for cow_id in known_ids if cow_id is not None], default=-1) + 1
+
+    records = []
+    for cow, cow_id in zip(cow_actors, known_ids):
+        if cow_id is None:
+            cow_id = next_id
+            next_id += 1
+        tags = [str(tag) for tag in cow.tags]
+        location = cow.get_actor_location()
+        paddock = next((int(tag.split('_')[1]) for tag in tags if tag.startswith('Paddock_')), None)
+        if paddock is None:
+            paddock = paddock_at(config.paddock_layout, location.x, location.y)
+        rotation = cow.get_actor_rotation()
+        _engine_actors[cow_id] = cow
+        records.append({'id': cow_id, 'x': location.x, 'y': location.y, 'z': location.z,
+                        'yaw': (rotation.roll, rotation.pitch, rotation.yaw)[yaw_axis],
+                        'lying': 'State:Lying' in tags, 'paddock': paddock})
+
+    instanced_cows = find_instanced_cows(next_id)
+    for cow_id, paddock, component, cow in instanced_cows:
+        records.append({'id': cow_id, 'x': cow['x'], 'y': cow['y'], 'z': cow['z'], 'yaw': cow['rotation'][yaw_axis],
+                        'lying': cow['lying'], 'paddock': paddock, 'coat': cow['coat']})
+    return records, instanced_cows
+
+def herd_custom_data(sample, rows):
+    """(coat, lying, paddock) per instance of one herd, as held in its custom data"""
+    return np.column_stack([sample['coat'][rows], sample['lying'][rows], sample['paddock'][rows]]).astype(np.int64)
+
+def place_engine_herd(engine, config):
+    """Write an engine's herd into the instanced herds once, returning (component, rows) per herd"""
+    sample = engine.sample()
+    rows_by_paddock = {}
+    for row, paddock in enumerate(sample['paddock'].tolist()):
+        rows_by_paddock.setdefault(paddock, []).append(row)
+
+    cows_by_paddock = {
+        paddock: [{'x': sample['position'][row, 0], 'y': sample['position'][row, 1],
+                   'rotation': yaw_rotation(sample['yaw'][row], _engine_level['yaw_axis']),
+                   'coat': int(sample['coat'][row]),
+                   'lying': bool(sample['lying'][row])} for row in rows]
+        for paddock, rows in rows_by_paddock.items()
+    }
+    cow_herd.apply_herd(cows_by_paddock, {index: config.paddock(index)['center'] for index in cows_by_paddock})
+
+    herds = cow_herd.find_herd_actors()
+    return [(cow_herd.get_herd_component(herds[paddock]), np.asarray(rows, dtype=np.int64))
+            for paddock, rows in sorted(rows_by_paddock.items()) if paddock in herds]
+
+def create_herd_engine(source='level', config=None, **options):
+    """Standalone herd engine seeded from the level's cows, or from the planner's placement
+
+    Paddock bounds and cow yaw follow the open level's config (L1 or L2)
+    unless a config is passed.
+    """
+    config = config or level_config()
+    _engine_level['yaw_axis'] = farm_plan.COW_YAW_AXIS[config.level]
+    records, instanced_cows = read_level_cows(config) if source == 'level' else ([], [])
+    if records:
+        print(f"Herd engine seeded from {len(records)} cows in the level")
+        engine = herd_engine.from_records(records, config.paddock_layout, seed=config.seed, **options)
+        _engine_herds[:] = group_herds(engine.state, instanced_cows)
+    else:
+        _engine_actors.clear()
+        grazing_state = grazing_store.open_store(farm_config.data_dir()).current()
+        engine = herd_engine.from_config(config, grazing_state, **options)
+        print(f"Herd engine seeded from the planned placement of {len(engine)} cows")
+        _engine_herds[:] = place_engine_herd(engine, config)
+
+    # Custom data as it stands in the level, so only changes are written
+    sample = engine.sample()
+    _engine_custom_data[:] = [herd_custom_data(sample, rows) for component, rows in _engine_herds]
+    return engine
+
+def push_engine_sample(sample):
+    """Show one engine sample: move actor cows, batch-move instanced herds
+
+    Instanced herds take one transform-only batch update each; custom data
+    is rewritten only for cows whose coat, lying state or paddock changed.
+    """
+    yaw_axis = _engine_level['yaw_axis']
+    if _engine_actors:
+        for cow_id, position, yaw in zip(sample['ids'].tolist(), sample['position'].tolist(),
+                                         sample['yaw'].tolist()):
+            cow = _engine_actors.get(cow_id)
+            if cow:
+                cow.set_actor_location_and_rotation(unreal.Vector(*position),
+                                                    unreal.Rotator(*yaw_rotation(yaw, yaw_axis)), False, False)
+
+    push_herds(_engine_herds, sample['position'], sample['yaw'], sample['lying'], yaw_axis=yaw_axis)
+
+    for (component, rows), written in zip(_engine_herds, _engine_custom_data):
+        current = herd_custom_data(sample, rows)
+        changed = np.flatnonzero((current != written).any(axis=1)).tolist()
+        for index in changed:
+            coat, lying, paddock = current[index].tolist()
+            # Only the final write needs to mark the render state dirty
+            component.set_custom_data(index, cow_herd.cow_custom_data({'coat': coat, 'lying': lying}, paddock),
+                                      index == changed[-1])
+        written[changed] = current[changed]
 
 def create_time_of_day_controller():
     """Create a Blueprint actor for time of day control"""
     print("Creating time of day controller...")
 
     # Find the directional light (sun)
-    sun = None
-    for actor in unreal.EditorLevelLibrary.get_all_level_actors():
-        if isinstance(actor, unreal.DirectionalLight):
-            sun = actor
-            break
+    sun = actor_registry.find_first(unreal.DirectionalLight)
 
     if sun:
         # Tag it for identification
-        sun.tags.append("Sun")
-        sun.tags.append("TimeOfDay:15.5")
+        actor_registry.set_tags(sun, list(sun.tags) + ["Sun", "TimeOfDay:15.5"])
         print("Sun tagged for time control")
 
     # Create a simple actor to control time
-    time_controller = unreal.EditorLevelLibrary.spawn_actor_from_class(
+    time_controller = actor_registry.spawn_actor(
         unreal.Actor,
         unreal.Vector(0, 0, 0),
-        unreal.Rotator(0, 0, 0)
+        unreal.Rotator(0, 0, 0),
+        tags=["TimeController", "CurrentHour:15.5"]
     )
 
     if time_controller:
         time_controller.set_actor_label("TimeOfDayController")
-        time_controller.tags.append("TimeController")
-        time_controller.tags.append("CurrentHour:15.5")
         print("Time controller created")
 
     return time_controller
@@ -78,90 +302,85 @@ def create_level_blueprint_script():
 # This would normally be Blueprint nodes, but we'll use Python execution
 
 import unreal
-import math
-import random
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import farm_simulate
+import herd_sim
+import herd_state
+import tod_utils
+
+HERD_STATE_PATH = unreal.Paths.project_saved_dir() + 'Farm/HerdState.npz'
+
+# Loaded once per editor session, actors are resolved once by CowId tag
+# and instanced cows once per herd component
+_herd = None
+_herd_actors = None
+_herd_groups = None
+_rng = np.random.default_rng()
+_grid = herd_sim.make_grid()
+
+# Standalone fixed-step engine, created on the first tick
+_engine = None
+
+def get_herd():
+    """Load the herd state store and resolve its actors and instanced herds"""
+    global _herd, _herd_actors, _herd_groups
+    if _herd is None:
+        _herd = herd_state.HerdState.load(HERD_STATE_PATH)
+        actors_by_id = farm_simulate.find_cow_actors()
+        _herd_actors = [actors_by_id.get(int(cow_id)) for cow_id in _herd.ids]
+        instanced_cows = farm_simulate.find_instanced_cows(max(actors_by_id, default=-1) + 1)
+        _herd_groups = farm_simulate.group_herds(_herd, instanced_cows)
+    return _herd, _herd_actors, _herd_groups
+
+def save_herd():
+    """Persist the current herd state"""
+    if _herd is not None:
+        _herd.save(HERD_STATE_PATH)
+
+def push_transforms(herd, actors, rows):
+    """Push the final transforms of the given herd rows to their actors"""
+    positions = herd.position[rows].tolist()
+    yaws = herd.yaw[rows].tolist()
+
+    for row, position, yaw in zip(rows.tolist(), positions, yaws):
+        cow = actors[row]
+        if cow:
+            cow.set_actor_location_and_rotation(unreal.Vector(*position), unreal.Rotator(0, yaw, 0), False, False)
 
 def update_cow_positions():
-    """Simple cow wandering update"""
-    all_actors = unreal.EditorLevelLibrary.get_all_level_actors()
-    cow_actors = [actor for actor in all_actors if 'Cow' in actor.tags]
+    """Advance the whole herd one wander step and push moved cows"""
+    herd, actors, groups = get_herd()
 
-    for cow in cow_actors:
-        location = cow.get_actor_location()
+    # One vectorized step: move, detect arrivals, resample their targets,
+    # then push overlapping cows apart using the spatial hash grid
+    moved = herd_sim.step_wander(herd, _rng, grid=_grid)
+    push_transforms(herd, actors, np.flatnonzero(moved))
+
+    # Instanced herds take one batch transform update per herd component
+    farm_simulate.push_herds(groups, herd.position, herd.yaw, herd.state == herd_state.STATE_LYING, moved)
 
-        # Parse tags to get wander data
-        home_x = home_y = target_x = target_y = wander_radius = 0
-
-        for tag in cow.tags:
-            if tag.startswith("HomeX:"):
-                home_x = float(tag.split(":")[1])
-            elif tag.startswith("HomeY:"):
-                home_y = float(tag.split(":")[1])
-            elif tag.startswith("TargetX:"):
-                target_x = float(tag.split(":")[1])
-            elif tag.startswith("TargetY:"):
-                target_y = float(tag.split(":")[1])
-            elif tag.startswith("WanderRadius:"):
-                wander_radius = float(tag.split(":")[1])
-
-        # Move towards target
-        dx = target_x - location.x
-        dy = target_y - location.y
-        distance = math.sqrt(dx*dx + dy*dy)
-
-        if distance > 50:  # If not at target
-            # Move 50cm towards target
-            move_x = (dx / distance) * 50
-            move_y = (dy / distance) * 50
-
-            new_location = unreal.Vector(
-                location.x + move_x,
-                location.y + move_y,
-                location.z
-            )
-            cow.set_actor_location(new_location, False, False)
-
-            # Rotate to face direction
-            rotation = math.degrees(math.atan2(dy, dx))
-            cow.set_actor_rotation(unreal.Rotator(0, rotation, 0), False)
-        else:
-            # Pick new target
-            angle = random.uniform(0, 2 * math.pi)
-            radius = random.uniform(0, wander_radius)
-            new_target_x = home_x + radius * math.cos(angle)
-            new_target_y = home_y + radius * math.sin(angle)
-
-            # Update tags
-            new_tags = []
-            for tag in cow.tags:
-                if tag.startswith("TargetX:"):
-                    new_tags.append(f"TargetX:{new_target_x}")
-                elif tag.startswith("TargetY:"):
-                    new_tags.append(f"TargetY:{new_target_y}")
-                else:
-                    new_tags.append(tag)
-            cow.tags = new_tags
+def tick_herd(delta_seconds):
+    """Advance the herd engine by a frame's seconds and show its sample"""
+    global _engine
+    if _engine is None:
+        _engine = farm_simulate.create_herd_engine()
+    if _engine.advance(delta_seconds):
+        farm_simulate.push_engine_sample(_engine.sample())
 
 def update_time_of_day(hours):
     """Update sun rotation based on time"""
-    for actor in unreal.EditorLevelLibrary.get_all_level_actors():
-        if isinstance(actor, unreal.DirectionalLight) and "Sun" in actor.tags:
-            # Calculate sun angle
-            sun_angle = (hours - 6) * 15
-            pitch = -sun_angle if sun_angle < 180 else -sun_angle + 360
-
-            actor.set_actor_rotation(unreal.Rotator(pitch, 45, 0), False)
-
-            # Update sky light
-            for sky in unreal.EditorLevelLibrary.get_all_level_actors():
-                if isinstance(sky, unreal.SkyLight):
-                    sky_component = sky.get_component_by_class(unreal.SkyLightComponent)
-                    if sky_component:
-                        sky_component.recapture_sky()
-            break
+    # Solar table lookup with throttled sky recapture, shared with tod_utils
+    tod_utils.get_controller().set_time(hours)
 
 # Example usage - would be called on tick or timer
 # update_cow_positions()
+# tick_herd(delta_seconds)
+# save_herd()
 # update_time_of_day(15.5)
 '''
 
@@ -199,7 +418,7 @@ def main():
     # Make sure we have the level loaded
     level_name = '/Game/Farm/Maps/DairyFarm_L1'
     if unreal.EditorAssetLibrary.does_asset_exist(level_name):
-        unreal.EditorLevelLibrary.load_level(level_name)
+        actor_registry.load_level(level_name)
     else:
         print(f"Warning: Level {level_name} not found. Run farm_generate.py first!")
         return
@@ -0,0 +1,183 @@
+"""
+Grazing Simulation
+Fast-forwards rotational grazing over whole seasons from the grazing store
+and farm_config_v2.json without touching the level: steps simulated days,
+rotates the herd every rotation_days and tracks per-paddock occupancy and
+days rested; the cover policy also grows and grazes the pasture model.
+Only the final state is written back. Does not import unreal.
+
+Usage: python Scripts/ue/grazing_sim.py --days 365 [--policy cover] [--save]
+"""
+import argparse
+from datetime import timedelta
+
+import numpy as np
+
+import farm_config
+import grazing_store
+import pasture
+
+def next_sequential(sim):
+    """Next paddock in index order, as rotate_herd() does"""
+    return (sim.active + 1) % sim.paddocks
+
+def next_most_rested(sim):
+    """Paddock rested longest, ties broken by index"""
+    rested = sim.rested.copy()
+    rested[sim.active] = -1
+    return int(np.argmax(rested))
+
+def next_by_cover(sim):
+    """Paddock with the most grass above residual"""
+    return sim.pasture.next_paddock(sim.active)
+
+POLICIES = {
+    'sequential': next_sequential,
+    'most_rested': next_most_rested,
+    'cover': next_by_cover
+}
+
+class GrazingSim:
+    """Herd position and per-paddock counters (NumPy arrays of length paddocks)
+
+    grazed: days occupied, rested: days since last occupied (0 while
+    occupied), max_rested: longest rest seen, visits: times entered.
+    With a Pasture, the herd of cows grazes the active paddock every step.
+    """
+
+    def __init__(self, paddocks, active, start, rotation_days=2, days_in_paddock=0.0, rested=None,
+                 policy=next_sequential, pasture=None, cows=0):
+        self.paddocks = paddocks
+        self.active = active % paddocks
+        self.clock = start
+        self.rotation_days = rotation_days
+        self.days_in_paddock = days_in_paddock
+        self.policy = policy
+        self.pasture = pasture
+        self.cows = cows
+
+        self.grazed = np.zeros(paddocks)
+        self.rested = np.zeros(paddocks) if rested is None else np.asarray(rested, dtype=np.float64).copy()
+        self.rested[self.active] = 0
+        self.max_rested = self.rested.copy()
+        self.visits = np.zeros(paddocks, dtype=np.int64)
+        self.rotations = []
+
+    def step(self, days=1.0):
+        """Advance the clock by days, rotating first when a rotation is due"""
+        if self.days_in_paddock >= self.rotation_days:
+            self.rotate(self.policy(self))
+
+        if self.pasture is not None:
+            self.pasture.step(days, {self.active: self.cows})
+        self.grazed[self.active] += days
+        self.rested += days
+        self.rested[self.active] = 0
+        np.maximum(self.max_rested, self.rested, out=self.max_rested)
+        self.days_in_paddock += days
+        self.clock += timedelta(days=days)
+
+    def rotate(self, paddock):
+        """Move the herd and remember the rotation for the grazing log"""
+        self.rotations.append({'from': self.active, 'to': paddock, 'at': self.clock, 'simulated': True})
+        self.active = paddock
+        self.visits[paddock] += 1
+        self.days_in_paddock = 0.0
+
+    def run(self, days, step_days=1.0):
+        """Step until days have passed"""
+        for _ in range(int(round(days / step_days))):
+            self.step(step_days)
+        return self
+
+    def state(self):
+        """Final state in GrazingState.json form"""
+        rotated = self.clock - timedelta(days=self.days_in_paddock)
+        return {'active_paddock_index': self.active, 'last_rotated_iso': grazing_store.format_time(rotated)}
+
+    def paddock_table(self, cow_count=0):
+        """Per-paddock counters as a list of dicts"""
+        cover = self.pasture.mean_cover() if self.pasture is not None else np.full(self.paddocks, np.nan)
+        return [{
+            'paddock': index,
+            'grazed_days': float(self.grazed[index]),
+            'cow_days': float(self.grazed[index] * cow_count),
+            'rested_days': float(self.rested[index]),
+            'max_rested_days': float(self.max_rested[index]),
+            'visits': int(self.visits[index]),
+            'cover': float(cover[index])
+        } for index in range(self.paddocks)]
+
+def rested_from_history(store, paddocks, start):
+    """Days each paddock has rested at start, from the rotation log (0 when unknown)"""
+    rested = np.zeros(paddocks)
+    start_ts = grazing_store.timestamp(start)
+    for event in store.history(end=start):
+        left = event.get('from')
+        if isinstance(left, int) and 0 <= left < paddocks:
+            rested[left] = (start_ts - event['ts']) / 86400
+    return rested
+
+def from_store(store, config, policy=None):
+    """Simulation starting from the store's current state and the config's paddocks
+
+    policy defaults to the config's rotation_policy. The cover policy
+    continues the saved pasture next to the store, or starts a fresh one.
+    """
+    policy = policy or config.get('rotation_policy', 'sequential')
+    state = store.current()
+    start = grazing_store.parse_time(state['last_rotated_iso'])
+    paddocks = config.paddock_count
+
+    grass = None
+    if policy == 'cover':
+        grass = pasture.load_or_create(config, store.data_dir, clock=start)
+        grass.advance_to(start)
+
+    return GrazingSim(paddocks, state.get('active_paddock_index', 0), start,
+                      rotation_days=config.get('rotation_days', 2),
+                      rested=rested_from_history(store, paddocks, start),
+                      policy=POLICIES[policy], pasture=grass, cows=config.cow_count)
+
+def save(sim, store):
+    """Append the simulated rotations with one fsync, then compact the snapshot"""
+    store.record(sim.rotations)
+    store.compact()
+    if sim.pasture is not None:
+        pasture.save(sim.pasture, store.data_dir)
+    return store.current()
+
+def print_report(sim, cow_count=0):
+    """Print per-paddock occupancy and rest"""
+    print(f"Simulated to {grazing_store.format_time(sim.clock)}: {len(sim.rotations)} rotations, "
+          f"herd in paddock {sim.active}")
+    print(f"  {'paddock':>7} {'grazed d':>9} {'cow-days':>9} {'rested d':>9} {'max rest':>9} {'visits':>7} "
+          f"{'kg DM/ha':>9}")
+    for row in sim.paddock_table(cow_count):
+        print(f"  {row['paddock']:>7} {row['grazed_days']:>9.1f} {row['cow_days']:>9.0f} {row['rested_days']:>9.1f} "
+              f"{row['max_rested_days']:>9.1f} {row['visits']:>7} {row['cover']:>9.0f}")
+
+def simulate(days, policy=None, data_dir=None, save_state=False):
+    """Fast-forward the farm's grazing by days, optionally saving the final state"""
+    config = farm_config.load(farm_config.L2_CONFIG)
+    store = grazing_store.open_store(data_dir or farm_config.data_dir())
+
+    sim = from_store(store, config, policy).run(days)
+    print_report(sim, config.cow_count)
+    if save_state:
+        save(sim, store)
+        print(f"Saved grazing state: paddock {sim.active}")
+    return sim
+
+def main(argv=None):
+    """Run the simulator from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=float, default=365)
+    parser.add_argument('--policy', choices=sorted(POLICIES),
+                        help="Next-paddock rule, defaults to the config's rotation_policy")
+    parser.add_argument('--save', action='store_true', help='Write the final state to GrazingState.json')
+    args = parser.parse_args(argv)
+    return simulate(args.days, args.policy, save_state=args.save)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""
+Grazing Store
+Crash-safe grazing rotation state: every rotation is appended to
+GrazingLog.jsonl (one JSON event per line, fsynced) and GrazingState.json
+is a compacted snapshot of the current state written by atomic rename.
+Loading reads the snapshot and replays only the log past it; rotation
+history is kept in memory and bisected by time for range queries.
+Does not import unreal.
+"""
+import bisect
+import json
+import os
+from datetime import datetime
+
+import farm_config
+
+STATE_FILE = 'GrazingState.json'
+LOG_FILE = 'GrazingLog.jsonl'
+
+# Rewrite the snapshot after this many logged rotations
+COMPACT_EVERY = 64
+
+EPOCH = datetime(1970, 1, 1)
+
+def parse_time(value):
+    """Naive UTC datetime from a datetime or an ISO string ('Z' suffix allowed)"""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = (value - value.utcoffset()).replace(tzinfo=None)
+    return value
+
+def format_time(value):
+    """ISO string with a 'Z' suffix, as stored in GrazingState.json"""
+    return parse_time(value).isoformat() + 'Z'
+
+def timestamp(value):
+    """Seconds since the epoch of a datetime or ISO string"""
+    return (parse_time(value) - EPOCH).total_seconds()
+
+def default_state():
+    """State of a farm that has never rotated"""
+    return {'active_paddock_index': 0, 'last_rotated_iso': format_time(datetime.utcnow())}
+
+def write_atomic(path, data):
+    """Write JSON to a temp file, fsync it and rename it over path"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+class GrazingStore:
+    """Current grazing state plus a time-indexed rotation history for one data folder"""
+
+    def __init__(self, data_dir, compact_every=COMPACT_EVERY):
+        self.data_dir = data_dir
+        self.state_path = os.path.join(data_dir, STATE_FILE)
+        self.log_path = os.path.join(data_dir, LOG_FILE)
+        self.compact_every = compact_every
+        self.reload()
+
+    def reload(self):
+        """Read the snapshot and the whole log, dropping a torn last line"""
+        self._events = []
+        self._times = []
+        self._order = None
+        self._end = 0
+        self._state = None
+        self._snapshot_mtime = self._mtime()
+
+        snapshot = self._read_snapshot()
+        self._read_log(0)
+
+        if snapshot is None:
+            # No usable snapshot: replay the whole log
+            self._state = default_state()
+            log_offset = 0
+        else:
+            self._state = {key: value for key, value in snapshot.items()
+                           if key not in ('rotations', 'log_offset')}
+            # A snapshot without an offset was written by hand (or before the
+            # log existed): it wins over everything already in the log
+            log_offset = snapshot.get('log_offset', self._end)
+        for event in self._events:
+            if event['offset'] >= log_offset:
+                self._apply(event)
+        self._snapshot_seq = sum(1 for event in self._events if event['offset'] < log_offset)
+
+    def _mtime(self):
+        """Snapshot modification time, None when there is no snapshot"""
+        try:
+            return os.stat(self.state_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read_snapshot(self):
+        """Parsed snapshot, None when missing or unreadable"""
+        try:
+            with open(self.state_path, 'r') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Warning: {STATE_FILE} unreadable ({e}), rebuilding state from {LOG_FILE}")
+            return None
+        return snapshot if isinstance(snapshot, dict) else None
+
+    def _read_log(self, start):
+        """Index log events from a byte offset; truncate a partial trailing line"""
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(start)
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        offset = start
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                # Crash during an append: cut it so the next event starts on a clean line
+                print(f"Warning: dropping torn last line of {LOG_FILE}")
+                with open(self.log_path, 'r+b') as f:
+                    f.truncate(offset)
+                break
+            try:
+                event = json.loads(line.decode('utf-8'))
+                event['offset'] = offset
+                self._index(event)
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"Warning: skipping bad {LOG_FILE} entry at byte {offset} ({e})")
+            offset += len(line)
+        self._end = offset
+
+    def _index(self, event):
+        """Add an event to the in-memory history, in log order"""
+        if self._order is not None:
+            rows, times = self._order
+            if times and event['ts'] < times[-1]:
+                # Logged out of time order (e.g. after a simulated run ahead of the clock)
+                self._order = None
+            else:
+                rows.append(len(self._events))
+                times.append(event['ts'])
+        self._times.append(event['ts'])
+        self._events.append(event)
+
+    def _time_order(self):
+        """(event rows, their times) sorted by time, rebuilt only after an out-of-order event"""
+        if self._order is None:
+            rows = sorted(range(len(self._times)), key=self._times.__getitem__)
+            self._order = (rows, [self._times[row] for row in rows])
+        return self._order
+
+    def _apply(self, event):
+        self._state['active_paddock_index'] = event['to']
+        self._state['last_rotated_iso'] = event['at']
+
+    def _sync(self):
+        """Pick up events appended by another process since the last read"""
+        if self._mtime() != self._snapshot_mtime:
+            # Snapshot replaced outside this store (hand edit, another editor session)
+            self.reload()
+            return
+        try:
+            size = os.path.getsize(self.log_path)
+        except OSError:
+            size = 0
+        if size > self._end:
+            count = len(self._events)
+            self._read_log(self._end)
+            for event in self._events[count:]:
+                self._apply(event)
+        elif size < self._end:
+            self.reload()
+
+    def current(self):
+        """Copy of the current state (active_paddock_index, last_rotated_iso)"""
+        self._sync()
+        return dict(self._state)
+
+    def rotate(self, to_paddock, at=None, **details):
+        """Log one rotation and make it the current state"""
+        return self.record([dict(details, to=to_paddock, at=at or datetime.utcnow())])[-1]
+
+    def record(self, rotations):
+        """Append rotations ({'to', 'at', ...}) with one write and one fsync
+
+        Events are durable once this returns; the snapshot is rewritten
+        every compact_every rotations.
+        """
+        self._sync()
+        lines = []
+        events = []
+        previous = self._state['active_paddock_index']
+        seq = len(self._events)
+        for rotation in rotations:
+            seq += 1
+            event = dict(rotation, seq=seq, at=format_time(rotation['at']), ts=timestamp(rotation['at']))
+            event.setdefault('from', previous)
+            previous = event['to']
+            lines.append(json.dumps(event, sort_keys=True, separators=(',', ':')) + '\n')
+            events.append(event)
+        if not events:
+            return events
+
+        os.makedirs(self.data_dir, exist_ok=True)
+        payload = ''.join(lines).encode('utf-8')
+        with open(self.log_path, 'ab') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+        offset = self._end
+        for event, line in zip(events, lines):
+            event['offset'] = offset
+            offset += len(line.encode('utf-8'))
+            self._index(event)
+            self._apply(event)
+        self._end = offset
+
+        if len(self._events) - self._snapshot_seq >= self.compact_every:
+            self.compact()
+        return events
+
+    def compact(self):
+        """Write the current state to GrazingState.json by atomic rename"""
+        self._sync()
+        os.makedirs(self.data_dir, exist_ok=True)
+        write_atomic(self.state_path, dict(self._state, rotations=len(self._events), log_offset=self._end))
+        self._snapshot_seq = len(self._events)
+        self._snapshot_mtime = self._mtime()
+
+    def history(self, start=None, end=None, paddock=None):
+        """Rotations with start <= time < end, oldest first, optionally into one paddock"""
+        self._sync()
+        rows, times = self._time_order()
+        low = 0 if start is None else bisect.bisect_left(times, timestamp(start))
+        high = len(times) if end is None else bisect.bisect_left(times, timestamp(end))
+        events = [self._events[row] for row in rows[low:high]]
+        if paddock is not None:
+            events = [event for event in events if event['to'] == paddock]
+        return [{key: value for key, value in event.items() if key != 'offset'} for event in events]
+
+    def __len__(self):
+        return len(self._events)
+
+# One store per data folder for the editor session
+_stores = {}
+
+def open_store(data_dir):
+    """Cached GrazingStore for a farm data folder"""
+    key = os.path.abspath(data_dir)
+    if key not in _stores:
+        _stores[key] = GrazingStore(data_dir)
+    return _stores[key]
+
+def invalidate():
+    """Forget every open store, e.g. after files were replaced wholesale"""
+    _stores.clear()
+
+def main():
+    """Print the current state and latest rotations of this checkout's farm"""
+    store = GrazingStore(farm_config.data_dir())
+    state = store.current()
+    print(f"Active paddock: {state['active_paddock_index']} (since {state['last_rotated_iso']})")
+    print(f"Logged rotations: {len(store)}")
+    for event in store.history()[-10:]:
+        print(f"  #{event['seq']} {event['at']}: paddock {event['from']} -> {event['to']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Herd Engine
+Fixed-timestep herd simulation that runs outside the editor: wandering,
+lying down and standing up, and paddock fences as hard bounds, for
+thousands of cows per step. Seeded from the planner's cow placement or
+from cow records read off the Animals sublevel; the editor only samples
+positions. Does not import unreal.
+"""
+import math
+
+import numpy as np
+
+import farm_config
+import farm_plan
+import herd_sim
+import herd_state
+import rng_streams
+
+# Simulated seconds per step
+DT = 0.5
+
+# Walking speed (the MoveSpeed:100 cow tag) in cm/s
+MOVE_SPEED = 100.0
+
+# Mean seconds a cow stays standing before lying down, and lying before standing up
+MEAN_STANDING_S = 1800.0
+MEAN_LYING_S = 2400.0
+
+# Cows and their targets stay this far inside the paddock fence (cm)
+FENCE_MARGIN = 100.0
+
+# Most steps advance() catches up in one call; a stalled editor drops the rest
+MAX_CATCHUP_STEPS = 20
+
+class HerdEngine:
+    """HerdState plus per-cow paddock bounds, coat and a fixed-step clock
+
+    Positions from the step before are kept so sample() can interpolate
+    between steps for smooth display at any editor frame rate.
+    """
+
+    def __init__(self, state, paddock_ids, paddocks, coats=None, dt=DT, seed=42, speed=MOVE_SPEED,
+                 separation=True):
+        self.state = state
+        self.paddock = np.asarray(paddock_ids, dtype=np.int64).reshape(len(state))
+        self.coat = (np.zeros(len(state), dtype=np.int64) if coats is None
+                     else np.asarray(coats, dtype=np.int64).reshape(len(state)))
+        self.dt = dt
+        self.speed = speed
+        self.rng = rng_streams.stream(seed, 'herd_engine')
+        self.grid = herd_sim.make_grid() if separation else None
+
+        # Fence bounds per cow, from its paddock's center and size
+        indices, centers, sizes = farm_plan.paddock_arrays(paddocks)
+        lookup = np.full(max(indices.max(initial=-1), self.paddock.max(initial=-1)) + 1, -1, dtype=np.int64)
+        lookup[indices] = np.arange(len(indices))
+        rows = lookup[self.paddock]
+        if (rows < 0).any():
+            raise ValueError(f"cows in unknown paddocks {sorted(set(self.paddock[rows < 0].tolist()))}")
+        half = np.maximum(sizes[rows] / 2 - FENCE_MARGIN, 0)
+        self.low = centers[rows] - half
+        self.high = centers[rows] + half
+
+        self.clamp(self.state.home)
+        self.clamp(self.state.target)
+        self.clamp(self.state.position[:, :2])
+
+        self.previous = self.state.position.copy()
+        self.accumulator = 0.0
+        self.time = 0.0
+        self.steps = 0
+
+    def __len__(self):
+        return len(self.state)
+
+    def clamp(self, points):
+        """Clip (N, 2) points into each cow's paddock, in place"""
+        np.clip(points, self.low, self.high, out=points)
+
+    def update_postures(self):
+        """Random lying down and standing up, as per-step transition chances"""
+        state = self.state.state
+        lie_chance = 1 - math.exp(-self.dt / MEAN_STANDING_S)
+        stand_chance = 1 - math.exp(-self.dt / MEAN_LYING_S)
+
+        draw = self.rng.random(len(state))
+        lying = state == herd_state.STATE_LYING
+        state[~lying & (draw < lie_chance)] = herd_state.STATE_LYING
+        state[lying & (draw < stand_chance)] = herd_state.STATE_WANDERING
+
+    def step(self):
+        """Advance the herd one fixed step"""
+        self.previous[:] = self.state.position
+        self.update_postures()
+
+        standing = self.state.state == herd_state.STATE_WANDERING
+        step_distance = self.speed * self.dt
+        herd_sim.step_wander(self.state, self.rng, step_distance=step_distance,
+                             arrive_distance=step_distance, active=standing, grid=self.grid)
+
+        # Fences are hard bounds, also for new wander targets and separation pushes
+        self.clamp(self.state.target)
+        self.clamp(self.state.position[:, :2])
+
+        self.steps += 1
+        self.time += self.dt
+
+    def run(self, steps):
+        """Advance a fixed number of steps"""
+        for _ in range(steps):
+            self.step()
+        return self
+
+    def advance(self, seconds):
+        """Step for elapsed wall or game seconds, returns the steps taken"""
+        self.accumulator += seconds
+        steps = int(self.accumulator // self.dt)
+        self.accumulator -= steps * self.dt
+        if steps > MAX_CATCHUP_STEPS:
+            steps = MAX_CATCHUP_STEPS
+            self.accumulator = 0.0
+        self.run(steps)
+        return steps
+
+    def sample(self):
+        """Positions interpolated to the current time, plus yaw, lying, paddock and coat per cow"""
+        alpha = self.accumulator / self.dt
+        position = self.previous + (self.state.position - self.previous) * alpha
+        return {
+            'ids': self.state.ids.copy(),
+            'position': position,
+            'yaw': self.state.yaw.copy(),
+            'lying': self.state.state == herd_state.STATE_LYING,
+            'paddock': self.paddock.copy(),
+            'coat': self.coat.copy()
+        }
+
+def from_batch(batch, paddocks, yaw_axis=1, **options):
+    """Engine seeded from a planned cow batch (farm_plan.plan_cows_l2 / plan_farm_l2 / plan_farm_l1)"""
+    transforms = batch.transforms
+    lying = np.asarray(batch.attributes.get('lying', np.zeros(len(batch))), dtype=bool)
+    state = herd_state.HerdState(
+        np.arange(len(batch)), transforms[:, farm_plan.LOCATION],
+        yaws=transforms[:, farm_plan.ROTATION][:, yaw_axis],
+        states=np.where(lying, herd_state.STATE_LYING, herd_state.STATE_WANDERING)
+    )
+    engine = HerdEngine(state, batch.attributes['paddock'], paddocks, batch.attributes.get('coat'), **options)
+    engine.state.retarget(slice(None), engine.rng)
+    engine.clamp(engine.state.target)
+    return engine
+
+def from_config(config, grazing_state=None, **options):
+    """Engine seeded with the generator's cow placement for an L1 or L2 config and grazing state"""
+    config = farm_config.as_config(config, 'L2')
+    grazing_state = grazing_state or {}
+    paddocks = config.paddock_layout
+    if config.level == 'L1':
+        batch = farm_plan.concat_batches(farm_plan.plan_farm_l1(config).batches['cows'])
+    else:
+        active_paddock = grazing_state.get('active_paddock_index', 0)
+        batch = farm_plan.plan_cows_l2(paddocks, config.herd_distribution(active_paddock), config.seed,
+                                       active_paddock, min_spacing=farm_plan.cow_spacing(config))
+    return from_batch(batch, paddocks, farm_plan.COW_YAW_AXIS[config.level], seed=config.seed, **options)
+
+def from_records(records, paddocks, **options):
+    """Engine seeded from cow records read off the level
+
+    Each record holds id, x, y, z, yaw, lying, paddock and optionally coat.
+    """
+    state = herd_state.HerdState(
+        [record['id'] for record in records],
+        [(record['x'], record['y'], record['z']) for record in records],
+        yaws=[record['yaw'] for record in records],
+        states=[herd_state.STATE_LYING if record['lying'] else herd_state.STATE_WANDERING for record in records]
+    )
+    engine = HerdEngine(state, [record['paddock'] for record in records], paddocks,
+                        [record.get('coat', 0) for record in records], **options)
+    engine.state.retarget(slice(None), engine.rng)
+    engine.clamp(engine.state.target)
+    return engine
+
+def synthetic(cow_count, cows_per_paddock=150, seed=42, **options):
+    """Herd of cow_count spread over as many default-size paddocks as needed, for benchmarks"""
+    paddock_count = max(int(math.ceil(cow_count / cows_per_paddock)), 1)
+    paddocks = farm_plan.paddock_layout({'paddocks': paddock_count}, columns=int(math.ceil(paddock_count ** 0.5)))
+    counts = {index: cow_count // paddock_count + (1 if index < cow_count % paddock_count else 0)
+              for index in range(paddock_count)}
+    batch = farm_plan.plan_cows_l2(paddocks, counts, seed)
+    return from_batch(batch, paddocks, seed=seed, **options)
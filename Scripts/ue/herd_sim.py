@@ -0,0 +1,79 @@
+"""
+Herd Simulation Step
+Vectorized wander update advancing every cow in a HerdState in one call.
+Does not import unreal.
+"""
+import numpy as np
+
+import herd_state
+import spatial_hash
+
+# Matches the original per-cow update: 50cm per step, arrived within 50cm
+STEP_DISTANCE = 50.0
+ARRIVE_DISTANCE = 50.0
+
+# Cows closer than this push each other apart (cylinder placeholders are 80cm wide)
+SEPARATION_RADIUS = 150.0
+SEPARATION_STRENGTH = 0.5
+
+def step_wander(state, rng, step_distance=STEP_DISTANCE, arrive_distance=ARRIVE_DISTANCE, active=None,
+                grid=None, separation_radius=SEPARATION_RADIUS, separation_strength=SEPARATION_STRENGTH):
+    """Advance the whole herd one wander step
+
+    Cows further than arrive_distance from their target move step_distance
+    towards it and face the direction of travel. Cows that arrived get a new
+    random target within their wander radius. active optionally restricts
+    the update to a boolean mask of rows. When a SpatialHashGrid is passed,
+    it is updated with the new positions and cows within separation_radius
+    are pushed apart. Returns the mask of moved cows.
+    """
+    delta = state.target - state.position[:, :2]
+    distance = np.hypot(delta[:, 0], delta[:, 1])
+
+    moving = distance > arrive_distance
+    arrived = ~moving
+    if active is not None:
+        moving &= active
+        arrived &= active
+
+    if moving.any():
+        move_delta = delta[moving]
+        state.position[moving, :2] += move_delta * (step_distance / distance[moving])[:, None]
+        state.yaw[moving] = np.degrees(np.arctan2(move_delta[:, 1], move_delta[:, 0]))
+
+    arrived_rows = np.flatnonzero(arrived)
+    if len(arrived_rows):
+        state.retarget(arrived_rows, rng)
+
+    if grid is not None and separation_radius > 0:
+        moving = moving | apply_separation(state, grid, separation_radius, separation_strength, active)
+
+    return moving
+
+def apply_separation(state, grid, radius, strength, active=None):
+    """Push overlapping cows apart, returns the mask of pushed cows"""
+    grid.update(state.position)
+    push = spatial_hash.separation_forces(grid, radius, strength)
+
+    # Inactive (e.g. lying) cows are obstacles but do not get pushed
+    if active is not None:
+        push[~active] = 0
+
+    pushed = (push != 0).any(axis=1)
+    state.position[:, :2] += push
+    return pushed
+
+def make_grid(separation_radius=SEPARATION_RADIUS):
+    """Spatial hash grid sized for separation queries"""
+    return spatial_hash.SpatialHashGrid(separation_radius)
+
+def random_herd(cow_count, rng, extent=(12000, 8000), radius=2000):
+    """Synthetic herd spread over a paddock-sized area, for benchmarks"""
+    positions = np.column_stack([
+        rng.uniform(0, extent[0], cow_count),
+        rng.uniform(0, extent[1], cow_count),
+        np.full(cow_count, 75.0)
+    ])
+    state = herd_state.HerdState(np.arange(cow_count), positions, radii=radius)
+    state.retarget(slice(None), rng)
+    return state
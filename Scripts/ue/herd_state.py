@@ -0,0 +1,114 @@
+"""
+Herd Simulation State
+Structure-of-arrays store for cow wander state keyed by a stable cow id.
+Does not import unreal: actors are only touched to push final transforms.
+"""
+import math
+import os
+
+import numpy as np
+
+STATE_WANDERING = 0
+STATE_LYING = 1
+
+DEFAULT_WANDER_RADIUS = 2000  # 20m
+
+COW_ID_TAG = 'CowId:'
+
+def cow_id_from_tags(tags):
+    """Return the stable cow id stored in an actor's tags, or None"""
+    for tag in tags:
+        tag = str(tag)
+        if tag.startswith(COW_ID_TAG):
+            return int(tag[len(COW_ID_TAG):])
+    return None
+
+def tag_value(tags, prefix, default=None):
+    """Return the float value of the first 'Prefix:value' tag"""
+    for tag in tags:
+        tag = str(tag)
+        if tag.startswith(prefix):
+            return float(tag[len(prefix):])
+    return default
+
+def sample_targets(homes, radii, rng):
+    """Uniform random points within each cow's wander radius of home"""
+    angles = rng.uniform(0, 2 * math.pi, size=len(homes))
+    distances = rng.uniform(0, 1, size=len(homes)) * radii
+    return homes + np.column_stack([np.cos(angles), np.sin(angles)]) * distances[:, None]
+
+class HerdState:
+    """Per-cow arrays: position (N, 3), home and target (N, 2), radius, yaw and state"""
+
+    def __init__(self, ids, positions, homes=None, targets=None, radii=DEFAULT_WANDER_RADIUS,
+                 yaws=0.0, states=STATE_WANDERING):
+        count = len(ids)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.position = np.asarray(positions, dtype=np.float64).reshape(count, 3).copy()
+        self.home = (self.position[:, :2].copy() if homes is None
+                     else np.asarray(homes, dtype=np.float64).reshape(count, 2).copy())
+        self.target = (self.home.copy() if targets is None
+                       else np.asarray(targets, dtype=np.float64).reshape(count, 2).copy())
+        self.radius = np.broadcast_to(np.asarray(radii, dtype=np.float64), (count,)).copy()
+        self.yaw = np.broadcast_to(np.asarray(yaws, dtype=np.float64), (count,)).copy()
+        self.state = np.broadcast_to(np.asarray(states, dtype=np.int8), (count,)).copy()
+        self._index = {int(cow_id): i for i, cow_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def index_of(self, cow_id):
+        """Row of a cow id, or None when the cow is unknown"""
+        return self._index.get(int(cow_id))
+
+    def retarget(self, rows, rng):
+        """Pick new random wander targets for the given rows"""
+        self.target[rows] = sample_targets(self.home[rows], self.radius[rows], rng)
+
+    def save(self, path):
+        """Write the store to a compressed .npz file"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temp file first so a crash never leaves a half-written store
+        temp_path = path + '.tmp.npz'
+        np.savez_compressed(
+            temp_path,
+            ids=self.ids, position=self.position, home=self.home, target=self.target,
+            radius=self.radius, yaw=self.yaw, state=self.state
+        )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a store written by save()"""
+        with np.load(path) as data:
+            return cls(data['ids'], data['position'], data['home'], data['target'],
+                       data['radius'], data['yaw'], data['state'])
+
+    def export_tags(self, row):
+        """Legacy tag representation of one cow (HomeX:, TargetX:, ...)"""
+        tags = [
+            f"{COW_ID_TAG}{int(self.ids[row])}",
+            f"HomeX:{self.home[row, 0]}",
+            f"HomeY:{self.home[row, 1]}",
+            f"WanderRadius:{self.radius[row]:g}",
+            f"TargetX:{self.target[row, 0]}",
+            f"TargetY:{self.target[row, 1]}"
+        ]
+        if self.state[row] == STATE_LYING:
+            tags.append('State:Lying')
+        return tags
+
+    @classmethod
+    def from_tags(cls, ids, positions, tag_lists):
+        """Build a store from cows carrying the legacy tag format"""
+        positions = np.asarray(positions, dtype=np.float64).reshape(len(ids), 3)
+        homes = [(tag_value(tags, 'HomeX:', p[0]), tag_value(tags, 'HomeY:', p[1]))
+                 for tags, p in zip(tag_lists, positions)]
+        targets = [(tag_value(tags, 'TargetX:', h[0]), tag_value(tags, 'TargetY:', h[1]))
+                   for tags, h in zip(tag_lists, homes)]
+        radii = [tag_value(tags, 'WanderRadius:', DEFAULT_WANDER_RADIUS) for tags in tag_lists]
+        states = [STATE_LYING if 'State:Lying' in [str(t) for t in tags] else STATE_WANDERING
+                  for tags in tag_lists]
+        return cls(ids, positions, homes, targets, radii, 0.0, states)
@@ -0,0 +1,176 @@
+"""
+Paddock HLOD Builder
+Merges each paddock's fences and hedges into one proxy mesh that takes over
+beyond a transition distance, and reports actor and triangle counts
+before and after. Runs from farm_generate_l2.main() or standalone.
+"""
+import unreal
+import os
+import sys
+
+# Make sibling helper modules importable when run via -ExecutePythonScript
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import actor_registry
+import asset_cache
+import farm_config
+import regen_manifest
+
+HLOD_PACKAGE_DIR = '/Game/Farm/HLOD'
+HLOD_TAG = 'HLOD'
+
+# Actors of these tags are folded into the paddock proxy
+SOURCE_TAGS = ('Fence', 'Hedge')
+
+DEFAULT_TRANSITION_M = 250
+
+def load_config_v2():
+    """Load v2 farm configuration"""
+    return farm_config.load(farm_config.L2_CONFIG)
+
+def paddock_of(actor):
+    """Paddock index from an actor's Paddock_<i> tag, or None"""
+    for tag in actor.tags:
+        tag = str(tag)
+        if tag.startswith('Paddock_'):
+            return int(tag.split('_')[1])
+    return None
+
+def collect_sources():
+    """Fence and hedge actors (and instanced fence and hedge hosts) keyed by paddock"""
+    sources = {}
+    for tag in SOURCE_TAGS:
+        for actor in actor_registry.find_by_tag(tag):
+            if HLOD_TAG in actor.tags:
+                continue
+            paddock = paddock_of(actor)
+            if paddock is not None:
+                sources.setdefault(paddock, []).append(actor)
+    return dict(sorted(sources.items()))
+
+def mesh_triangles(mesh, cache):
+    """Triangle count of LOD 0 of a static mesh, cached per mesh"""
+    key = mesh.get_path_name()
+    if key not in cache:
+        cache[key] = mesh.get_num_triangles(0)
+    return cache[key]
+
+def count_triangles(actors, cache=None):
+    """Rendered triangles of the static mesh components of actors, instances included"""
+    cache = {} if cache is None else cache
+    total = 0
+    for actor in actors:
+        for component in actor.get_components_by_class(unreal.StaticMeshComponent):
+            mesh = component.static_mesh
+            if not mesh:
+                continue
+            copies = (component.get_instance_count()
+                      if isinstance(component, unreal.InstancedStaticMeshComponent) else 1)
+            total += mesh_triangles(mesh, cache) * copies
+    return total
+
+def set_draw_distance(actors, max_distance):
+    """Cull the detailed meshes beyond max_distance (cm)"""
+    for actor in actors:
+        for component in actor.get_components_by_class(unreal.StaticMeshComponent):
+            component.set_editor_property('ld_max_draw_distance', max_distance)
+            component.set_editor_property('cached_max_draw_distance', max_distance)
+
+def clear_proxies():
+    """Destroy previous proxy actors and delete their merged mesh assets"""
+    proxies = actor_registry.find_by_tag(HLOD_TAG)
+    actor_registry.destroy_actors(proxies)
+
+    if unreal.EditorAssetLibrary.does_directory_exist(HLOD_PACKAGE_DIR):
+        unreal.EditorAssetLibrary.delete_directory(HLOD_PACKAGE_DIR)
+    asset_cache.invalidate_prefix(HLOD_PACKAGE_DIR)
+
+    return len(proxies)
+
+def split_sources(actors):
+    """(mergeable StaticMeshActors, instanced hosts and other actors kept as they are)
+
+    merge_static_mesh_actors only takes StaticMeshActors. Instanced hosts
+    already draw every post or hedge of a component in one call, so they
+    keep drawing at every distance instead.
+    """
+    mergeable = [actor for actor in actors if isinstance(actor, unreal.StaticMeshActor)]
+    kept = [actor for actor in actors if not isinstance(actor, unreal.StaticMeshActor)]
+    return mergeable, kept
+
+def build_paddock_proxy(paddock_index, actors, transition_distance):
+    """Merge one paddock's fence and hedge StaticMeshActors into a far-distance proxy actor"""
+    options = unreal.MergeStaticMeshActorsOptions()
+    options.base_package_name = f'{HLOD_PACKAGE_DIR}/SM_HLOD_Paddock_{paddock_index}'
+    options.new_actor_label = f'HLOD_Paddock_{paddock_index}'
+    options.destroy_source_actors = False
+    options.spawn_merged_actor = True
+
+    # One material section, so the whole paddock is a single draw call far away
+    settings = options.mesh_merging_settings
+    settings.merge_materials = True
+    settings.generate_light_map_uv = False
+
+    proxy = unreal.EditorLevelLibrary.merge_static_mesh_actors(actors, options)
+    if not proxy:
+        print(f"Warning: could not merge {len(actors)} actors of paddock {paddock_index}")
+        return None
+
+    actor_registry.set_tags(proxy, [HLOD_TAG, f'Paddock_{paddock_index}', regen_manifest.section_tag('Paddocks')])
+
+    # The proxy only draws from the transition distance on, the sources up to it
+    for component in proxy.get_components_by_class(unreal.StaticMeshComponent):
+        component.set_editor_property('min_draw_distance', transition_distance)
+    set_draw_distance(actors, transition_distance)
+
+    return proxy
+
+def build_hlods(config):
+    """Build proxies for every paddock and return before/after counts"""
+    transition_distance = config.get('hlod_transition_distance_m', DEFAULT_TRANSITION_M) * 100
+    print(f"Building paddock HLOD proxies (transition at {transition_distance / 100:g}m)...")
+
+    clear_proxies()
+    sources = collect_sources()
+    cache = {}
+
+    report = {'paddocks': len(sources), 'actors_before': 0, 'triangles_before': 0,
+              'actors_after': 0, 'triangles_after': 0, 'merged': 0, 'kept': 0}
+    for paddock_index, actors in sources.items():
+        report['actors_before'] += len(actors)
+        report['triangles_before'] += count_triangles(actors, cache)
+
+        mergeable, kept = split_sources(actors)
+        proxy = build_paddock_proxy(paddock_index, mergeable, transition_distance) if mergeable else None
+        if proxy:
+            report['merged'] += len(mergeable)
+            report['actors_after'] += 1
+            report['triangles_after'] += count_triangles([proxy], cache)
+        else:
+            # Unmerged paddocks keep drawing their full detail
+            kept = actors
+
+        report['kept'] += len(kept)
+        report['actors_after'] += len(kept)
+        report['triangles_after'] += count_triangles(kept, cache)
+
+    print_report(report)
+    return report
+
+def print_report(report):
+    """Print the before/after counts seen beyond the transition distance"""
+    print(f"HLOD: {report['paddocks']} paddocks, {report['merged']} sources merged, "
+          f"{report['kept']} kept at full detail")
+    print(f"  actors:    {report['actors_before']} -> {report['actors_after']}")
+    print(f"  triangles: {report['triangles_before']} -> {report['triangles_after']}")
+
+def main():
+    """Build paddock HLOD proxies for the open L2 level"""
+    print("\n=== Paddock HLOD Build ===\n")
+
+    report = build_hlods(load_config_v2())
+    unreal.EditorLevelLibrary.save_current_level()
+
+    return report
+
+if __name__ == '__main__':
+    main()
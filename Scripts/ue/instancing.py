@@ -0,0 +1,89 @@
+"""
+Instanced Mesh Helpers
+Spawn actors holding (hierarchical) instanced static mesh components
+"""
+import unreal
+import actor_registry
+import asset_cache
+
+def make_transform(location, rotation=(0, 0, 0), scale=(1, 1, 1)):
+    """Build an unreal.Transform from plain location/rotation/scale tuples"""
+    return unreal.Transform(
+        location=unreal.Vector(location[0], location[1], location[2]),
+        rotation=unreal.Rotator(rotation[0], rotation[1], rotation[2]),
+        scale=unreal.Vector(scale[0], scale[1], scale[2])
+    )
+
+def spawn_instance_host(label, location=(0, 0, 0), tags=None):
+    """Spawn an empty actor that instanced components are attached to"""
+    actor = actor_registry.spawn_actor(
+        unreal.Actor,
+        unreal.Vector(location[0], location[1], location[2]),
+        unreal.Rotator(0, 0, 0),
+        tags=tags or []
+    )
+
+    if actor:
+        actor.set_actor_label(label)
+
+    return actor
+
+def add_instanced_component(actor, mesh, material_path, transforms,
+                            hierarchical=True, num_custom_data=0):
+    """Add an instanced mesh component to actor and fill it with transforms"""
+    component_class = (unreal.HierarchicalInstancedStaticMeshComponent if hierarchical
+                       else unreal.InstancedStaticMeshComponent)
+
+    # Components added from Python must go through the subobject subsystem
+    # so they are registered and saved with the level
+    subsystem = unreal.get_engine_subsystem(unreal.SubobjectDataSubsystem)
+    root_handle = subsystem.k2_gather_subobject_data_for_instance(actor)[0]
+    handle, fail_reason = subsystem.add_new_subobject(
+        unreal.AddNewSubobjectParams(parent_handle=root_handle, new_class=component_class)
+    )
+    if not fail_reason.is_empty():
+        print(f"Warning: Could not add instanced component to {actor.get_actor_label()}: {fail_reason}")
+        return None
+
+    data = unreal.SubobjectDataBlueprintFunctionLibrary.get_data(handle)
+    component = unreal.SubobjectDataBlueprintFunctionLibrary.get_object(data)
+
+    component.set_static_mesh(mesh)
+    if material_path:
+        material = asset_cache.load_asset(material_path)
+        if material:
+            component.set_material(0, material)
+
+    if num_custom_data:
+        component.set_num_custom_data_floats(num_custom_data)
+
+    # Transforms are in world space, the host actor may sit anywhere
+    if transforms:
+        component.add_instances(transforms, False, True)
+
+    return component
+
+def set_instance_custom_data(component, custom_data):
+    """Write one list of custom data floats per instance"""
+    last = len(custom_data) - 1
+    for index, values in enumerate(custom_data):
+        # Only the final write needs to mark the render state dirty
+        component.set_custom_data(index, list(values), index == last)
+
+def replace_instances(component, transforms):
+    """Rewrite all instance transforms in bulk, resizing only when needed"""
+    count = component.get_instance_count()
+
+    if count == len(transforms):
+        if transforms:
+            component.batch_update_instances_transforms(0, transforms, True, True, True)
+        return component
+
+    component.clear_instances()
+    if transforms:
+        component.add_instances(transforms, False, True)
+    return component
+
+def get_instanced_components(actor):
+    """Return all instanced mesh components on an actor"""
+    return list(actor.get_components_by_class(unreal.InstancedStaticMeshComponent))
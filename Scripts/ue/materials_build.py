@@ -3,6 +3,13 @@ Materials Builder for Dairy Farm
 Creates basic materials for the farm scene
 """
 import unreal
+import os
+import sys
+
+# Make sibling helper modules importable when run via -ExecutePythonScript
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import asset_cache
+import profiling
 
 def create_material(name, base_color=(0.5, 0.5, 0.5), roughness=0.8, metallic=0.0):
     """Create a basic material with specified parameters"""
@@ -62,6 +69,49 @@ def create_material(name, base_color=(0.5, 0.5, 0.5), roughness=0.8, metallic=0.
 
     return None
 
+def create_instanced_cow_material(name='M_CowInstanced', roughness=0.8):
+    """Create the herd material reading coat color from per-instance custom data"""
+    package_path = f'/Game/Farm/Materials/{name}'
+
+    if unreal.EditorAssetLibrary.does_asset_exist(package_path):
+        print(f"Material {name} already exists, skipping...")
+        return unreal.EditorAssetLibrary.load_asset(package_path)
+
+    asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
+    material = asset_tools.create_asset(name, '/Game/Farm/Materials', unreal.Material, unreal.MaterialFactoryNew())
+
+    if material:
+        material.set_editor_property('used_with_instanced_static_meshes', True)
+
+        # Custom data 0-2 holds the coat color (see cow_herd.py)
+        coat_node = unreal.MaterialEditingLibrary.create_material_expression(
+            material, unreal.MaterialExpressionPerInstanceCustomData3Vector, -300, 0
+        )
+        coat_node.set_editor_property('data_index', 0)
+
+        roughness_node = unreal.MaterialEditingLibrary.create_material_expression(
+            material, unreal.MaterialExpressionConstant, -300, 200
+        )
+        roughness_node.r = roughness
+
+        unreal.MaterialEditingLibrary.connect_material_property(
+            coat_node, '',
+            unreal.MaterialProperty.MP_BASE_COLOR, material
+        )
+        unreal.MaterialEditingLibrary.connect_material_property(
+            roughness_node, '',
+            unreal.MaterialProperty.MP_ROUGHNESS, material
+        )
+
+        unreal.MaterialEditingLibrary.recompile_material(material)
+        unreal.EditorAssetLibrary.save_asset(package_path)
+
+        print(f"Created material: {name}")
+        return material
+
+    return None
+
+@profiling.profiled('materials_build')
 def main():
     """Create all farm materials"""
     print("=== Building Farm Materials ===")
@@ -94,14 +144,24 @@ def main():
     # Create each material
     created_count = 0
     for mat_params in materials:
-        if create_material(*mat_params):
+        with profiling.scope(mat_params[0]):
+            if create_material(*mat_params):
+                created_count += 1
+
+    # Instanced herd material
+    with profiling.scope('M_CowInstanced'):
+        if create_instanced_cow_material():
             created_count += 1
 
     print(f"\n=== Material Creation Complete ===")
     print(f"Created {created_count} materials in /Game/Farm/Materials")
 
     # Save all assets
-    unreal.EditorAssetLibrary.save_directory('/Game/Farm/Materials')
+    with profiling.scope('save'):
+        unreal.EditorAssetLibrary.save_directory('/Game/Farm/Materials')
+
+    # Drop cached material handles so generators pick up rebuilt assets
+    asset_cache.invalidate_prefix('/Game/Farm/Materials')
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+Pasture Model
+Grass cover raster (kg DM/ha) per paddock, stored as one (paddocks, rows,
+columns) float32 array so regrowth and grazing update every paddock in a
+few whole-array operations. Cover regrows logistically towards
+MAX_COVER and is grazed down towards RESIDUAL_COVER by the cows in a
+paddock. Does not import unreal.
+"""
+import math
+import os
+from datetime import timedelta
+
+import numpy as np
+
+import grazing_store
+import rng_streams
+
+PASTURE_FILE = 'Pasture.npz'
+
+# Default raster resolution, metres per cell
+CELL_M = 1.0
+
+# Cover in kg dry matter per hectare
+MAX_COVER = 4000.0
+MIN_COVER = 500.0
+RESIDUAL_COVER = 1500.0
+START_COVER = (2000.0, 3000.0)
+START_NOISE = 150.0
+
+# Logistic regrowth rate per day and dry matter eaten per cow per day (kg)
+GROWTH_RATE = 0.08
+INTAKE_KG = 18.0
+
+# Longest update step, longer advances are split into steps of this size
+MAX_STEP_DAYS = 1.0
+
+def grid_shape(size_m, cell_m=CELL_M):
+    """(rows, columns) of one paddock's grid"""
+    width, height = size_m
+    return (max(int(round(height / cell_m)), 1), max(int(round(width / cell_m)), 1))
+
+class Pasture:
+    """Per-paddock cover grids plus the simulated time they were last advanced to"""
+
+    def __init__(self, cover, cell_m=CELL_M, clock=None):
+        self.cover = np.asarray(cover, dtype=np.float32)
+        self.cell_m = cell_m
+        self.clock = clock
+
+    @classmethod
+    def create(cls, paddocks, size_m, cell_m=CELL_M, seed=42, clock=None):
+        """Fresh pasture, each paddock a seeded base cover plus per-cell noise"""
+        shape = grid_shape(size_m, cell_m)
+        cover = np.empty((paddocks,) + shape, dtype=np.float32)
+        for index in range(paddocks):
+            rng = rng_streams.stream(seed, 'pasture', index)
+            cover[index] = rng.uniform(*START_COVER) + rng.normal(0, START_NOISE, shape)
+        np.clip(cover, MIN_COVER, MAX_COVER, out=cover)
+        return cls(cover, cell_m, clock)
+
+    @classmethod
+    def from_config(cls, config, clock=None):
+        """Fresh pasture for the config's paddocks"""
+        return cls.create(config.get('paddocks', 6), config.get('paddock_size_m', [120, 80]),
+                          config.get('pasture_cell_m', CELL_M), config.get('seed', 42), clock)
+
+    @property
+    def paddocks(self):
+        return self.cover.shape[0]
+
+    @property
+    def cell_ha(self):
+        return self.cell_m * self.cell_m / 10000
+
+    def matches(self, config):
+        """True when the grids fit the config's paddock count, size and resolution"""
+        cell_m = config.get('pasture_cell_m', CELL_M)
+        shape = grid_shape(config.get('paddock_size_m', [120, 80]), cell_m)
+        return self.paddocks == config.get('paddocks', 6) and self.cover.shape[1:] == shape and self.cell_m == cell_m
+
+    def grow(self, days):
+        """Logistic regrowth of every cell, solved exactly over days"""
+        decay = math.exp(-GROWTH_RATE * days)
+        cover = self.cover
+        # K / (1 + (K / c - 1) * e^(-r t)), in place
+        np.divide(MAX_COVER, cover, out=cover)
+        cover -= 1
+        cover *= decay
+        cover += 1
+        np.divide(MAX_COVER, cover, out=cover)
+
+    def graze(self, occupancy, days):
+        """Remove herd intake from occupied paddocks, proportional to cover above residual
+
+        occupancy maps paddock index to cows. A paddock without enough
+        cover above residual is grazed down to residual.
+        """
+        rows = np.array([index for index, cows in occupancy.items() if cows > 0], dtype=np.int64)
+        if not len(rows):
+            return
+        cows = np.array([occupancy[index] for index in rows], dtype=np.float32)
+
+        cover = self.cover[rows]
+        available = np.maximum(cover - RESIDUAL_COVER, 0)
+        available_kg = available.sum(axis=(1, 2)) * self.cell_ha
+        demand_kg = cows * INTAKE_KG * days
+        share = np.divide(demand_kg, available_kg, out=np.ones_like(demand_kg), where=available_kg > 0)
+        np.minimum(share, 1, out=share)
+        self.cover[rows] = cover - available * share[:, None, None]
+
+    def step(self, days, occupancy=None):
+        """Advance regrowth and grazing by days, in steps of at most MAX_STEP_DAYS"""
+        steps = max(int(math.ceil(days / MAX_STEP_DAYS)), 1)
+        for _ in range(steps):
+            self.grow(days / steps)
+            if occupancy:
+                self.graze(occupancy, days / steps)
+        if self.clock is not None:
+            self.clock += timedelta(days=days)
+
+    def advance_to(self, when, occupancy=None):
+        """Step from the pasture clock to when (a datetime or ISO string)
+
+        A time at or before the clock leaves the pasture untouched, so
+        regrowth already simulated ahead (e.g. by grazing_sim) is never
+        applied twice.
+        """
+        when = grazing_store.parse_time(when)
+        if self.clock is None:
+            self.clock = when
+            return
+        if when <= self.clock:
+            return
+        self.step((when - self.clock).total_seconds() / 86400, occupancy)
+        self.clock = when
+
+    def mean_cover(self):
+        """Mean cover per paddock, kg DM/ha"""
+        return self.cover.mean(axis=(1, 2), dtype=np.float64)
+
+    def available_kg(self):
+        """Grazeable dry matter above residual per paddock, kg"""
+        return np.maximum(self.cover - RESIDUAL_COVER, 0).sum(axis=(1, 2), dtype=np.float64) * self.cell_ha
+
+    def next_paddock(self, current, exclude=()):
+        """Paddock with the most grazeable cover, other than current"""
+        available = self.available_kg()
+        available[[current, *exclude]] = -1
+        return int(np.argmax(available))
+
+    def save(self, path):
+        """Write the grids and clock to a compressed .npz file, replaced atomically"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + '.tmp.npz'
+        clock = '' if self.clock is None else grazing_store.format_time(self.clock)
+        np.savez_compressed(temp_path, cover=self.cover, cell_m=self.cell_m, clock=clock)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a pasture written by save()"""
+        with np.load(path) as data:
+            clock = str(data['clock'])
+            return cls(data['cover'], float(data['cell_m']), grazing_store.parse_time(clock) if clock else None)
+
+def load_or_create(config, data_dir, clock=None):
+    """Saved pasture when it fits the config, otherwise a fresh one starting at clock"""
+    path = os.path.join(data_dir, PASTURE_FILE)
+    if os.path.exists(path):
+        try:
+            pasture = Pasture.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: {PASTURE_FILE} unreadable ({e}), starting a fresh pasture")
+        else:
+            if pasture.matches(config):
+                return pasture
+            print("Paddock layout changed, starting a fresh pasture")
+    return Pasture.from_config(config, clock)
+
+def save(pasture, data_dir):
+    """Write the pasture next to GrazingState.json"""
+    pasture.save(os.path.join(data_dir, PASTURE_FILE))
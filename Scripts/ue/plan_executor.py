@@ -0,0 +1,190 @@
+"""
+Farm Plan Executor
+Applies a FarmPlan from farm_plan.py to the current level in bulk
+"""
+import unreal
+import actor_registry
+import asset_cache
+import budget
+import cow_herd
+import instancing
+import profiling
+from farm_plan import COW_MATERIALS, LOCATION, ROTATION, SCALE
+
+def category_modes(config, level='L2'):
+    """'actors' or 'instanced' per category, over-budget categories instanced"""
+    return budget.resolve_modes(config, level)[0]
+
+def spawn_row(mesh, material_path, row, tags=None):
+    """Spawn one static mesh actor from a transform row"""
+    actor = actor_registry.spawn_actor(
+        unreal.StaticMeshActor,
+        unreal.Vector(*row[LOCATION]),
+        unreal.Rotator(*row[ROTATION]),
+        tags=tags
+    )
+
+    if actor:
+        mesh_component = actor.get_component_by_class(unreal.StaticMeshComponent)
+        if mesh_component:
+            mesh_component.set_static_mesh(mesh)
+            mesh_component.set_relative_scale3d(unreal.Vector(*row[SCALE]))
+
+            if material_path:
+                material = asset_cache.load_asset(material_path)
+                if material:
+                    mesh_component.set_material(0, material)
+
+    return actor
+
+def spawn_batch_actors(batch, extra_tags=()):
+    """Spawn one actor per row of a batch"""
+    mesh = asset_cache.load_asset(batch.mesh)
+    paddocks = batch.attributes.get('paddock')
+    actors = []
+
+    for i, row in enumerate(batch.transforms.tolist()):
+        tags = list(batch.tags) + list(extra_tags)
+        if paddocks is not None:
+            tags.append(f'Paddock_{int(paddocks[i])}')
+        actor = spawn_row(mesh, batch.material, row, tags)
+        if actor:
+            actors.append(actor)
+
+    return actors
+
+def row_transforms(rows):
+    """Convert transform rows to unreal.Transform objects"""
+    return [instancing.make_transform(row[LOCATION], row[ROTATION], row[SCALE]) for row in rows]
+
+def spawn_instanced_host(label, location, tags, parts):
+    """Spawn a host holding one instanced component per (batch, rows) part"""
+    host = instancing.spawn_instance_host(label, location, tags=tags)
+    if not host:
+        return None
+
+    for batch, rows in parts:
+        instancing.add_instanced_component(
+            host,
+            asset_cache.load_asset(batch.mesh),
+            batch.material,
+            row_transforms(rows)
+        )
+    return host
+
+def spawn_instanced_batches(batches, plan, tag, label_prefix, extra_tags=()):
+    """Spawn one host per paddock with one instanced component per batch"""
+    hosts = []
+
+    # Yard and lane batches belong to no paddock and share a single host
+    shared = [(batch, batch.transforms.tolist()) for batch in batches
+              if 'paddock' not in batch.attributes and len(batch)]
+    if shared:
+        host = spawn_instanced_host(label_prefix, (0, 0, 0), [tag] + list(extra_tags), shared)
+        if host:
+            hosts.append(host)
+
+    batches = [batch for batch in batches if 'paddock' in batch.attributes]
+    for paddock in plan.paddocks if batches else []:
+        index = paddock['index']
+        parts = []
+        for batch in batches:
+            rows = batch.transforms[batch.attributes['paddock'] == index]
+            if len(rows):
+                parts.append((batch, rows.tolist()))
+
+        if not parts:
+            continue
+
+        host = spawn_instanced_host(
+            f"{label_prefix}_{index}",
+            (paddock['center'][0], paddock['center'][1], 0),
+            [tag, f'Paddock_{index}'] + list(extra_tags),
+            parts
+        )
+        if host:
+            hosts.append(host)
+
+    return hosts
+
+def spawn_cow_actors(batch, extra_tags=()):
+    """Spawn one actor per planned cow"""
+    mesh = asset_cache.load_asset(batch.mesh)
+    actors = []
+
+    for i, row in enumerate(batch.transforms.tolist()):
+        tags = list(batch.tags) + list(extra_tags)
+        tags.insert(1, f"Paddock_{int(batch.attributes['paddock'][i])}")
+
+        cow = spawn_row(mesh, COW_MATERIALS[int(batch.attributes['coat'][i])], row)
+        if cow:
+            # Lying cows are squashed on the actor, as the L2 generator always did
+            if batch.attributes['lying'][i]:
+                cow.set_actor_scale3d(unreal.Vector(0.8, 0.8, 0.95))
+                tags.append('State:Lying')
+            actor_registry.set_tags(cow, tags)
+            actors.append(cow)
+
+    return actors
+
+def cow_records(batch):
+    """Convert a planned cow batch into per-paddock cow_herd records"""
+    cows_by_paddock = {}
+
+    for i, row in enumerate(batch.transforms.tolist()):
+        cows_by_paddock.setdefault(int(batch.attributes['paddock'][i]), []).append({
+            'x': row[0],
+            'y': row[1],
+            'rotation': tuple(row[ROTATION]),
+            'coat': int(batch.attributes['coat'][i]),
+            'lying': bool(batch.attributes['lying'][i])
+        })
+
+    return cows_by_paddock
+
+def apply_cows(plan, mode, extra_tags=()):
+    """Place the planned herd as actors or as per-paddock instances"""
+    if mode == 'instanced':
+        cows_by_paddock = {}
+        for batch in plan.batches['cows']:
+            for index, cows in cow_records(batch).items():
+                cows_by_paddock.setdefault(index, []).extend(cows)
+        centers = {p['index']: p['center'] for p in plan.paddocks}
+        cow_herd.apply_herd(cows_by_paddock, centers)
+        return sum(len(cows) for cows in cows_by_paddock.values())
+
+    # Leftover instanced herds from a previous herd_mode are emptied
+    cow_herd.clear_herds()
+    return sum(len(spawn_cow_actors(batch, extra_tags)) for batch in plan.batches['cows'])
+
+def apply_plan(plan, config, categories, extra_tags=()):
+    """Apply the given plan categories to the current level
+
+    extra_tags are added to every spawned actor, e.g. the regen section tag.
+    Instanced herd actors are owned by cow_herd and rewritten in place.
+    Categories over their actor budget are instanced whatever their mode.
+    """
+    modes = category_modes(config, budget.level_of(plan.level))
+    instanced_groups = {}
+    group_categories = {}
+
+    for category in categories:
+        if category == 'cows':
+            with profiling.scope('cows', mode=modes['cows']):
+                apply_cows(plan, modes['cows'], extra_tags)
+            continue
+
+        if modes.get(category) == 'instanced':
+            # Categories sharing a host (posts and rails) are spawned together
+            host = budget.INSTANCE_HOSTS[category]
+            instanced_groups.setdefault(host, []).extend(plan.batches[category])
+            group_categories.setdefault(host, []).append(category)
+            continue
+
+        with profiling.scope(category, mode='actors'):
+            for batch in plan.batches[category]:
+                spawn_batch_actors(batch, extra_tags)
+
+    for (tag, label_prefix), batches in instanced_groups.items():
+        with profiling.scope('+'.join(group_categories[(tag, label_prefix)]), mode='instanced'):
+            spawn_instanced_batches(batches, plan, tag, label_prefix, extra_tags)
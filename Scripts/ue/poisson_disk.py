@@ -0,0 +1,122 @@
+"""
+Poisson-Disk Sampling
+Bridson's grid-accelerated sampler for placing cows with a minimum spacing.
+Each accepted point checks only the neighbouring background-grid cells, so
+a sample of N points costs O(N). Does not import unreal.
+"""
+import math
+import random
+
+import numpy as np
+
+# Candidates tried around an active point before it is retired
+CANDIDATES = 30
+
+# Spacing target as a fraction of the even-spread spacing sqrt(area / count):
+# low enough that a maximal sample holds comfortably more than count points
+FILL_FACTOR = 0.7
+
+# A maximal Bridson sample reaches roughly this share of hexagonal packing
+BRIDSON_PACKING = 0.6
+
+# Spacing is relaxed by this factor per retry when a sample comes up short
+RELAX_FACTOR = 0.85
+MAX_RELAX_STEPS = 8
+
+def bridson(width, height, min_distance, rng, candidates=CANDIDATES):
+    """Maximal Poisson-disk sample of the rectangle [0, width] x [0, height]
+
+    rng is a numpy Generator. It seeds a plain Python generator for the
+    inner loop, which draws single numbers much faster than numpy does.
+    """
+    if width <= 0 or height <= 0 or min_distance <= 0:
+        return np.zeros((0, 2))
+
+    draw = random.Random(int(rng.integers(2**63))).random
+
+    cell = min_distance / math.sqrt(2)
+    columns = int(math.ceil(width / cell))
+    rows = int(math.ceil(height / cell))
+    grid = [-1] * (columns * rows)
+    min_sq = min_distance * min_distance
+
+    points = []
+    active = []
+
+    def insert(x, y):
+        grid[int(y / cell) * columns + int(x / cell)] = len(points)
+        active.append(len(points))
+        points.append((x, y))
+
+    def fits(x, y):
+        gx = int(x / cell)
+        gy = int(y / cell)
+        for ny in range(max(gy - 2, 0), min(gy + 3, rows)):
+            base = ny * columns
+            for nx in range(max(gx - 2, 0), min(gx + 3, columns)):
+                index = grid[base + nx]
+                if index >= 0:
+                    px, py = points[index]
+                    if (px - x) * (px - x) + (py - y) * (py - y) < min_sq:
+                        return False
+        return True
+
+    insert(draw() * width, draw() * height)
+
+    while active:
+        slot = int(draw() * len(active))
+        ox, oy = points[active[slot]]
+
+        # Candidates in the annulus [r, 2r] around the active point
+        for _ in range(candidates):
+            angle = draw() * 2 * math.pi
+            radius = min_distance * math.sqrt(1 + 3 * draw())
+            x = ox + radius * math.cos(angle)
+            y = oy + radius * math.sin(angle)
+            if 0 <= x < width and 0 <= y < height and fits(x, y):
+                insert(x, y)
+                break
+        else:
+            # Retire the point by swapping in the last active one
+            active[slot] = active[-1]
+            active.pop()
+
+    return np.array(points, dtype=np.float64).reshape(-1, 2)
+
+def sample_points(width, height, count, min_distance, rng):
+    """count points in the rectangle, at least min_distance apart when possible
+
+    A full sample is drawn at a spacing sized for count and a random subset
+    kept, so cows cover the whole area instead of clustering around the
+    first point. If count does not fit at min_distance the spacing is
+    relaxed step by step, and as a last resort the shortfall is filled with
+    uniform draws. Returns (points (count, 2), spacing actually used).
+    """
+    if count <= 0:
+        return np.zeros((0, 2)), min_distance
+
+    area = max(width, 0) * max(height, 0)
+    distance = max(min_distance, FILL_FACTOR * math.sqrt(area / count)) if area else min_distance
+
+    # Too dense for min_distance: start straight from the spacing that fits
+    if area and BRIDSON_PACKING * capacity(width, height, distance) < count:
+        distance = FILL_FACTOR * math.sqrt(area / count)
+
+    points = np.zeros((0, 2))
+    for _ in range(MAX_RELAX_STEPS + 1):
+        points = bridson(width, height, distance, rng)
+        if len(points) >= count:
+            keep = np.sort(rng.choice(len(points), size=count, replace=False))
+            return points[keep], distance
+        distance *= RELAX_FACTOR
+
+    # Far too dense for any spacing: top up with overlapping uniform draws
+    missing = count - len(points)
+    extra = np.column_stack([rng.uniform(0, max(width, 0), missing), rng.uniform(0, max(height, 0), missing)])
+    return np.concatenate([points, extra]), 0.0
+
+def capacity(width, height, min_distance):
+    """Rough number of points a maximal sample holds (hexagonal packing bound)"""
+    if min_distance <= 0:
+        return float('inf')
+    return int(2 * width * height / (math.sqrt(3) * min_distance * min_distance))
@@ -0,0 +1,87 @@
+"""
+Regeneration Manifest
+Hashes the config sections feeding each L2 build step so only sublevels
+whose inputs changed are rebuilt. Does not import unreal.
+"""
+import hashlib
+import json
+import os
+
+# Bump to force a full rebuild after generator changes
+MANIFEST_VERSION = 1
+
+# Config keys, actor_budgets entries and grazing state keys each build step
+# depends on; a budget only affects the categories its section spawns
+SECTIONS = {
+    'Paddocks': {
+        'config': ['seed', 'paddocks', 'paddock_size_m', 'fence_post_spacing_m', 'fence_mode',
+                   'hedge_density_per_100m', 'show_navmesh', 'stream_cell_size_m', 'stream_distance_m',
+                   'hlod_transition_distance_m'],
+        'actor_budgets': ['ground', 'posts', 'rails', 'hedges'],
+        'grazing_state': []
+    },
+    'Yard': {
+        'config': ['yard_buildings', 'lane_points'],
+        'actor_budgets': ['lane', 'buildings'],
+        'grazing_state': []
+    },
+    'Animals': {
+        'config': ['seed', 'paddocks', 'paddock_size_m', 'stocking_density_cows_per_ha',
+                   'min_cows', 'max_cows', 'herd_mode', 'cow_min_spacing_m'],
+        'actor_budgets': ['cows'],
+        'grazing_state': ['active_paddock_index']
+    },
+    'Lighting': {
+        'config': ['time_of_day_hours', 'latitude', 'longitude', 'date', 'utc_offset_hours'],
+        'actor_budgets': [],
+        'grazing_state': []
+    }
+}
+
+MANIFEST_FILE = 'RegenManifest.json'
+
+def section_tag(section):
+    """Actor tag marking everything spawned by a build step"""
+    return f'FarmSection:{section}'
+
+def hash_values(values):
+    """Stable hash of JSON-serialisable values"""
+    payload = json.dumps(values, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def section_hashes(config, grazing_state=None):
+    """Hash every section's inputs"""
+    grazing_state = grazing_state or {}
+    budgets = config.get('actor_budgets', {})
+    hashes = {}
+
+    for section, keys in SECTIONS.items():
+        hashes[section] = hash_values({
+            'version': MANIFEST_VERSION,
+            'config': {key: config.get(key) for key in keys['config']},
+            'actor_budgets': {key: budgets.get(key) for key in keys['actor_budgets']},
+            'grazing_state': {key: grazing_state.get(key) for key in keys['grazing_state']}
+        })
+
+    return hashes
+
+def manifest_path(data_dir):
+    """Manifest location, next to GrazingState.json"""
+    return os.path.join(data_dir, MANIFEST_FILE)
+
+def load_manifest(path):
+    """Load stored section hashes, empty when missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get('sections', {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+def save_manifest(path, hashes):
+    """Store section hashes"""
+    with open(path, 'w') as f:
+        json.dump({'version': MANIFEST_VERSION, 'sections': hashes}, f, indent=2)
+
+def changed_sections(previous, current):
+    """Sections whose hash differs from the stored manifest, in build order"""
+    return [section for section in SECTIONS if previous.get(section) != current.get(section)]
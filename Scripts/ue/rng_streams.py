@@ -0,0 +1,29 @@
+"""
+Seeded RNG Streams
+Independent NumPy generators per (seed, category, paddock) split from one
+SeedSequence, so any paddock or category can be generated on its own, in
+any order or in parallel, and still give bit-identical layouts.
+Does not import unreal.
+"""
+import zlib
+
+import numpy as np
+
+# Spawn key slot for streams that are not tied to a paddock
+GLOBAL = -1
+
+def category_id(category):
+    """Stable 32-bit id of a category name (crc32, unlike hash() it is not salted)"""
+    return zlib.crc32(category.encode('utf-8'))
+
+def seed_sequence(seed, category, paddock=GLOBAL):
+    """SeedSequence for one stream; the spawn key keeps streams independent"""
+    return np.random.SeedSequence(entropy=int(seed), spawn_key=(category_id(category), int(paddock) + 1))
+
+def stream(seed, category, paddock=GLOBAL):
+    """Fresh generator for (seed, category, paddock), always starting at the same state"""
+    return np.random.Generator(np.random.PCG64(seed_sequence(seed, category, paddock)))
+
+def paddock_streams(seed, category, paddock_indices):
+    """One generator per paddock, keyed by paddock index"""
+    return {int(index): stream(seed, category, index) for index in paddock_indices}
@@ -0,0 +1,170 @@
+"""
+Solar Position
+Sun elevation and azimuth from latitude, longitude and date (NOAA solar
+calculator equations), precomputed into a per-day lookup table so time of
+day queries are a constant-time interpolation. Does not import unreal.
+"""
+import math
+from datetime import date
+
+import numpy as np
+
+# Somerset, UK on midsummer's day, clock time in BST
+DEFAULT_LATITUDE = 51.1
+DEFAULT_LONGITUDE = -2.7
+DEFAULT_DATE = '2024-06-21'
+DEFAULT_UTC_OFFSET = 1.0
+
+# One sample per minute of the day, 00:00 to 24:00 inclusive
+TABLE_SAMPLES = 24 * 60 + 1
+
+# World +X is north and +Y is east, so a light yaw of 0 shines northwards
+NORTH_YAW = 0.0
+
+def parse_date(value):
+    """Accept a date, an ISO 'YYYY-MM-DD' string, or None for the default"""
+    if value is None:
+        value = DEFAULT_DATE
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+def julian_day(day):
+    """Julian day number at 00:00 UTC of a calendar date"""
+    return day.toordinal() + 1721424.5
+
+def solar_position(latitude, longitude, day, hours, utc_offset=0.0):
+    """Sun elevation and azimuth in degrees for local clock hours (scalar or array)
+
+    Azimuth is measured clockwise from north. Elevation is geometric,
+    without atmospheric refraction.
+    """
+    hours = np.asarray(hours, dtype=np.float64)
+    jc = (julian_day(day) + (hours - utc_offset) / 24.0 - 2451545.0) / 36525.0
+
+    mean_long = np.mod(280.46646 + jc * (36000.76983 + jc * 0.0003032), 360.0)
+    mean_anom = np.radians(357.52911 + jc * (35999.05029 - 0.0001537 * jc))
+    eccent = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+
+    center = (np.sin(mean_anom) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+              + np.sin(2 * mean_anom) * (0.019993 - 0.000101 * jc)
+              + np.sin(3 * mean_anom) * 0.000289)
+    omega = np.radians(125.04 - 1934.136 * jc)
+    apparent_long = np.radians(mean_long + center - 0.00569 - 0.00478 * np.sin(omega))
+
+    mean_obliq = 23 + (26 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60) / 60
+    obliq = np.radians(mean_obliq + 0.00256 * np.cos(omega))
+    declination = np.arcsin(np.sin(obliq) * np.sin(apparent_long))
+
+    # Equation of time in minutes
+    y = np.tan(obliq / 2) ** 2
+    long_rad = np.radians(mean_long)
+    eq_time = 4 * np.degrees(
+        y * np.sin(2 * long_rad)
+        - 2 * eccent * np.sin(mean_anom)
+        + 4 * eccent * y * np.sin(mean_anom) * np.cos(2 * long_rad)
+        - 0.5 * y * y * np.sin(4 * long_rad)
+        - 1.25 * eccent * eccent * np.sin(2 * mean_anom)
+    )
+
+    true_solar_minutes = np.mod(hours * 60 + eq_time + 4 * longitude - 60 * utc_offset, 1440.0)
+    hour_angle = np.radians(true_solar_minutes / 4 - 180)
+
+    lat = math.radians(latitude)
+    cos_zenith = (math.sin(lat) * np.sin(declination)
+                  + math.cos(lat) * np.cos(declination) * np.cos(hour_angle))
+    zenith = np.arccos(np.clip(cos_zenith, -1.0, 1.0))
+
+    # Azimuth from the zenith angle, mirrored for the morning half of the day
+    denominator = math.cos(lat) * np.sin(zenith)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_azimuth = (math.sin(lat) * np.cos(zenith) - np.sin(declination)) / denominator
+    cos_azimuth = np.clip(np.nan_to_num(cos_azimuth, nan=1.0), -1.0, 1.0)
+    azimuth_offset = np.degrees(np.arccos(cos_azimuth))
+    azimuth = np.where(hour_angle > 0, azimuth_offset + 180, 540 - azimuth_offset) % 360
+
+    return 90 - np.degrees(zenith), azimuth
+
+def sun_rotation_from_position(elevation, azimuth):
+    """Directional light (pitch, yaw, roll) for a sun elevation and azimuth
+
+    The light shines away from the sun: down by the elevation, and along
+    the azimuth turned round by 180 degrees.
+    """
+    return (-elevation, (azimuth + 180 + NORTH_YAW) % 360, 0.0)
+
+def angular_distance(position_a, position_b):
+    """Angle in degrees between two (elevation, azimuth) sun directions"""
+    elev_a, azim_a = map(math.radians, position_a)
+    elev_b, azim_b = map(math.radians, position_b)
+    cos_d = (math.sin(elev_a) * math.sin(elev_b)
+             + math.cos(elev_a) * math.cos(elev_b) * math.cos(azim_a - azim_b))
+    return math.degrees(math.acos(max(-1.0, min(1.0, cos_d))))
+
+class SunTable:
+    """Sun elevation and azimuth sampled over one day for one location"""
+
+    def __init__(self, latitude, longitude, day, utc_offset=0.0, samples=TABLE_SAMPLES):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.day = day
+        self.utc_offset = utc_offset
+        self.step = 24.0 / (samples - 1)
+
+        elevation, azimuth = solar_position(
+            latitude, longitude, day, np.linspace(0.0, 24.0, samples), utc_offset)
+
+        # Plain lists are faster than numpy for single-element lookups;
+        # azimuth is unwrapped so interpolation never jumps across north
+        self.elevation = elevation.tolist()
+        self.azimuth = np.degrees(np.unwrap(np.radians(azimuth))).tolist()
+
+    def position(self, hours):
+        """Interpolated (elevation, azimuth) for local clock hours"""
+        t = (hours % 24.0) / self.step
+        i = min(int(t), len(self.elevation) - 2)
+        f = t - i
+        elevation = self.elevation[i] + (self.elevation[i + 1] - self.elevation[i]) * f
+        azimuth = self.azimuth[i] + (self.azimuth[i + 1] - self.azimuth[i]) * f
+        return elevation, azimuth % 360
+
+    def rotation(self, hours):
+        """Directional light (pitch, yaw, roll) for local clock hours"""
+        return sun_rotation_from_position(*self.position(hours))
+
+# One table per location and day for the whole editor session
+_tables = {}
+
+def get_table(latitude=DEFAULT_LATITUDE, longitude=DEFAULT_LONGITUDE, day=None, utc_offset=DEFAULT_UTC_OFFSET):
+    """Return the cached table for a location and day, building it once"""
+    day = parse_date(day)
+    key = (float(latitude), float(longitude), day, float(utc_offset))
+    table = _tables.get(key)
+    if table is None:
+        table = SunTable(*key)
+        _tables[key] = table
+    return table
+
+def table_for_config(config):
+    """Cached table for the latitude/longitude/date keys of a farm config"""
+    return get_table(
+        config.get('latitude', DEFAULT_LATITUDE),
+        config.get('longitude', DEFAULT_LONGITUDE),
+        config.get('date', DEFAULT_DATE),
+        config.get('utc_offset_hours', DEFAULT_UTC_OFFSET)
+    )
+
+def sun_rotation(hours, config=None):
+    """Directional light (pitch, yaw, roll) for an hour of day"""
+    return table_for_config(config or {}).rotation(hours)
+
+def main():
+    """Print a day of sun positions for the default location"""
+    table = get_table()
+    print(f"Sun at {table.latitude}, {table.longitude} on {table.day} (UTC{table.utc_offset:+g})")
+    for hour in range(0, 25, 2):
+        elevation, azimuth = table.position(hour)
+        print(f"{hour:02d}:00  elevation {elevation:6.1f}  azimuth {azimuth:6.1f}")
+
+if __name__ == '__main__':
+    main()
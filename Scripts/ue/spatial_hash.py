@@ -0,0 +1,153 @@
+"""
+Spatial Hash Grid
+Uniform grid index over 2D cow positions for radius queries and separation.
+Points are sorted by cell key so each occupied cell is a contiguous slice;
+building and querying stay near-linear in herd size. Does not import unreal.
+"""
+import numpy as np
+
+# Cell coordinates are packed into one int64 key: +/- 2^20 cells per axis
+_CELL_OFFSET = 1 << 20
+_CELL_STRIDE = 1 << 21
+
+# Half of the 3x3 neighbourhood, so every pair of cells is visited once
+_HALF_NEIGHBOURS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+def cell_keys(cells):
+    """Pack (N, 2) integer cell coordinates into int64 keys"""
+    return (cells[:, 0] + _CELL_OFFSET) * _CELL_STRIDE + (cells[:, 1] + _CELL_OFFSET)
+
+def expand_ranges(starts, counts):
+    """Concatenate arange(start, start + count) for every range, vectorized"""
+    total = int(counts.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + (np.arange(total) - offsets)
+
+class SpatialHashGrid:
+    """Uniform grid over 2D points with a sorted cell-key layout"""
+
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self.positions = np.zeros((0, 2))
+        self.order = None
+        self.sorted_keys = np.zeros(0, dtype=np.int64)
+        self.cell_of = np.zeros((0, 2), dtype=np.int64)
+        self.unique_keys = np.zeros(0, dtype=np.int64)
+        self.cell_start = np.zeros(0, dtype=np.int64)
+        self.cell_count = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def build(self, positions):
+        """Index positions from scratch"""
+        self.order = None
+        return self.update(positions)
+
+    def update(self, positions):
+        """Re-index moved positions, reusing the previous sort order
+
+        Between simulation steps few cows change cell, so the keys arrive
+        nearly sorted and the stable sort only has to fix a few runs.
+        """
+        self.positions = np.asarray(positions, dtype=np.float64)[:, :2]
+        self.cell_of = np.floor(self.positions / self.cell_size).astype(np.int64)
+        keys = cell_keys(self.cell_of)
+
+        if self.order is not None and len(self.order) == len(keys):
+            perm = np.argsort(keys[self.order], kind='stable')
+            self.order = self.order[perm]
+        else:
+            self.order = np.argsort(keys, kind='stable')
+
+        self.sorted_keys = keys[self.order]
+        self.unique_keys, self.cell_start, self.cell_count = np.unique(
+            self.sorted_keys, return_index=True, return_counts=True)
+        return self
+
+    def _cell_slices(self, keys):
+        """Start and count of the sorted slice for each key (count 0 if empty)"""
+        if not len(self.unique_keys):
+            return np.zeros(len(keys), dtype=np.int64), np.zeros(len(keys), dtype=np.int64)
+        slot = np.minimum(np.searchsorted(self.unique_keys, keys), len(self.unique_keys) - 1)
+        found = self.unique_keys[slot] == keys
+        return self.cell_start[slot], np.where(found, self.cell_count[slot], 0)
+
+    def query_radius(self, point, radius):
+        """Indices of all points within radius of point"""
+        low = np.floor((np.asarray(point[:2]) - radius) / self.cell_size).astype(np.int64)
+        high = np.floor((np.asarray(point[:2]) + radius) / self.cell_size).astype(np.int64)
+
+        cx, cy = np.meshgrid(np.arange(low[0], high[0] + 1), np.arange(low[1], high[1] + 1), indexing='ij')
+        starts, counts = self._cell_slices(cell_keys(np.column_stack([cx.ravel(), cy.ravel()])))
+        candidates = self.order[expand_ranges(starts, counts)]
+
+        delta = self.positions[candidates] - np.asarray(point[:2])
+        return candidates[np.einsum('ij,ij->i', delta, delta) <= radius * radius]
+
+    def neighbor_pairs(self, radius):
+        """All index pairs (i, j), i != j, closer than radius, each pair once
+
+        radius must not exceed the cell size.
+        """
+        if radius > self.cell_size:
+            raise ValueError(f"radius {radius} exceeds cell size {self.cell_size}")
+
+        sorted_cells = self.cell_of[self.order]
+        firsts = []
+        seconds = []
+
+        for dx, dy in _HALF_NEIGHBOURS:
+            starts, counts = self._cell_slices(cell_keys(sorted_cells + (dx, dy)))
+            rows = np.repeat(np.arange(len(self.order)), counts)
+            others = expand_ranges(starts, counts)
+
+            # Inside one cell keep each unordered pair once
+            if dx == 0 and dy == 0:
+                keep = others > rows
+                rows = rows[keep]
+                others = others[keep]
+
+            firsts.append(self.order[rows])
+            seconds.append(self.order[others])
+
+        i = np.concatenate(firsts)
+        j = np.concatenate(seconds)
+        delta = self.positions[i] - self.positions[j]
+        close = np.einsum('ij,ij->i', delta, delta) < radius * radius
+        return i[close], j[close]
+
+def separation_forces(grid, radius, strength=1.0):
+    """Push vectors (N, 2) moving each point away from neighbours within radius
+
+    Each close pair is pushed apart by strength * overlap (radius - distance),
+    split evenly between both points.
+    """
+    forces = np.zeros_like(grid.positions)
+    i, j = grid.neighbor_pairs(radius)
+    if not len(i):
+        return forces
+
+    delta = grid.positions[i] - grid.positions[j]
+    distance = np.hypot(delta[:, 0], delta[:, 1])
+
+    # Coincident points get an arbitrary but deterministic direction
+    coincident = distance < 1e-6
+    delta[coincident] = (1.0, 0.0)
+    distance[coincident] = 1.0
+
+    push = delta * ((radius - np.minimum(distance, radius)) / distance * strength * 0.5)[:, None]
+    count = len(forces)
+    forces[:, 0] += np.bincount(i, push[:, 0], count) - np.bincount(j, push[:, 0], count)
+    forces[:, 1] += np.bincount(i, push[:, 1], count) - np.bincount(j, push[:, 1], count)
+    return forces
+
+def brute_force_pairs(positions, radius):
+    """O(N^2) reference for neighbor_pairs, for small herds and checks"""
+    positions = np.asarray(positions, dtype=np.float64)[:, :2]
+    delta = positions[:, None, :] - positions[None, :, :]
+    close = np.einsum('ijk,ijk->ij', delta, delta) < radius * radius
+    i, j = np.nonzero(np.triu(close, k=1))
+    return i, j
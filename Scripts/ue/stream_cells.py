@@ -0,0 +1,54 @@
+"""
+Streaming Cells
+Splits the paddock grid into square N x N metre tiles, one streaming
+sublevel per tile, and sizes the distance-based streaming volume of each
+tile. Does not import unreal.
+"""
+import math
+
+CELL_LEVEL_PREFIX = 'DairyFarm_L2_Cell'
+
+def cell_of(x, y, cell_size):
+    """Integer (column, row) of the tile holding a point, sizes in cm"""
+    return (int(math.floor(x / cell_size)), int(math.floor(y / cell_size)))
+
+def coord_name(value):
+    """Asset-name-safe tile coordinate: -3 becomes m3"""
+    return f"m{-value}" if value < 0 else str(value)
+
+def cell_level_name(cell):
+    """Sublevel name of a tile, e.g. DairyFarm_L2_Cell_2_m1"""
+    return f"{CELL_LEVEL_PREFIX}_{coord_name(cell[0])}_{coord_name(cell[1])}"
+
+def assign_paddocks(paddocks, cell_size):
+    """Paddock indices per tile, keyed by the tile holding each paddock center
+
+    Tiles come back sorted so sublevels are always created in the same order.
+    """
+    cells = {}
+    for paddock in paddocks:
+        cells.setdefault(cell_of(paddock['center'][0], paddock['center'][1], cell_size), []).append(
+            paddock['index'])
+    return dict(sorted(cells.items()))
+
+def content_bounds(paddocks):
+    """Bounding box of a group of paddocks; fences may overhang their tile"""
+    min_x = min(p['center'][0] - p['size'][0] / 2 for p in paddocks)
+    min_y = min(p['center'][1] - p['size'][1] / 2 for p in paddocks)
+    max_x = max(p['center'][0] + p['size'][0] / 2 for p in paddocks)
+    max_y = max(p['center'][1] + p['size'][1] / 2 for p in paddocks)
+    return (min_x, min_y, max_x, max_y)
+
+def streaming_box(bounds, stream_distance, height=10000):
+    """Center and half extents of a streaming volume reaching stream_distance past bounds"""
+    min_x, min_y, max_x, max_y = bounds
+    center = ((min_x + max_x) / 2, (min_y + max_y) / 2, 0)
+    extent = ((max_x - min_x) / 2 + stream_distance, (max_y - min_y) / 2 + stream_distance, height / 2)
+    return center, extent
+
+def distance_to_bounds(point, bounds):
+    """Distance from a point to the nearest edge of a box (0 inside it)"""
+    min_x, min_y, max_x, max_y = bounds
+    dx = max(min_x - point[0], 0, point[0] - max_x)
+    dy = max(min_y - point[1], 0, point[1] - max_y)
+    return math.hypot(dx, dy)
@@ -3,66 +3,244 @@ Time of Day Utilities
 Sun rotation and skylight recapture helpers
 """
 import unreal
+import os
+import sys
+import time
 
-def set_time_of_day(hours):
-    """Set time of day by rotating sun and updating skylight"""
-    print(f"Setting time of day to {hours} hours")
+# Make sibling helper modules importable when run via -ExecutePythonScript
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import actor_registry
+import farm_config
+import solar
 
-    # Find sun (directional light)
-    sun = None
-    for actor in unreal.EditorLevelLibrary.get_all_level_actors():
-        if isinstance(actor, unreal.DirectionalLight) and 'Sun' in actor.tags:
-            sun = actor
-            break
+def find_sun():
+    """Return the directional light tagged 'Sun', or None"""
+    return actor_registry.find_first(unreal.DirectionalLight, 'Sun')
 
-    if not sun:
-        print("Warning: Sun not found")
-        return
+def read_time_tag(sun, default=15.5):
+    """Read the hour stored in the sun's TimeOfDay: tag"""
+    for tag in sun.tags:
+        tag = str(tag)
+        if tag.startswith('TimeOfDay:'):
+            return float(tag.split(':')[1])
+    return default
 
-    # Calculate sun rotation
-    # 6am = sunrise (0°), 12pm = noon (90°), 6pm = sunset (180°)
-    sun_angle = (hours - 6) * 15  # 15 degrees per hour
-    pitch = -sun_angle if sun_angle < 180 else -sun_angle + 360
+# Skip sky recaptures until the sun moved this far since the last one
+RECAPTURE_ANGLE_DEG = 5.0
 
-    # Update sun rotation
-    sun.set_actor_rotation(unreal.Rotator(pitch, 45, 0), False)
+# Minimum time between recaptures while the hour is stepped rapidly
+RECAPTURE_DEBOUNCE_SECONDS = 0.5
 
-    # Update sun tag
-    new_tags = []
-    for tag in sun.tags:
-        if not tag.startswith('TimeOfDay:'):
-            new_tags.append(tag)
-    new_tags.append(f'TimeOfDay:{hours}')
-    sun.tags = new_tags
+# Fog density and inscattering color for day and night
+FOG_SETTINGS = {
+    True: (0.015, (0.8, 0.8, 0.9, 1.0)),
+    False: (0.025, (0.2, 0.2, 0.3, 1.0))
+}
+
+def load_sun_table():
+    """Solar lookup table for the farm's latitude, longitude and date"""
+    try:
+        config = farm_config.load(farm_config.L2_CONFIG)
+    except (OSError, ValueError):
+        config = {}
+    return solar.table_for_config(config)
+
+def is_daytime(elevation):
+    """Whether the fog should use its daytime settings"""
+    return elevation > 0
+
+def apply_fog(fog_component, daytime):
+    """Write the day or night fog settings to a fog component"""
+    density, color = FOG_SETTINGS[daytime]
+    fog_component.set_fog_density(density)
+    fog_component.set_fog_inscattering_color(unreal.LinearColor(*color))
+
+class TimeOfDayController:
+    """Applies time of day changes, touching only what actually changed
+
+    Light and fog handles are cached for the editor session. The sky light
+    is recaptured only once the sun direction moved recapture_angle degrees
+    (or the day/night fog flipped) and at most once per debounce_seconds; a skipped
+    recapture stays pending until flush() or the next editor tick after
+    the debounce window.
+    """
+
+    def __init__(self, recapture_angle=RECAPTURE_ANGLE_DEG, debounce_seconds=RECAPTURE_DEBOUNCE_SECONDS,
+                 sun_table=None):
+        self.recapture_angle = recapture_angle
+        self.sun_table = sun_table
+        self.debounce_seconds = debounce_seconds
+        self.stats = {'updates': 0, 'rotations': 0, 'fog_updates': 0, 'recaptures': 0, 'skipped_recaptures': 0}
+        self.reset()
+
+    def reset(self):
+        """Forget cached handles and applied values"""
+        self._sun = None
+        self._sky_component = None
+        self._fog_component = None
+        self._hours = None
+        self._rotation = None
+        self._position = None
+        self._daytime = None
+        self._captured_position = None
+        self._captured_at = None
+        self._pending = False
+        self._tick_handle = None
+
+    def table(self):
+        """Solar lookup table, loaded from the farm config on first use"""
+        if self.sun_table is None:
+            self.sun_table = load_sun_table()
+        return self.sun_table
+
+    def _valid(self, handle):
+        return handle is not None and unreal.SystemLibrary.is_valid(handle)
+
+    def sun(self):
+        """Cached sun actor, looked up again if it was destroyed"""
+        if not self._valid(self._sun):
+            self._sun = find_sun()
+            self._rotation = None
+            self._hours = None
+        return self._sun
+
+    def sky_component(self):
+        """Cached sky light component"""
+        if not self._valid(self._sky_component):
+            sky_light = actor_registry.find_first(unreal.SkyLight)
+            self._sky_component = sky_light.get_component_by_class(unreal.SkyLightComponent) if sky_light else None
+            self._captured_position = None
+        return self._sky_component
+
+    def fog_component(self):
+        """Cached exponential height fog component"""
+        if not self._valid(self._fog_component):
+            fog = actor_registry.find_first(unreal.ExponentialHeightFog)
+            self._fog_component = (fog.get_component_by_class(unreal.ExponentialHeightFogComponent)
+                                   if fog else None)
+            self._daytime = None
+        return self._fog_component
+
+    def set_time(self, hours, debounce=True):
+        """Apply an hour of day, returns False when there is no sun"""
+        sun = self.sun()
+        if not sun:
+            print("Warning: Sun not found")
+            return False
+
+        self.stats['updates'] += 1
+
+        # Table lookup, no trigonometry per update
+        position = self.table().position(hours)
+        rotation = solar.sun_rotation_from_position(*position)
+        self._position = position
+
+        if rotation != self._rotation:
+            pitch, yaw, roll = rotation
+            sun.set_actor_rotation(unreal.Rotator(roll=roll, pitch=pitch, yaw=yaw), False)
+            self._rotation = rotation
+            self.stats['rotations'] += 1
 
-    # Recapture skylight
-    for actor in unreal.EditorLevelLibrary.get_all_level_actors():
-        if isinstance(actor, unreal.SkyLight):
-            sky_component = actor.get_component_by_class(unreal.SkyLightComponent)
-            if sky_component:
-                sky_component.recapture_sky()
-                print("Sky light recaptured")
-            break
+        if hours != self._hours:
+            # Only the TimeOfDay tag changes, other tags are kept as they are
+            new_tags = [tag for tag in sun.tags if not str(tag).startswith('TimeOfDay:')]
+            new_tags.append(f'TimeOfDay:{hours}')
+            actor_registry.set_tags(sun, new_tags)
+            self._hours = hours
 
-    # Update atmosphere
-    update_atmosphere_for_time(hours)
+        daytime = is_daytime(position[0])
+        fog_changed = False
+        fog_component = self.fog_component()
+        if fog_component and daytime != self._daytime:
+            apply_fog(fog_component, daytime)
+            self._daytime = daytime
+            self.stats['fog_updates'] += 1
+            fog_changed = True
 
-    print(f"Time of day set to {hours} hours")
+        if (self._captured_position is None or fog_changed
+                or solar.angular_distance(position, self._captured_position) >= self.recapture_angle):
+            self.request_recapture(debounce)
+
+        return True
+
+    def request_recapture(self, debounce=True):
+        """Recapture now, or mark it pending while inside the debounce window"""
+        now = time.monotonic()
+        if debounce and self._captured_at is not None and now - self._captured_at < self.debounce_seconds:
+            if not self._pending:
+                self.stats['skipped_recaptures'] += 1
+            self._pending = True
+            self._schedule_flush()
+            return False
+
+        return self.recapture()
+
+    def recapture(self):
+        """Recapture the sky light for the current sun angle"""
+        self._pending = False
+        sky_component = self.sky_component()
+        if not sky_component:
+            return False
+
+        sky_component.recapture_sky()
+        self._captured_position = self._position
+        self._captured_at = time.monotonic()
+        self.stats['recaptures'] += 1
+        print("Sky light recaptured")
+        return True
+
+    def flush(self):
+        """Run a pending recapture immediately"""
+        self._unschedule_flush()
+        if self._pending:
+            return self.recapture()
+        return False
+
+    def _schedule_flush(self):
+        """Run the pending recapture on an editor tick after the debounce window"""
+        if self._tick_handle is not None or not hasattr(unreal, 'register_slate_post_tick_callback'):
+            return
+        self._tick_handle = unreal.register_slate_post_tick_callback(self._on_tick)
+
+    def _unschedule_flush(self):
+        if self._tick_handle is not None:
+            unreal.unregister_slate_post_tick_callback(self._tick_handle)
+            self._tick_handle = None
+
+    def _on_tick(self, delta_seconds):
+        if time.monotonic() - self._captured_at >= self.debounce_seconds:
+            self.flush()
+
+    def print_stats(self):
+        """Print how many component updates were made and skipped"""
+        stats = self.stats
+        print(f"Time of day: {stats['updates']} updates, {stats['rotations']} sun rotations, "
+              f"{stats['fog_updates']} fog updates, {stats['recaptures']} recaptures "
+              f"({stats['skipped_recaptures']} debounced)")
+
+# One controller per editor session so handles and applied values persist
+_controller = None
+
+def get_controller():
+    """Return the session-wide time of day controller"""
+    global _controller
+    if _controller is None:
+        _controller = TimeOfDayController()
+    return _controller
+
+def set_time_of_day(hours, debounce=True):
+    """Set time of day by rotating sun and updating skylight"""
+    print(f"Setting time of day to {hours} hours")
+
+    if get_controller().set_time(hours, debounce):
+        print(f"Time of day set to {hours} hours")
 
 def toggle_day_night():
     """Toggle between day (13:00) and night (03:00)"""
     print("Toggling day/night...")
 
     # Find current time
-    current_time = 15.5  # Default
-
-    for actor in unreal.EditorLevelLibrary.get_all_level_actors():
-        if isinstance(actor, unreal.DirectionalLight) and 'Sun' in actor.tags:
-            for tag in actor.tags:
-                if tag.startswith('TimeOfDay:'):
-                    current_time = float(tag.split(':')[1])
-                    break
-            break
+    current_time = get_current_time()
 
     # Toggle between day and night
     if current_time < 12:
@@ -72,34 +250,11 @@ def toggle_day_night():
 
     set_time_of_day(new_time)
 
-def update_atmosphere_for_time(hours):
-    """Update fog and atmosphere based on time"""
-
-    # Find exponential height fog
-    for actor in unreal.EditorLevelLibrary.get_all_level_actors():
-        if isinstance(actor, unreal.ExponentialHeightFog):
-            fog_component = actor.get_component_by_class(unreal.ExponentialHeightFogComponent)
-            if fog_component:
-                # Adjust fog density based on time
-                if 6 <= hours <= 18:  # Daytime
-                    fog_component.set_fog_density(0.015)
-                    fog_component.set_fog_inscattering_color(
-                        unreal.LinearColor(0.8, 0.8, 0.9, 1.0)
-                    )
-                else:  # Nighttime
-                    fog_component.set_fog_density(0.025)
-                    fog_component.set_fog_inscattering_color(
-                        unreal.LinearColor(0.2, 0.2, 0.3, 1.0)
-                    )
-            break
-
 def get_current_time():
     """Get current time of day from sun"""
-    for actor in unreal.EditorLevelLibrary.get_all_level_actors():
-        if isinstance(actor, unreal.DirectionalLight) and 'Sun' in actor.tags:
-            for tag in actor.tags:
-                if tag.startswith('TimeOfDay:'):
-                    return float(tag.split(':')[1])
+    sun = find_sun()
+    if sun:
+        return read_time_tag(sun)
 
     return 15.5  # Default
 
@@ -118,7 +273,8 @@ def create_time_lapse(start_hour=6, end_hour=20, steps=15):
 
     for i in range(steps):
         hour = start_hour + (i * hour_step)
-        set_time_of_day(hour)
+        # Every frame is captured, so only the angle threshold applies
+        set_time_of_day(hour, debounce=False)
 
         # Would trigger screenshot here in actual implementation
         print(f"Time lapse frame {i+1}/{steps}: {hour:.1f} hours")
@@ -137,6 +293,11 @@ def main():
     # Test specific time
     set_time_of_day(17.5)
 
+    # Commandlet runs never tick, so apply any debounced recapture now
+    controller = get_controller()
+    controller.flush()
+    controller.print_stats()
+
     print("\nTime utilities ready")
 
 if __name__ == '__main__':